@@ -0,0 +1,55 @@
+"""Typed LLM analysis: the report rows as a pydantic model instead of a model-written HTML document.
+
+With LLM_OUTPUT=structured the Agent returns a GradeAnalysis (output_type), and the email HTML is
+rendered locally by local_report.render_report_html from its precompiled template. The model only
+generates the rows, not the markup, so output tokens drop several-fold and the layout is identical
+on every run. Counts and sorting are done locally from the rows.
+"""
+from pydantic import BaseModel, Field
+
+from local_report import ReportRow
+from records import parse_date, parse_number
+
+
+class MissingAssignment(BaseModel):
+    assignment: str
+    due_date: str = ""
+    score: str = Field("", description="The score as shown, e.g. 'M' or '0.00'")
+
+
+class LowAssignment(BaseModel):
+    assignment: str
+    due_date: str = ""
+    percent: str = Field(description="The graded percent as shown, e.g. '71.00%'")
+
+
+class CourseAnalysis(BaseModel):
+    course: str
+    grade: str = Field("", description="The class grade as shown, e.g. '70.13%'")
+    missing: list[MissingAssignment] = Field(
+        default_factory=list, description="Assignments marked 'M - Missing' or with a 0.00 score"
+    )
+    below: list[LowAssignment] = Field(default_factory=list, description="Graded assignments below 80%")
+
+
+class GradeAnalysis(BaseModel):
+    # Rows are grouped by course so the course name is generated once, not on every row
+    courses: list[CourseAnalysis] = Field(default_factory=list, description="Every course in the data")
+    summary: str = Field("", description="Two or three plain sentences for a parent; no HTML")
+
+
+def report_rows(analysis):
+    """(missing, below, classes) ReportRows for local_report.assemble_report."""
+    missing, below, classes = [], [], []
+    for c in analysis.courses:
+        if c.grade:
+            classes.append(ReportRow(c.course, score_text=c.grade, grade=parse_number(c.grade)))
+        missing += [
+            ReportRow(c.course, m.assignment, m.due_date, parse_date(m.due_date), m.score, parse_number(m.score))
+            for m in c.missing
+        ]
+        below += [
+            ReportRow(c.course, b.assignment, b.due_date, parse_date(b.due_date), b.percent, parse_number(b.percent))
+            for b in c.below
+        ]
+    return missing, below, classes
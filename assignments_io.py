@@ -0,0 +1,128 @@
+"""Streaming, crash-safe reads and writes of the assignments artifact (ASSIGNMENTS_PATH).
+
+The writer emits each course as soon as it's handed over into a temp file next to the target and
+renames it into place, so a concurrent reader sees either the previous file or the complete new one,
+never a truncated one. A path ending in ".gz" is gzip-compressed.
+
+The layout is the records.py JSON document with one course per line:
+
+    {"format":"hac-records","version":1,"timestamp":"...","courses":[
+    [course 1],
+    [course 2]
+    ]}
+
+so it parses as a whole with records.loads() and streams line by line with iter_courses().
+Single-line documents from records.dumps() and the older "Timestamp: ..." text files are still read.
+"""
+import gzip
+import itertools
+import json
+import os
+import time
+
+from records import RECORDS_FORMAT, RECORDS_VERSION, iter_parse_lines, loads, pack_course, render_lines, unpack_course
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class AssignmentsWriter:
+    """Context manager writing Course records to `path` atomically; nothing is replaced if the block raises.
+
+        with AssignmentsWriter(path) as out:
+            for course in courses:
+                out.write(course)
+    """
+
+    def __init__(self, path, timestamp=None, compress=None):
+        self.path = path
+        self.timestamp = timestamp or time.strftime("%Y-%m-%d %H:%M:%S")
+        self.compress = path.endswith(".gz") if compress is None else compress
+        self.count = 0
+        self._tmp = None
+        self._raw = None
+        self._file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        self._tmp = os.path.join(directory, f".{os.path.basename(self.path)}.{os.getpid()}.tmp")
+        fd = os.open(self._tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        self._raw = os.fdopen(fd, "wb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0) if self.compress else self._raw
+        header = {"format": RECORDS_FORMAT, "version": RECORDS_VERSION, "timestamp": self.timestamp}
+        self._file.write((_dumps(header)[:-1] + ',"courses":[').encode("utf-8"))
+        return self
+
+    def write(self, course):
+        sep = ",\n" if self.count else "\n"
+        self._file.write((sep + _dumps(pack_course(course))).encode("utf-8"))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._file.write(b"\n]}\n")
+            if self._file is not self._raw:
+                self._file.close()
+            if exc_type is None:
+                self._raw.flush()
+                os.fsync(self._raw.fileno())
+            self._raw.close()
+            if exc_type is None:
+                os.replace(self._tmp, self.path)
+        finally:
+            if os.path.exists(self._tmp):
+                os.unlink(self._tmp)
+        return False
+
+
+def write_courses(path, courses, timestamp=None):
+    """Stream an iterable of Course records (a list or a generator) to `path`; returns the number written."""
+    with AssignmentsWriter(path, timestamp) as out:
+        for course in courses:
+            out.write(course)
+    return out.count
+
+
+def _open_text(path):
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == _GZIP_MAGIC:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_courses(path):
+    """Yield the Course records of a saved file without holding the whole document in memory."""
+    with _open_text(path) as f:
+        first = f.readline()
+        stripped = first.strip()
+        if stripped.startswith("{") and stripped.endswith('"courses":['):
+            # One course per line, as written by AssignmentsWriter
+            for line in f:
+                line = line.strip().rstrip(",")
+                if line.startswith("["):
+                    yield unpack_course(json.loads(line))
+        elif stripped.startswith("{"):
+            # A single-line records.dumps() document
+            yield from loads(first + f.read())[0]
+        else:
+            lines = (line.strip() for line in itertools.chain([first], f))
+            yield from iter_parse_lines(
+                line for line in lines if line and not line.startswith("Timestamp:")
+            )
+
+
+def iter_lines(path):
+    """The prompt's text lines of a saved file, one course at a time."""
+    for course in iter_courses(path):
+        yield from render_lines((course,))
+
+
+def load_assignments(path):
+    """Courses from a saved file: the compact format (plain or gzip), or the older "Timestamp: ..." text files."""
+    return list(iter_courses(path))
+
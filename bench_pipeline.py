@@ -0,0 +1,225 @@
+"""Offline end-to-end benchmark of the grade check: scrape -> analysis -> email with no network.
+
+Each student gets a hac_standin.py server (optionally serving a recorded Assignments page), the
+LLM is a pydantic-ai FunctionModel that sleeps --llm-latency seconds before answering, and email
+goes through the outbox to an in-process smtp_standin.py server. The real pipeline (run_grade_check) runs unchanged on top of them,
+once with a single student and once with --students students, and the result is written as JSON
+so runs from two commits can be compared:
+
+    python bench_pipeline.py --runs 3 --out /tmp/bench-new.json
+    python bench_pipeline.py --runs 3 --compare /tmp/bench-old.json
+
+Reported per scenario (median over --runs): wall time, mean/p50/max of each stage (scrape, analysis,
+email; the email stage queues the report, and the batch delivery at the end of the run is part of
+the wall time), peak RSS of this process and of the largest scrape worker, students per minute and
+assignment rows per second.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_WORK_DIR = tempfile.mkdtemp(prefix="hac-bench-")
+# Configure the checker before it is imported: isolated state, no caches, no Logfire, HTTP scraping
+for _name, _value in {
+    "ASSIGNMENTS_PATH": os.path.join(_WORK_DIR, "assignments.txt"),
+    "HISTORY_DB": os.path.join(_WORK_DIR, "history.sqlite3"),
+    "LLM_CACHE": "false",
+    "COURSE_CACHE": "false",
+    "SESSION_CACHE": "false",
+    "LLM_LATENCY_STATS": "",
+    "LOGFIRE_DISABLE": "true",
+    "SCRAPE_BACKEND": "http",
+    "GMAIL_SENDER": "bench@example.com",
+    "GMAIL_APP_PASSWORD": "bench",
+    "GMAIL_RECEIVERS": "parent@example.com",
+    "OUTBOX_DIR": os.path.join(_WORK_DIR, "outbox"),
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import pydanticai_gradechecker as checker  # noqa: E402
+from analysis_schema import CourseAnalysis, GradeAnalysis  # noqa: E402
+from assignments_io import load_assignments  # noqa: E402
+from hac_standin import start_standin  # noqa: E402
+from llm_router import LatencyStats, LLMRouter, pydantic_ai_provider  # noqa: E402
+from outbox import Outbox  # noqa: E402
+from smtp_standin import start_smtp_standin  # noqa: E402
+
+STAGES = ("scrape", "analysis", "email")
+
+
+def fake_model(latency):
+    """A FunctionModel answering every prompt after `latency` seconds, in the shape the prompt asks for."""
+    import asyncio
+
+    from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+    from pydantic_ai.models.function import FunctionModel
+
+    async def answer(messages, info):
+        await asyncio.sleep(latency)
+        prompt = str(messages[-1])
+        # output_tools since pydantic-ai 0.1, result_tools before (the locked 0.0.24)
+        output_tools = getattr(info, "output_tools", None) or getattr(info, "result_tools", None) or []
+        if output_tools:
+            # LLM_OUTPUT=structured: answer through the GradeAnalysis output tool
+            analysis = GradeAnalysis(
+                courses=[CourseAnalysis(course="Bench Course", grade="90.00%")], summary="Benchmark run."
+            )
+            return ModelResponse(parts=[ToolCallPart(output_tools[0].name, analysis.model_dump_json())])
+        if "CLASS | <course>" in prompt:
+            text = "CLASS | Bench Course | 90.00%"
+        else:
+            text = f"<html><body><h2>Analysis</h2><p>{len(prompt)} prompt characters</p></body></html>"
+        return ModelResponse(parts=[TextPart(text)])
+
+    try:
+        return FunctionModel(answer, model_name="bench-fake")
+    except TypeError:
+        # No model_name before pydantic-ai 0.1
+        return FunctionModel(answer)
+
+
+def _peak_rss_mb(who):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _summary(values):
+    if not values:
+        return None
+    return {"mean": round(statistics.mean(values), 4), "p50": round(statistics.median(values), 4),
+            "max": round(max(values), 4)}
+
+
+def run_scenario(students, recorded_html, analysis_mode):
+    """One run_grade_check over `students` fresh stand-ins; returns its metrics."""
+    servers, accounts = [], []
+    for i in range(students):
+        server, url = start_standin(username=f"bench{i}", password="bench", assignments_html=recorded_html)
+        servers.append(server)
+        accounts.append({
+            "name": f"Student {i}", "url": url, "username": f"bench{i}", "password": "bench",
+            "receivers": None, "assignments_path": os.path.join(_WORK_DIR, f"assignments-{i}.txt"),
+        })
+    timings = []
+    started = time.perf_counter()
+    try:
+        results = checker._run_async(checker.run_grade_check(
+            accounts=accounts, email=True, analysis_mode=analysis_mode, workers=students, timings=timings,
+        ))
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+    wall = time.perf_counter() - started
+
+    rows = 0
+    for account in accounts:
+        if os.path.exists(account["assignments_path"]):
+            rows += sum(len(c.assignments) for c in load_assignments(account["assignments_path"]))
+    return {
+        "wall_sec": round(wall, 4),
+        "ok": sum(1 for error in results.values() if error is None),
+        "failed": {name: error for name, error in results.items() if error},
+        "stages": {stage: _summary([t[stage] for t in timings if stage in t]) for stage in STAGES},
+        "rows": rows,
+        "students_per_min": round(students / wall * 60, 2),
+        "rows_per_sec": round(rows / wall, 1),
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_worker_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def _median_run(runs):
+    """The run with the median wall time, plus every run's wall time."""
+    ordered = sorted(runs, key=lambda r: r["wall_sec"])
+    return {**ordered[len(ordered) // 2], "wall_sec_runs": [r["wall_sec"] for r in runs]}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    print(f"{'scenario':<10}{'metric':<18}{old.get('commit') or 'old':>12}{new.get('commit') or 'new':>12}{'change':>10}")
+    for scenario, metrics in new["scenarios"].items():
+        before = old.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        pairs = [("wall_sec", before["wall_sec"], metrics["wall_sec"]),
+                 ("peak_rss_mb", before["peak_rss_mb"], metrics["peak_rss_mb"])]
+        for stage in STAGES:
+            if (before["stages"].get(stage) or {}).get("p50") and (metrics["stages"].get(stage) or {}).get("p50"):
+                pairs.append((f"{stage} p50", before["stages"][stage]["p50"], metrics["stages"][stage]["p50"]))
+        for metric, a, b in pairs:
+            change = f"{(b - a) / a:+.0%}" if a else "-"
+            print(f"{scenario:<10}{metric:<18}{a:>12}{b:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end grade check benchmark")
+    parser.add_argument("--students", type=int, default=3, help="Students in the multi-student scenario")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per scenario; the median run is reported")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds the fake model takes per prompt")
+    parser.add_argument("--html", help="Serve this recorded Assignments page instead of the sample courses")
+    parser.add_argument("--analysis", choices=["full", "changes", "local"], default="full")
+    parser.add_argument("--out", help="Write the JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="Earlier JSON results to print a comparison against")
+    args = parser.parse_args()
+
+    recorded = None
+    if args.html:
+        with open(args.html, "r", encoding="utf-8", errors="ignore") as f:
+            recorded = f.read()
+
+    model = fake_model(args.llm_latency)
+    checker._router = LLMRouter([pydantic_ai_provider(model, checker.SYSTEM_PROMPT)], stats=LatencyStats(path=""))
+    checker._structured_router = LLMRouter(
+        [pydantic_ai_provider(model, checker.SYSTEM_PROMPT, output_type=GradeAnalysis)],
+        stats=checker._router.stats, validate=lambda output: isinstance(output, GradeAnalysis),
+    )
+    sink = start_smtp_standin()
+    checker._outbox = Outbox(host="127.0.0.1", port=sink.port, use_ssl=False)
+
+    scenarios = {}
+    for scenario, students in (("single", 1), ("multi", max(2, args.students))):
+        runs = [run_scenario(students, recorded, args.analysis) for _ in range(args.runs)]
+        scenarios[scenario] = {"students": students, **_median_run(runs)}
+
+    result = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "config": {"runs": args.runs, "llm_latency_sec": args.llm_latency, "analysis": args.analysis,
+                   "llm_output": checker.LLM_OUTPUT,
+                   "recorded_html": args.html, "emails_received": len(sink.messages),
+                   "smtp_connections": sink.connections},
+        "scenarios": scenarios,
+    }
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.out}")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), result)
+    sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Per-course cache of extracted Course records, keyed by HAC's "(Last Updated: M/D/YYYY)" stamp.
+
+A course whose stamp, row fingerprint (row count and a hash of the row cells, hac_parser.rows_fingerprint)
+and class grade match the cached entry is not re-extracted; its cached record is merged back in page
+order, so the output is identical to a full scrape. The stamp alone has day resolution, so the
+fingerprint is what catches a second edit on the same day. Entries are tied to the grading cycle
+selected on the page, because a new cycle can show different rows under an unchanged stamp.
+"""
+import hashlib
+import json
+import os
+
+from hac_parser import parse_course_sections
+from records import pack_course, unpack_course
+
+COURSE_CACHE = os.getenv('COURSE_CACHE', 'true').lower() in ('1', 'true', 'yes')
+COURSE_CACHE_DIR = os.getenv('COURSE_CACHE_DIR', '/tmp/hac-courses')
+
+
+class CourseCache:
+    """Cached record per course for one account; a disabled cache never reports known stamps."""
+
+    def __init__(self, url, username, cache_dir=None):
+        account = hashlib.sha256(f"{url}|{username}".encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir or COURSE_CACHE_DIR, f"{account}.json")
+        self.enabled = COURSE_CACHE
+        self.cycle = None
+        self.courses = {}
+        if not self.enabled:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.cycle = data.get("cycle")
+            self.courses = data.get("courses") or {}
+        except (OSError, ValueError):
+            pass
+
+    def known(self):
+        """{"cycle": ..., "stamps": {course: stamp}, "fingerprints": {course: fingerprint}} for the extractor
+        to decide which courses to skip."""
+        usable = {c: e for c, e in self.courses.items() if e.get("stamp") and e.get("fingerprint")}
+        return {
+            "cycle": self.cycle,
+            "stamps": {c: e["stamp"] for c, e in usable.items()},
+            "fingerprints": {c: e["fingerprint"] for c, e in usable.items()},
+        }
+
+    def merge(self, cycle, sections):
+        """Fill in skipped courses from the cache and store the result.
+
+        `sections` are dicts with course, stamp, fingerprint, class_grade and record (None when rows were skipped).
+        Returns the Course records in page order, or None when a skipped course can't be restored exactly (cycle
+        changed, entry missing, or its rows or class grade moved); the caller then extracts everything.
+        """
+        courses, fresh = [], {}
+        for sec in sections:
+            course, record = sec["course"], sec["record"]
+            if record is None:
+                entry = self.courses.get(course)
+                if (
+                    cycle != self.cycle
+                    or entry is None
+                    or "record" not in entry
+                    or entry.get("stamp") != sec["stamp"]
+                    or entry.get("fingerprint") != sec.get("fingerprint")
+                    or entry.get("class_grade") != sec["class_grade"]
+                ):
+                    return None
+                record = unpack_course(entry["record"])
+            courses.append(record)
+            if course and sec["stamp"]:
+                if course in fresh:
+                    # Duplicate course headings can't be told apart; never skip them
+                    fresh[course]["stamp"] = ""
+                else:
+                    fresh[course] = {
+                        "stamp": sec["stamp"], "fingerprint": sec.get("fingerprint") or "",
+                        "class_grade": sec["class_grade"], "record": pack_course(record),
+                    }
+        self._save(cycle, fresh)
+        return courses
+
+    def _save(self, cycle, courses):
+        self.cycle, self.courses = cycle, courses
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"cycle": cycle, "courses": courses}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: could not save course cache: {e}")
+
+
+def parse_html_incremental(html, cache=None):
+    """parse_courses_html, skipping rows of courses the cache already holds; same records either way."""
+    if cache is not None:
+        cycle, sections = parse_course_sections(html, cache.known())
+        courses = cache.merge(cycle, sections)
+        if courses is not None:
+            return courses
+    cycle, sections = parse_course_sections(html)
+    if cache is not None:
+        cache.merge(cycle, sections)
+    return [sec["record"] for sec in sections]
@@ -0,0 +1,16 @@
+"""One long-lived asyncio event loop for running coroutines from synchronous code.
+
+asyncio.run() closes its loop after every call, stranding the pooled async HTTP connections of the
+LLM clients (pydantic-ai Agents, LiteLLM); reusing a single loop keeps them alive across scheduled runs.
+"""
+import asyncio
+
+_loop = None
+
+
+def run_async(coro):
+    """Run `coro` to completion on the process-wide loop, creating it on first use."""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
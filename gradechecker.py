@@ -8,7 +8,10 @@ from selenium.webdriver.common.by import By
 import time
 from dotenv import load_dotenv
 import os
-from litellm import completion
+from event_loop import run_async
+from llm_cache import LLMCache, cached_completion
+from llm_router import LLMRouter, litellm_provider
+from prompt_cache import Prompt, PromptCacheStats
 
 
 # Load environment variables from .env file
@@ -79,23 +82,12 @@ def main():
     except Exception as e:
         print(f"Login failed: {str(e)}")
 
-def invoke_llm(assignments_content):
-    # Clean and format the assignments content
-    cleaned_content = "\n".join([
-        line.strip() for line in assignments_content.splitlines() 
-        if line.strip() and not line.startswith("Timestamp:")
-    ])
-    
-    # Prepare the prompt
-    prompt = f"""
+ANALYSIS_PROMPT = """
     Analyze this student's assignments and grades. Focus on:
     1. Missing assignments (marked with 'M - Missing' or a '0.00' grade)
     2. Class grades below 80%
     3. Class grades above 80%
     
-    Here is the data:
-    {cleaned_content[:10000]}
-    
     Provide:
     - Summary of key issues
         -- Number of missing assignments
@@ -117,23 +109,49 @@ def invoke_llm(assignments_content):
     Keep the response concise and focused.
     The response should be in HTML format that includes headings, numbered lists, bullet points so that it is easy to read.
     Only include the analysis.
+    
+    Here is the data:
     """
 
-    try:
-        # Send to Claude with timeout via LiteLLM
-        response = completion(
-            model="anthropic/claude-3-5-sonnet-20240620",
-            messages=[{"role": "user", "content": prompt}],
-            timeout=30,
-            max_tokens=1500,
-            temperature=0
-        )
-        
-        # Extract and return the content
-        return response.get('choices', [{}])[0].get('message', {}).get('content')
+# Ordered LiteLLM models; a second one is hedged to when the first is slow or fails
+LITELLM_PROVIDERS = [
+    p.strip() for p in os.getenv('LITELLM_PROVIDERS', 'anthropic/claude-3-5-sonnet-20240620').split(',') if p.strip()
+]
+LLM_SETTINGS = {"max_tokens": 1500, "temperature": 0}
+
+_llm_cache = LLMCache()
+# Provider prompt-cache reads/writes across this process's LLM calls (prompt_cache.py)
+_prompt_cache_stats = PromptCacheStats()
+
+_router = None
+
+def _get_router():
+    """The module-level provider router (llm_router.py), built once so every analysis reuses its client."""
+    global _router
+    if _router is None:
+        _router = LLMRouter([
+            litellm_provider(model, timeout=30, usage=_prompt_cache_stats, **LLM_SETTINGS) for model in LITELLM_PROVIDERS
+        ])
+    return _router
+
+def invoke_llm(assignments_content):
+    # Clean and format the assignments content
+    cleaned_content = "\n".join([
+        line.strip() for line in assignments_content.splitlines() 
+        if line.strip() and not line.startswith("Timestamp:")
+    ])
     
-    except Exception as e:
-        return f"Error processing assignments: {str(e)}"
+    # Static instructions first and the data last, so the provider can cache the prefix
+    prompt = Prompt(ANALYSIS_PROMPT, cleaned_content[:10000])
+
+    # Send to the LiteLLM providers (Claude by default). Raises LLMUnavailable instead of returning an error string that would be emailed
+    def call():
+        return run_async(_get_router().run(prompt))[0]
+
+    # Unchanged data with the same prompt/model/settings is answered from the on-disk cache
+    analysis, hit = cached_completion(_llm_cache, prompt.text, "", ",".join(LITELLM_PROVIDERS), LLM_SETTINGS, call)
+    print(f"LLM cache {'hit' if hit else 'miss'}" + ("" if hit else f"; {_prompt_cache_stats.describe()}"))
+    return analysis
 
 def send_email(analysis):
     """Sends the analysis via email with HTML content to multiple recipients."""
@@ -0,0 +1,226 @@
+"""Browserless Home Access Center client built on a pooled requests.Session."""
+from dataclasses import replace
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from hac_parser import REPORT_CARD_RUNS_NAME, parse_courses_html, parse_report_card_runs
+from course_cache import parse_html_incremental
+from session_cache import cookies_from_jar, load_into_jar
+
+# HAC paths are stable across districts; only the host differs
+CLASSWORK_PATH = "/HomeAccess/Classes/Classwork"
+ASSIGNMENTS_PATH = "/HomeAccess/Content/Student/Assignments.aspx"
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+class HacLoginError(Exception):
+    """Raised when HAC does not accept the submitted credentials or form."""
+
+
+def build_session(pool_size=8, retries=2):
+    """Create a keep-alive session with a bounded connection pool and retries on transient errors."""
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+def _form_fields(form):
+    """Successful controls of a form as a browser would submit them (hidden inputs, checked boxes, selected options)."""
+    fields = {}
+    for inp in form.find_all("input"):
+        name = inp.get("name")
+        if not name or inp.get("type", "").lower() in ("submit", "button", "image"):
+            continue
+        if inp.get("type", "").lower() in ("checkbox", "radio") and not inp.has_attr("checked"):
+            continue
+        fields[name] = inp.get("value", "")
+    for sel in form.find_all("select"):
+        name = sel.get("name")
+        if not name:
+            continue
+        opt = sel.find("option", selected=True) or sel.find("option")
+        fields[name] = opt.get("value", opt.get_text(strip=True)) if opt is not None else ""
+    return fields
+
+
+def _login_form_fields(html):
+    """Return (action, fields) for the LogOnDetails form, including hidden inputs and the anti-forgery token."""
+    soup = BeautifulSoup(html, "html.parser")
+    user_input = soup.find("input", attrs={"name": "LogOnDetails.UserName"})
+    form = user_input.find_parent("form") if user_input is not None else soup.find("form")
+    if form is None:
+        raise HacLoginError("Login form not found on HAC login page")
+
+    fields = _form_fields(form)
+    if "__RequestVerificationToken" not in fields:
+        print("Warning: HAC login form has no __RequestVerificationToken; posting without it")
+    return form.get("action") or "", fields
+
+
+def _cycle_postback(html, run_value):
+    """(action, fields) that re-render the Assignments page for one grading cycle (ASP.NET postback)."""
+    soup = BeautifulSoup(html, "html.parser")
+    select = soup.find("select", attrs={"name": REPORT_CARD_RUNS_NAME})
+    form = select.find_parent("form") if select is not None else None
+    if form is None:
+        raise ValueError("Grading-cycle dropdown not found on the Assignments page")
+    fields = _form_fields(form)
+    fields[REPORT_CARD_RUNS_NAME] = run_value
+    refresh = form.find("input", attrs={"name": lambda n: n and n.endswith("btnRefreshView")})
+    if refresh is not None:
+        fields[refresh["name"]] = refresh.get("value", "Refresh View")
+    else:
+        # Dropdown with AutoPostBack and no refresh button
+        fields["__EVENTTARGET"] = REPORT_CARD_RUNS_NAME
+        fields["__EVENTARGUMENT"] = ""
+    return form.get("action") or "", fields
+
+
+def _is_login_page(html):
+    return "LogOnDetails.Password" in html or "LogOnDetails_Password" in html
+
+
+class HacHttpClient:
+    """Logs into HAC and fetches the Classwork/Assignments page without a browser."""
+
+    def __init__(self, url, session=None, timeout=20):
+        self.url = url
+        self.session = session or build_session()
+        self.timeout = timeout
+        # Where the assignments page was actually served from; cycle postbacks go back to it
+        self.assignments_url = urljoin(url, ASSIGNMENTS_PATH)
+
+    def _get(self, url, **kwargs):
+        resp = self.session.get(url, timeout=self.timeout, **kwargs)
+        resp.raise_for_status()
+        return resp
+
+    def login(self, username, password):
+        page = self._get(self.url)
+        action, fields = _login_form_fields(page.text)
+        fields["LogOnDetails.UserName"] = username
+        fields["LogOnDetails.Password"] = password
+        resp = self.session.post(
+            urljoin(page.url, action or page.url),
+            data=fields,
+            timeout=self.timeout,
+            headers={"Referer": page.url},
+        )
+        resp.raise_for_status()
+        if _is_login_page(resp.text):
+            raise HacLoginError("HAC returned the login page again; credentials or form were rejected")
+        return resp
+
+    def fetch_assignments_html(self):
+        """Fetch the page behind sg-legacy-iframe, resolving its src from the Classwork page when possible."""
+        classes = self._get(urljoin(self.url, CLASSWORK_PATH))
+        if _is_login_page(classes.text):
+            raise HacLoginError("Not authenticated: Classwork redirected to the login page")
+        soup = BeautifulSoup(classes.text, "html.parser")
+        iframe = soup.find("iframe", id="sg-legacy-iframe") or soup.find("iframe", class_="sg-legacy-iframe")
+        src = iframe.get("src") if iframe is not None else None
+        target = urljoin(classes.url, src) if src else urljoin(self.url, ASSIGNMENTS_PATH)
+        resp = self._get(target, headers={"Referer": classes.url})
+        self.assignments_url = resp.url
+        return resp.text
+
+    def fetch_cycle_html(self, html, run_value):
+        """Post the Assignments form back with another grading cycle selected."""
+        action, fields = _cycle_postback(html, run_value)
+        resp = self.session.post(
+            urljoin(self.assignments_url, action or self.assignments_url),
+            data=fields,
+            timeout=self.timeout,
+            headers={"Referer": self.assignments_url},
+        )
+        resp.raise_for_status()
+        if _is_login_page(resp.text):
+            raise HacLoginError("Not authenticated: cycle postback redirected to the login page")
+        return resp.text
+
+    def all_cycles_courses(self, html):
+        """Course records for every grading cycle, tagged with the cycle.
+
+        `html` is the Assignments page as first served; the cycle it already shows is parsed from it
+        rather than fetched again. The other cycles are posted back one after another: they share one
+        session (cookie jar and ASP.NET session state, which HAC serializes per session anyway), and
+        requests.Session is not safe to use from several threads.
+        """
+        runs, selected = parse_report_card_runs(html)
+        if not runs:
+            print("No grading-cycle dropdown on the Assignments page; returning the current cycle only")
+            return parse_courses_html(html)
+        pending = [value for value, _ in runs if value != selected]
+        pages = {selected: html} if selected else {}
+        for value in pending:
+            pages[value] = self.fetch_cycle_html(html, value)
+        courses = []
+        for value, label in runs:
+            courses.extend(replace(course, cycle=label) for course in parse_courses_html(pages[value]))
+        print(f"Fetched {len(runs)} grading cycles ({len(pending)} postbacks)")
+        return courses
+
+    def close(self):
+        self.session.close()
+
+
+def browser_cycle_courses(url, page_url, html, cookies):
+    """All-cycle courses after a browser login: replays the browser's cookies on an HTTP session."""
+    client = HacHttpClient(url)
+    client.assignments_url = page_url
+    try:
+        load_into_jar(client.session.cookies, cookies)
+        return client.all_cycles_courses(html)
+    finally:
+        client.close()
+
+
+def scrape_assignments_http(url, username, password, session=None, cache=None, all_cycles=False, course_cache=None):
+    """Log in over HTTP and return Course records, the same as the Chrome scraper extracts.
+
+    With a SessionCache, cached cookies are tried first; the Classwork request doubles as the
+    validity check and a full login only happens when HAC redirects back to the login page.
+    With all_cycles, every grading cycle is fetched on the same session and lines are tagged with it;
+    otherwise a CourseCache skips parsing the rows of courses whose Last Updated stamp is unchanged.
+    """
+    client = HacHttpClient(url, session=session)
+
+    def _courses(html):
+        return client.all_cycles_courses(html) if all_cycles else parse_html_incremental(html, course_cache)
+
+    try:
+        cookies = cache.load() if cache is not None else None
+        if cookies:
+            load_into_jar(client.session.cookies, cookies)
+            try:
+                html = client.fetch_assignments_html()
+                print("Reused cached HAC session (login skipped)")
+                return _courses(html)
+            except HacLoginError:
+                print("Cached HAC session expired; logging in again")
+                client.session.cookies.clear()
+                cache.clear()
+        client.login(username, password)
+        if cache is not None:
+            cache.save(cookies_from_jar(client.session.cookies))
+        return _courses(client.fetch_assignments_html())
+    finally:
+        if session is None:
+            client.close()
@@ -0,0 +1,205 @@
+"""Offline parser for the HAC Classwork/Assignments iframe (one page_source snapshot, no browser)."""
+import re
+import sys
+
+from bs4 import BeautifulSoup
+
+from records import Assignment, Course, render_lines
+
+
+def parse_class_grade(cg_text):
+    """Normalize raw class-average text (e.g. 'Cycle Average 70.13%') to 'NN.NN%', or '' when absent."""
+    # Prefer explicit "Cycle/Class Average NN.NN" with optional %, else first explicit percentage, else pure number when text is short
+    m = re.search(r'(?:Cycle|Class)\s+Average\s*:?\s*([0-9]{1,3}(?:\.[0-9]{1,2})?)\s*%?', cg_text, re.I)
+    if not m:
+        m = re.search(r'([0-9]{1,3}(?:\.[0-9]{1,2})?)\s*%', cg_text)
+    if not m:
+        # Handle spans that contain only the numeric value (no percent symbol)
+        m = re.search(r'^\s*([0-9]{1,3}(?:\.[0-9]{1,2})?)\s*%?\s*$', cg_text)
+    return f"{m.group(1)}%" if m else ""
+
+
+def parse_last_updated(text):
+    """'(Last Updated: 9/3/2025)' -> '9/3/2025'; '' when the course header carries no stamp."""
+    m = re.search(r'Last\s+Updated:?\s*([^)]+)', text or "", re.I)
+    return m.group(1).strip() if m else ""
+
+
+def _text(el):
+    # Collapse whitespace the way the browser's rendered .text does
+    if el is None:
+        return ""
+    return " ".join(el.get_text(" ").split())
+
+
+def _with_pct(txt):
+    return txt if "%" in txt else f"{txt}%"
+
+
+def _class_grade_text(soup, sec, idx):
+    """Walk the same class-grade ladder as the Selenium structured parse and return the raw text."""
+    # 0) Direct lookup by index-based IDs (misspelled HAC variant first, then corrected)
+    el = soup.find(id=f"plnMain_rptAssigmnetsByCourse_lblHdrAverage_{idx}") or \
+        soup.find(id=f"plnMain_rptAssignmentsByCourse_lblHdrAverage_{idx}")
+    if el is not None:
+        cg_text = _text(el)
+        if cg_text:
+            return cg_text
+
+    # 0b) Overall average by index-based IDs
+    el = soup.find(id=f"plnMain_rptAssigmnetsByCourse_lblOverallAverage_{idx}") or \
+        soup.find(id=f"plnMain_rptAssignmentsByCourse_lblOverallAverage_{idx}")
+    if el is not None and _text(el):
+        return _with_pct(_text(el))
+
+    # 1) Specific id prefixes within this section, then 1b) broader contains() fallback
+    for pattern in (
+        r"^plnMain_rptAssigmnetsByCourse_lblHdrAverage_",
+        r"^plnMain_rptAssignmentsByCourse_lblHdrAverage_",
+        r"lblHdrAverage",
+    ):
+        el = sec.find("span", id=re.compile(pattern))
+        if el is not None and _text(el):
+            return _text(el)
+
+    # 2) Right-aligned header span within this course header
+    el = sec.select_one("div[class*='sg-header'] span[class*='sg-header-heading'][class*='sg-right']")
+    if el is not None and _text(el):
+        return _text(el)
+
+    # 3) Overall average from summary block
+    for pattern in (
+        r"^plnMain_rptAssigmnetsByCourse_lblOverallAverage_",
+        r"^plnMain_rptAssignmentsByCourse_lblOverallAverage_",
+        r"lblOverallAverage",
+    ):
+        el = sec.find("span", id=re.compile(pattern))
+        if el is not None and _text(el):
+            return _with_pct(_text(el))
+
+    # 3c) Any span under the header containing visible 'Cycle Average'
+    for header in sec.select("div[class*='sg-header']"):
+        for span in header.find_all("span"):
+            txt = _text(span)
+            if "Cycle" in txt and "Average" in txt:
+                return txt
+
+    # 4) Last resort: the entire header text of this section
+    return _text(sec.select_one(".sg-header"))
+
+
+def rows_fingerprint(rows):
+    """'<row count>:<FNV-1a of the cell texts>' for [[cell text]]; whitespace is dropped so the
+    browser's textContent and BeautifulSoup agree. _BULK_EXTRACT_JS computes the same value in-page.
+    """
+    h = 0x811C9DC5
+    for cells in rows:
+        for ch in "\x1f".join(re.sub(r"\s+", "", c) for c in cells) + "\x1e":
+            h = ((h ^ ord(ch)) * 0x01000193) & 0xFFFFFFFF
+    return f"{len(rows)}:{h:08x}"
+
+
+def _selected_cycle(soup):
+    """The cycle dropdown's value as the browser reports it (_BULK_EXTRACT_JS reads selectedIndex): the
+    selected option, else the first one, since a single-select with nothing marked selects its first option."""
+    select = soup.find("select", id=re.compile(r"ddlReportCardRuns$"))
+    if select is None:
+        return None
+    opt = select.find("option", selected=True) or select.find("option")
+    return opt.get("value") if opt is not None else None
+
+
+def parse_course_sections(html, known=None):
+    """Per-course parse of the assignments iframe: (selected cycle, [{course, stamp, class_grade, record}]).
+
+    `known` is CourseCache.known(); rows of courses whose Last Updated stamp and rows_fingerprint both
+    match it are not parsed and come back with record=None for the cache to fill in.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    cycle = _selected_cycle(soup)
+    known = known or {}
+    same_cycle = known.get("cycle") == cycle
+    stamps = known.get("stamps", {}) if same_cycle else {}
+    fingerprints = known.get("fingerprints", {}) if same_cycle else {}
+    sections = []
+    for idx, sec in enumerate(soup.select("div.AssignmentClass")):
+        # Course header is inside .sg-header .sg-header-heading
+        course = _text(sec.select_one(".sg-header .sg-header-heading"))
+        class_grade = parse_class_grade(_class_grade_text(soup, sec, idx))
+        stamp = parse_last_updated(_text(sec.select_one(".sg-header .sg-header-sub-heading")))
+        cells = [row.find_all("td") for row in sec.select("table.sg-asp-table tr.sg-asp-table-data-row")]
+        # The stamp only has day resolution, so a same-day edit is caught by the row fingerprint
+        fingerprint = rows_fingerprint([[td.get_text() for td in tds] for tds in cells])
+        section = {"course": course, "stamp": stamp, "fingerprint": fingerprint, "class_grade": class_grade, "record": None}
+        sections.append(section)
+        if stamp and stamps.get(course) == stamp and fingerprints.get(course) == fingerprint:
+            continue
+
+        rows = []
+        for tds in cells:
+            if len(tds) < 3:
+                continue
+            # assignment is the 3rd column; grab anchor text if present
+            anchor = tds[2].find("a")
+            rows.append(Assignment(
+                title=_text(anchor) if anchor is not None else _text(tds[2]),
+                due_text=_text(tds[0]),
+                category=_text(tds[3]) if len(tds) > 3 else "",
+                score_text=_text(tds[4]) if len(tds) > 4 else "",
+                percent_text=_text(tds[-1]),
+            ))
+        section["record"] = Course(name=course, class_grade_text=class_grade, updated=stamp, assignments=tuple(rows))
+    return cycle, sections
+
+
+def parse_courses_html(html):
+    """Parse one snapshot of the assignments iframe into Course records."""
+    _, sections = parse_course_sections(html)
+    return [sec["record"] for sec in sections]
+
+
+def parse_assignments_html(html):
+    """Parse one snapshot of the assignments iframe into the same lines as the live structured parse."""
+    return render_lines(parse_courses_html(html))
+
+
+# Grading-cycle dropdown on the Assignments page (ASP.NET postback control)
+REPORT_CARD_RUNS_NAME = "ctl00$plnMain$ddlReportCardRuns"
+
+
+def parse_report_card_runs(html):
+    """Return ([(value, label)], selected value) for the cycle dropdown; ([], None) when HAC shows none.
+
+    The "(All Runs)" entry is skipped since it duplicates every other cycle.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    select = soup.find("select", attrs={"name": REPORT_CARD_RUNS_NAME}) or \
+        soup.find("select", id=re.compile(r"ddlReportCardRuns$"))
+    if select is None:
+        return [], None
+    runs, selected = [], None
+    for opt in select.find_all("option"):
+        value = opt.get("value", "")
+        if not value or value.upper() == "ALL":
+            continue
+        runs.append((value, _text(opt) or value))
+        if opt.has_attr("selected"):
+            selected = value
+    return runs, selected
+
+
+def parse_courses_file(path):
+    """Re-parse an HTML snapshot on disk (e.g. a DEBUG_SNAPSHOTS dump of the assignments iframe)."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return parse_courses_html(f.read())
+
+
+def parse_assignments_file(path):
+    return render_lines(parse_courses_file(path))
+
+
+if __name__ == "__main__":
+    # Usage: python hac_parser.py /tmp/hac_<ts>_assignments_frame.html [...]
+    for snapshot in sys.argv[1:]:
+        for line in parse_assignments_file(snapshot):
+            print(line)
@@ -0,0 +1,292 @@
+"""Local stand-in for Home Access Center, for exercising the scrapers without the network.
+
+Serves the LogOn form (with an anti-forgery token), the Classwork page with its sg-legacy-iframe,
+and the Assignments.aspx page behind it. Assignments come from a recorded page when --assignments-html
+is given (e.g. a DEBUG_SNAPSHOTS dump of the iframe), otherwise from the built-in sample courses.
+
+    python hac_standin.py --port 8181 --username demo --password demo
+    HAC_URL=http://127.0.0.1:8181/HomeAccess/Account/LogOn SCRAPE_BACKEND=http python pydanticai_gradechecker.py
+"""
+import argparse
+import html
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+LOGON_PATH = "/HomeAccess/Account/LogOn"
+HOME_PATH = "/HomeAccess/"
+CLASSWORK_PATH = "/HomeAccess/Classes/Classwork"
+ASSIGNMENTS_PATH = "/HomeAccess/Content/Student/Assignments.aspx"
+
+# (course, last updated, cycle average, rows of (due, assigned, assignment, category, score, total))
+SAMPLE_COURSES = [
+    ("1210ADV - 27 English II Advanced", "9/3/2025", "45.00", [
+        ("08/27/2025", "08/25/2025", "We Were Liars SAR", "Process", "M", "100.00"),
+        ("08/21/2025", "", "Workshop Grade", "Process", "90.00", "100.00"),
+    ]),
+    ("2212 - 36 Algebra II", "9/3/2025", "70.13", [
+        ("09/10/2025", "", "2.2 HW", "Daily Assignments", "", "100.00"),
+        ("09/02/2025", "", "Unit 1 Test", "Tests", "71.00", "100.00"),
+        ("09/02/2025", "", "Unit 1 Test Review", "Daily Assignments", "M", "100.00"),
+        ("08/28/2025", "", "1.3 HW", "Daily Assignments", "M", "100.00"),
+        ("08/22/2025", "", "Unit 1 Quiz", "Quizzes", "71.00", "100.00"),
+        ("08/20/2025", "", "1.1 HW", "Daily Assignments", "100.0", "100.00"),
+    ]),
+    ("3310 - 28 Chemistry", "8/20/2025", "93.00", [
+        ("09/02/2025", "", "Unit 1 Daily Review", "Minor", "", "100.00"),
+        ("08/19/2025", "", "Safety Quiz", "Minor", "93.00", "100.00"),
+    ]),
+    ("4210 - 25 World History", "9/3/2025", "30.67", [
+        ("09/03/2025", "09/03/2025", "River Valley Test", "Tests-Projects", "92.00", "100.00"),
+        ("09/03/2025", "08/29/2025", "RVC Test Review", "Daily Grades", "0.00", "100.00"),
+        ("08/29/2025", "08/27/2025", "RVC Travel Brochure", "Quizzes", "0.00", "100.00"),
+    ]),
+    ("5503 - 19 Spanish III", "8/29/2025", "10.00", [
+        ("09/02/2025", "08/13/2025", "Speaking target language in class", "Learning Checks", "20.00", "100.00"),
+        ("08/27/2025", "", "Proyecto", "Projects", "M", "100.00"),
+        ("08/13/2025", "", "Tareas combined (three weeks)", "Learning Checks", "0.00", "100.00"),
+    ]),
+    ("8051 - 8 Floral Design", "9/4/2025", "100.00", [
+        ("09/04/2025", "09/04/2025", "Wire & Taping", "Labs-Projects", "100.0", "100.00"),
+        ("08/28/2025", "08/27/2025", "Journal #1", "Journals", "", "100.00"),
+    ]),
+]
+
+
+# Grading cycles offered in the report-card dropdown, (value, label); the last one is shown by default
+SAMPLE_RUNS = [("1-2026", "1"), ("2-2026", "2"), ("3-2026", "3")]
+
+
+def cycle_courses(courses, cycle_index, cycle_count):
+    """Earlier cycles for the stand-in: shifted averages and fewer rows than the current cycle."""
+    back = cycle_count - 1 - cycle_index
+    if back == 0:
+        return courses
+    shifted = []
+    for course, updated, average, rows in courses:
+        shifted.append((course, updated, f"{min(100.0, float(average) + 7 * back):.2f}", rows[: max(1, len(rows) - back)]))
+    return shifted
+
+
+def _percentage(score, total):
+    try:
+        return f"{float(score) / float(total) * 100:.2f}%"
+    except (TypeError, ValueError, ZeroDivisionError):
+        return ""
+
+
+def render_assignments_page(courses=SAMPLE_COURSES, runs=None, selected=None):
+    """Render courses as HAC's Assignments.aspx markup (AssignmentClass blocks, misspelled HAC ids).
+
+    With `runs`, the ASP.NET form also carries the grading-cycle dropdown, Refresh View button and view state.
+    """
+    e = html.escape
+    selected_attr = ' selected="selected"'
+    blocks = []
+    for idx, (course, updated, average, rows) in enumerate(courses):
+        body = []
+        for due, assigned, title, category, score, total in rows:
+            shown = "M - Missing" if score == "M" else score
+            body.append(
+                '<tr class="sg-asp-table-data-row">'
+                f"<td>{e(due)}</td><td>{e(assigned)}</td>"
+                f'<td><a href="#" onclick="OpenAssignmentDialog()">{e(title)}</a></td>'
+                f"<td>{e(category)}</td><td>{e(shown)}</td><td>{e(total)}</td>"
+                f"<td>1.00</td><td>{e(score if score != 'M' else '')}</td><td>{e(total)}</td>"
+                f"<td>{_percentage(score, total)}</td></tr>"
+            )
+        blocks.append(
+            '<div class="AssignmentClass">'
+            '<div class="sg-header sg-header-square">'
+            f'<a class="sg-header-heading" href="#">{e(course)}</a>'
+            f'<span class="sg-header-sub-heading">(Last Updated: {e(updated)})</span>'
+            f'<span class="sg-header-heading sg-right" id="plnMain_rptAssigmnetsByCourse_lblHdrAverage_{idx}">'
+            f"Cycle Average {e(average)}%</span></div>"
+            '<div class="sg-content-grid">'
+            f'<table class="sg-asp-table" id="plnMain_rptAssigmnetsByCourse_dgCourseAssignments_{idx}">'
+            '<tr class="sg-asp-table-header-row"><td>Date Due</td><td>Date Assigned</td><td>Assignment</td>'
+            "<td>Category</td><td>Score</td><td>Total Points</td><td>Weight</td><td>Weighted Score</td>"
+            "<td>Weighted Total Points</td><td>Percentage</td></tr>"
+            + "".join(body)
+            + "</table></div></div>"
+        )
+    controls = ""
+    if runs:
+        options = "".join(
+            f'<option{selected_attr if value == selected else ""} value="{e(value)}">{e(label)}</option>'
+            for value, label in [("ALL", "(All Runs)")] + list(runs)
+        )
+        controls = (
+            '<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />'
+            '<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />'
+            f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{secrets.token_urlsafe(32)}" />'
+            '<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="standin" />'
+            '<select name="ctl00$plnMain$ddlReportCardRuns" id="plnMain_ddlReportCardRuns">' + options + "</select>"
+            '<input type="submit" name="ctl00$plnMain$btnRefreshView" value="Refresh View" id="plnMain_btnRefreshView" />'
+        )
+    return (
+        "<html><head><title>Assignments</title></head><body>"
+        f'<form method="post" action="./Assignments.aspx" id="aspnetForm">{controls}' + "".join(blocks) + "</form></body></html>"
+    )
+
+
+def render_logon_page(token, error=""):
+    err = f'<div class="validation-summary-errors">{html.escape(error)}</div>' if error else ""
+    return (
+        "<html><head><title>Home Access Center</title></head><body>"
+        f'<form action="{LOGON_PATH}?ReturnUrl=%2fHomeAccess%2f" method="post">{err}'
+        f'<input name="__RequestVerificationToken" type="hidden" value="{token}" />'
+        '<input id="SCKTY00328510CustomEnabled" name="SCKTY00328510CustomEnabled" type="hidden" value="False" />'
+        '<select id="Database" name="Database"><option selected="selected" value="10">District</option></select>'
+        '<input id="VerificationOption" name="VerificationOption" type="hidden" value="UsernamePassword" />'
+        '<label for="LogOnDetails_UserName">User Name</label>'
+        '<input id="LogOnDetails_UserName" name="LogOnDetails.UserName" type="text" value="" />'
+        '<label for="LogOnDetails_Password">Password</label>'
+        '<input id="LogOnDetails_Password" name="LogOnDetails.Password" type="password" />'
+        '<button id="login" type="submit">Sign In</button>'
+        "</form></body></html>"
+    )
+
+
+def render_classwork_page():
+    return (
+        "<html><head><title>Classes</title></head><body>"
+        f'<a href="{CLASSWORK_PATH}">Classes</a>'
+        f'<iframe id="sg-legacy-iframe" class="sg-legacy-iframe" src="{ASSIGNMENTS_PATH}"></iframe>'
+        "</body></html>"
+    )
+
+
+def _cycle_page(state, run_value=None):
+    if state.assignments_html:
+        return state.assignments_html
+    values = [value for value, _ in state.runs]
+    selected = run_value if run_value in values else values[-1]
+    courses = cycle_courses(SAMPLE_COURSES, values.index(selected), len(values))
+    return render_assignments_page(courses, state.runs, selected)
+
+
+class StandinState:
+    """Credentials, issued tokens and live sessions shared by all handler threads."""
+
+    def __init__(self, username, password, assignments_html=None):
+        self.username = username
+        self.password = password
+        self.assignments_html = assignments_html
+        self.runs = SAMPLE_RUNS
+        self.postbacks = 0
+        self.tokens = set()
+        self.sessions = set()
+        self.logins = 0
+        self.lock = threading.Lock()
+
+
+def _make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "HAC-Standin"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _cookies(self):
+            jar = {}
+            for part in (self.headers.get("Cookie") or "").split(";"):
+                if "=" in part:
+                    k, v = part.strip().split("=", 1)
+                    jar[k] = v
+            return jar
+
+        def _authenticated(self):
+            with state.lock:
+                return self._cookies().get(".AuthCookie") in state.sessions
+
+        def _send(self, status, body="", headers=None):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or []):
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _redirect(self, location, headers=None):
+            self._send(302, "", [("Location", location)] + list(headers or []))
+
+        def _logon_page(self, error=""):
+            token = secrets.token_urlsafe(24)
+            with state.lock:
+                state.tokens.add(token)
+            self._send(200, render_logon_page(token, error))
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == LOGON_PATH:
+                return self._logon_page()
+            if not self._authenticated():
+                return self._redirect(f"{LOGON_PATH}?ReturnUrl=%2fHomeAccess%2f")
+            if path in (HOME_PATH, CLASSWORK_PATH):
+                return self._send(200, render_classwork_page())
+            if path == ASSIGNMENTS_PATH:
+                return self._send(200, _cycle_page(state))
+            self._send(404, "<html><body>Not Found</body></html>")
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            length = int(self.headers.get("Content-Length") or 0)
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+            if path == ASSIGNMENTS_PATH:
+                if not self._authenticated():
+                    return self._redirect(f"{LOGON_PATH}?ReturnUrl=%2fHomeAccess%2f")
+                if not form.get("__VIEWSTATE"):
+                    return self._send(500, "<html><body>Validation of viewstate MAC failed.</body></html>")
+                with state.lock:
+                    state.postbacks += 1
+                return self._send(200, _cycle_page(state, form.get("ctl00$plnMain$ddlReportCardRuns")))
+            if path != LOGON_PATH:
+                return self._send(404, "<html><body>Not Found</body></html>")
+            with state.lock:
+                token_ok = form.get("__RequestVerificationToken") in state.tokens
+                state.tokens.discard(form.get("__RequestVerificationToken"))
+            if not token_ok:
+                return self._send(400, "<html><body>The anti-forgery token could not be validated.</body></html>")
+            if form.get("LogOnDetails.UserName") != state.username or form.get("LogOnDetails.Password") != state.password:
+                return self._logon_page("Your attempt to log in was unsuccessful.")
+            session_id = secrets.token_hex(16)
+            with state.lock:
+                state.sessions.add(session_id)
+                state.logins += 1
+            self._redirect(HOME_PATH, [("Set-Cookie", f".AuthCookie={session_id}; Path=/; HttpOnly")])
+
+    return Handler
+
+
+def start_standin(host="127.0.0.1", port=0, username="demo", password="demo", assignments_html=None):
+    """Start the stand-in in a daemon thread; returns (server, login_url)."""
+    state = StandinState(username, password, assignments_html)
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{LOGON_PATH}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Home Access Center stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8181)
+    parser.add_argument("--username", default="demo")
+    parser.add_argument("--password", default="demo")
+    parser.add_argument("--assignments-html", help="Serve this recorded assignments iframe snapshot")
+    args = parser.parse_args()
+
+    recorded = None
+    if args.assignments_html:
+        with open(args.assignments_html, "r", encoding="utf-8", errors="ignore") as f:
+            recorded = f.read()
+    srv, login_url = start_standin(args.host, args.port, args.username, args.password, recorded)
+    print(f"HAC stand-in listening; HAC_URL={login_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
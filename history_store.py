@@ -0,0 +1,380 @@
+"""Append-only SQLite history of every scrape, for trend questions the single ASSIGNMENTS_PATH can't answer.
+
+Each scrape adds a row to `snapshots`. Course rows are only written when the content differs from
+the student's previous scrape; unchanged scrapes point at the earlier rows (data_id), so polling
+every few minutes costs one small row. Assignment rows are deduplicated per course: a course whose
+content is unchanged points at its earlier rows (rows_snapshot, rows_position), so one changed course
+doesn't copy every other course's assignments. Assignment timestamps are therefore "first seen"
+times, which is what "when did this go missing?" needs.
+
+Course filters match the exact course name, so "Algebra" doesn't pick up "Algebra II"; pass
+prefix=True (--prefix) to match names starting with it. Both forms use the (student, course, ...) indexes.
+
+Retention: snapshots older than HISTORY_FULL_DAYS are thinned to the last one per week, and
+anything older than HISTORY_RETENTION_DAYS is dropped; orphaned rows go with them.
+
+    python history_store.py latest --student s123456
+    python history_store.py series --student s123456 --course "Algebra II" --since 2025-09-01
+    python history_store.py missing --student s123456 --course "Algebra II" --assignment "Unit 1 Test Review"
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from records import Assignment, Course, pack_course
+
+HISTORY_DB = os.getenv('HISTORY_DB', '/tmp/hac_history.sqlite3')
+HISTORY_FULL_DAYS = int(os.getenv('HISTORY_FULL_DAYS', '90'))
+HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', str(3 * 365)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    student TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    data_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_student_time ON snapshots (student, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_data ON snapshots (data_id);
+
+CREATE TABLE IF NOT EXISTS courses (
+    snapshot_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    student TEXT NOT NULL,
+    course TEXT NOT NULL,
+    cycle TEXT NOT NULL DEFAULT '',
+    class_grade REAL,
+    class_grade_text TEXT NOT NULL DEFAULT '',
+    updated TEXT NOT NULL DEFAULT '',
+    raw TEXT,
+    scraped_at TEXT NOT NULL,
+    -- Where this course's assignment rows live; NULL means (snapshot_id, position)
+    content_hash TEXT,
+    rows_snapshot INTEGER,
+    rows_position INTEGER,
+    PRIMARY KEY (snapshot_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_courses_student_course_time ON courses (student, course, scraped_at);
+
+CREATE TABLE IF NOT EXISTS assignments (
+    snapshot_id INTEGER NOT NULL,
+    course_position INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    student TEXT NOT NULL,
+    course TEXT NOT NULL,
+    assignment TEXT NOT NULL,
+    due TEXT,
+    due_text TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    score REAL,
+    score_text TEXT NOT NULL DEFAULT '',
+    percent_text TEXT NOT NULL DEFAULT '',
+    missing INTEGER NOT NULL DEFAULT 0,
+    scraped_at TEXT NOT NULL,
+    PRIMARY KEY (snapshot_id, course_position, position)
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_student_course_assignment_time
+    ON assignments (student, course, assignment, scraped_at);
+
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+# Columns added to `courses` after the first release, for databases created before them
+_COURSE_COLUMNS = {"content_hash": "TEXT", "rows_snapshot": "INTEGER", "rows_position": "INTEGER"}
+
+
+def content_hash(courses):
+    return hashlib.sha256(
+        json.dumps([pack_course(c) for c in courses], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def _course_filter(column, course, prefix=False):
+    """(SQL, params) matching `course` exactly, or as a name prefix; both can use an index on the column."""
+    if not prefix:
+        return f"{column} = ?", [course]
+    # A range instead of LIKE 'x%', which SQLite only indexes under case_sensitive_like
+    return f"{column} >= ? AND {column} < ?", [course, course + "\U0010ffff"]
+
+
+class HistoryStore:
+    def __init__(self, path=None):
+        self.path = path or HISTORY_DB
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Concurrent multi-account workers append to the same file
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(courses)")}
+        for column, kind in _COURSE_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE courses ADD COLUMN {column} {kind}")
+        try:
+            os.chmod(self.path, 0o600)
+        except OSError:
+            pass
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- writes ---------------------------------------------------------------------------------
+
+    def append(self, student, courses, scraped_at=None):
+        """Record one scrape; returns the snapshot id. Rows are only copied when the content changed."""
+        scraped_at = scraped_at or time.strftime("%Y-%m-%dT%H:%M:%S")
+        digest = content_hash(courses)
+        with self.conn:
+            prev = self.conn.execute(
+                "SELECT content_hash, data_id FROM snapshots WHERE student = ? ORDER BY scraped_at DESC, id DESC LIMIT 1",
+                (student,),
+            ).fetchone()
+            cur = self.conn.execute(
+                "INSERT INTO snapshots (student, scraped_at, content_hash, data_id) VALUES (?, ?, ?, 0)",
+                (student, scraped_at, digest),
+            )
+            snapshot_id = cur.lastrowid
+            if prev is not None and prev[0] == digest:
+                data_id = prev[1]
+            else:
+                data_id = snapshot_id
+                self._insert_rows(snapshot_id, student, courses, scraped_at, prev[1] if prev else None)
+            self.conn.execute("UPDATE snapshots SET data_id = ? WHERE id = ?", (data_id, snapshot_id))
+        return snapshot_id
+
+    def _insert_rows(self, snapshot_id, student, courses, scraped_at, prev_data_id=None):
+        # Assignment rows of the previous scrape's courses, by course content
+        known = {}
+        if prev_data_id is not None:
+            for digest, rows_snapshot, rows_position in self.conn.execute(
+                "SELECT content_hash, COALESCE(rows_snapshot, snapshot_id), COALESCE(rows_position, position) "
+                "FROM courses WHERE snapshot_id = ? AND content_hash IS NOT NULL",
+                (prev_data_id,),
+            ):
+                known[digest] = (rows_snapshot, rows_position)
+        course_rows, assignment_rows = [], []
+        for cpos, c in enumerate(courses):
+            digest = content_hash([c])
+            rows_at = known.get(digest)
+            course_rows.append((
+                snapshot_id, cpos, student, c.name, c.cycle, c.class_grade, c.class_grade_text, c.updated,
+                json.dumps(list(c.raw), ensure_ascii=False) if c.raw else None, scraped_at,
+                digest, *(rows_at or (None, None)),
+            ))
+            if rows_at is not None:
+                continue
+            for apos, a in enumerate(c.assignments):
+                assignment_rows.append((
+                    snapshot_id, cpos, apos, student, c.name, a.title,
+                    a.due.isoformat() if a.due else None, a.due_text, a.category,
+                    a.score, a.score_text, a.percent_text, int(a.missing), scraped_at,
+                ))
+        self.conn.executemany(
+            "INSERT INTO courses (snapshot_id, position, student, course, cycle, class_grade, class_grade_text, "
+            "updated, raw, scraped_at, content_hash, rows_snapshot, rows_position) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            course_rows,
+        )
+        self.conn.executemany(
+            "INSERT INTO assignments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", assignment_rows
+        )
+
+    def compact(self, now=None, full_days=None, retention_days=None):
+        """Apply the retention policy; returns the number of snapshots removed."""
+        now = now or datetime.now()
+        full_cutoff = (now - timedelta(days=HISTORY_FULL_DAYS if full_days is None else full_days)).strftime("%Y-%m-%dT%H:%M:%S")
+        drop_cutoff = (now - timedelta(days=HISTORY_RETENTION_DAYS if retention_days is None else retention_days)).strftime("%Y-%m-%dT%H:%M:%S")
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM snapshots WHERE scraped_at < ?", (drop_cutoff,)).rowcount
+            # Beyond the full-resolution window keep the last scrape of each week per student
+            removed += self.conn.execute(
+                """
+                DELETE FROM snapshots WHERE scraped_at < ? AND id NOT IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY student, strftime('%Y-%W', scraped_at)
+                            ORDER BY scraped_at DESC, id DESC
+                        ) AS rn
+                        FROM snapshots WHERE scraped_at < ?
+                    ) WHERE rn = 1
+                )
+                """,
+                (full_cutoff, full_cutoff),
+            ).rowcount
+            self.conn.execute("DELETE FROM courses WHERE snapshot_id NOT IN (SELECT data_id FROM snapshots)")
+            # Assignment rows can be shared by later courses (rows_snapshot); keep every one still referenced
+            self.conn.execute(
+                "DELETE FROM assignments WHERE (snapshot_id, course_position) NOT IN ("
+                "SELECT COALESCE(rows_snapshot, snapshot_id), COALESCE(rows_position, position) FROM courses)"
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_compacted', ?)", (now.strftime("%Y-%m-%dT%H:%M:%S"),)
+            )
+        if removed:
+            self.conn.execute("VACUUM")
+        return removed
+
+    def maybe_compact(self, every_hours=24):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'last_compacted'").fetchone()
+        if row is None or datetime.now() - datetime.fromisoformat(row[0]) > timedelta(hours=every_hours):
+            return self.compact()
+        return 0
+
+    # -- queries --------------------------------------------------------------------------------
+
+    def _course(self, rows_snapshot, rows_position, name, cycle, grade_text, updated, raw):
+        rows = self.conn.execute(
+            "SELECT assignment, due_text, category, score_text, percent_text FROM assignments "
+            "WHERE snapshot_id = ? AND course_position = ? ORDER BY position",
+            (rows_snapshot, rows_position),
+        ).fetchall()
+        return Course(
+            name=name, class_grade_text=grade_text, updated=updated, cycle=cycle,
+            assignments=tuple(Assignment(*row) for row in rows),
+            raw=tuple(json.loads(raw)) if raw else (),
+        )
+
+    def _courses(self, data_id):
+        return [
+            self._course(*row)
+            for row in self.conn.execute(
+                "SELECT COALESCE(rows_snapshot, snapshot_id), COALESCE(rows_position, position), "
+                "course, cycle, class_grade_text, updated, raw FROM courses "
+                "WHERE snapshot_id = ? ORDER BY position",
+                (data_id,),
+            ).fetchall()
+        ]
+
+    def latest(self, student):
+        """(scraped_at, [Course]) of the most recent scrape, or (None, [])."""
+        row = self.conn.execute(
+            "SELECT scraped_at, data_id FROM snapshots WHERE student = ? ORDER BY scraped_at DESC, id DESC LIMIT 1",
+            (student,),
+        ).fetchone()
+        return (row[0], self._courses(row[1])) if row else (None, [])
+
+    def previous(self, student):
+        """(scraped_at, [Course]) of the scrape before the latest one, or (None, [])."""
+        row = self.conn.execute(
+            "SELECT scraped_at, data_id FROM snapshots WHERE student = ? ORDER BY scraped_at DESC, id DESC LIMIT 1 OFFSET 1",
+            (student,),
+        ).fetchone()
+        return (row[0], self._courses(row[1])) if row else (None, [])
+
+    def snapshots(self, student, since=None, until=None):
+        """[(snapshot id, scraped_at, data id)] oldest first."""
+        return self.conn.execute(
+            "SELECT id, scraped_at, data_id FROM snapshots WHERE student = ? AND scraped_at >= ? AND scraped_at <= ? "
+            "ORDER BY scraped_at, id",
+            (student, since or "", until or "9999"),
+        ).fetchall()
+
+    def course_history(self, student, course, since=None, prefix=False):
+        """[(first seen, Course)] for each distinct version of one course (exact name, or a name prefix)."""
+        versions, last = [], {}
+        where, params = _course_filter("course", course, prefix)
+        for scraped_at, *row in self.conn.execute(
+            "SELECT scraped_at, COALESCE(rows_snapshot, snapshot_id), COALESCE(rows_position, position), "
+            "course, cycle, class_grade_text, updated, raw FROM courses "
+            f"WHERE student = ? AND {where} AND scraped_at >= ? ORDER BY scraped_at, position",
+            (student, *params, since or ""),
+        ).fetchall():
+            record = self._course(*row)
+            # Course rows are written whenever any course changed; only report this course's own changes
+            key = (record.name, record.cycle)
+            if last.get(key) != record:
+                versions.append((scraped_at, record))
+                last[key] = record
+        return versions
+
+    def grade_series(self, student, course=None, since=None, prefix=False):
+        """[(scraped_at, course, cycle, class grade)] for every scrape, oldest first; every course when `course` is empty."""
+        where, params = _course_filter("c.course", course, prefix) if course else ("1", [])
+        return self.conn.execute(
+            f"""
+            SELECT s.scraped_at, c.course, c.cycle, c.class_grade
+            FROM snapshots s JOIN courses c ON c.snapshot_id = s.data_id
+            WHERE s.student = ? AND s.scraped_at >= ? AND {where} AND c.class_grade IS NOT NULL
+            ORDER BY s.scraped_at, c.position
+            """,
+            (student, since or "", *params),
+        ).fetchall()
+
+    def assignment_history(self, student, course, assignment, prefix=False):
+        """[(first seen, score text, missing)] for each change of one assignment."""
+        changes = []
+        where, params = _course_filter("course", course, prefix)
+        for scraped_at, score_text, missing in self.conn.execute(
+            "SELECT scraped_at, score_text, missing FROM assignments "
+            f"WHERE student = ? AND {where} AND assignment = ? ORDER BY scraped_at",
+            (student, *params, assignment),
+        ).fetchall():
+            if not changes or changes[-1][1:] != (score_text, bool(missing)):
+                changes.append((scraped_at, score_text, bool(missing)))
+        return changes
+
+    def first_missing(self, student, course, assignment, prefix=False):
+        """When the assignment was first seen marked missing, or None."""
+        where, params = _course_filter("course", course, prefix)
+        row = self.conn.execute(
+            f"SELECT MIN(scraped_at) FROM assignments WHERE student = ? AND {where} AND assignment = ? AND missing = 1",
+            (student, *params, assignment),
+        ).fetchone()
+        return row[0] if row else None
+
+
+def record_snapshot(student, courses, path=None):
+    """Append one scrape to HISTORY_DB (no-op when HISTORY_DB is empty) and compact at most once a day."""
+    if not (path or HISTORY_DB):
+        return None
+    with HistoryStore(path) as store:
+        snapshot_id = store.append(student, courses)
+        store.maybe_compact()
+    return snapshot_id
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from records import render_lines
+
+    parser = argparse.ArgumentParser(description="Query the grade history store")
+    parser.add_argument("query", choices=["latest", "series", "course", "missing", "compact"])
+    parser.add_argument("--student", default=os.getenv('HAC_USERNAME'))
+    parser.add_argument("--course", default="")
+    parser.add_argument("--prefix", action="store_true", help="Match course names starting with --course")
+    parser.add_argument("--assignment", default="")
+    parser.add_argument("--since", default=None)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    with HistoryStore(args.db) as store:
+        if args.query == "latest":
+            scraped_at, courses = store.latest(args.student)
+            print(f"Scraped at: {scraped_at}")
+            for line in render_lines(courses):
+                print(line)
+        elif args.query == "series":
+            for scraped_at, course, cycle, grade in store.grade_series(args.student, args.course, args.since, args.prefix):
+                print(f"{scraped_at} | {course}{f' (cycle {cycle})' if cycle else ''} | {grade:.2f}%")
+        elif args.query == "course":
+            for first_seen, record in store.course_history(args.student, args.course, args.since, args.prefix):
+                print(f"{first_seen} | {record.name} | {record.class_grade_text} | {len(record.assignments)} assignments")
+        elif args.query == "missing":
+            print(f"First seen missing: {store.first_missing(args.student, args.course, args.assignment, args.prefix)}")
+            for first_seen, score_text, missing in store.assignment_history(args.student, args.course, args.assignment, args.prefix):
+                print(f"{first_seen} | {score_text or '(blank)'}{' | missing' if missing else ''}")
+        else:
+            print(f"Removed {store.compact()} snapshots")
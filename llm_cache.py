@@ -0,0 +1,197 @@
+"""On-disk cache of LLM analyses, so re-analyzing unchanged data skips the model round-trip.
+
+Entries are addressed by a SHA-256 of everything that determines the answer: the full prompt (the
+template with the cleaned data substituted in), the system prompt, the model name and the model
+settings. Entries older than LLM_CACHE_TTL_SEC are ignored and removed; when the directory grows past
+LLM_CACHE_MAX_MB the least recently used entries are evicted.
+
+    python llm_cache.py stats    # entries, size and hit/miss counters
+    python llm_cache.py clear
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+LLM_CACHE = os.getenv('LLM_CACHE', 'true').lower() in ('1', 'true', 'yes')
+LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', '/tmp/hac-llm-cache')
+LLM_CACHE_TTL_SEC = int(os.getenv('LLM_CACHE_TTL_SEC', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', '50'))
+
+_SUFFIX = ".html"
+_STATS_FILE = "stats.json"
+
+
+def cache_key(prompt, system_prompt, model, settings=None):
+    payload = json.dumps(
+        {"prompt": prompt, "system_prompt": system_prompt, "model": model, "settings": settings or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Directory of <key>.html files; mtime is the last use (for LRU), the stored creation time drives the TTL."""
+
+    def __init__(self, cache_dir=None, ttl_sec=None, max_mb=None, enabled=None):
+        self.dir = cache_dir or LLM_CACHE_DIR
+        self.ttl_sec = LLM_CACHE_TTL_SEC if ttl_sec is None else ttl_sec
+        self.max_bytes = int((LLM_CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.enabled = LLM_CACHE if enabled is None else enabled
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "stores": 0}
+
+    def _path(self, key):
+        return os.path.join(self.dir, key + _SUFFIX)
+
+    def get(self, key):
+        """Cached HTML for `key`, or None on a miss or an expired entry."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                created = float(f.readline())
+                html = f.read()
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+        if time.time() - created > self.ttl_sec:
+            self._remove(path)
+            self._count("expired")
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return html
+
+    def put(self, key, html):
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.dir, mode=0o700, exist_ok=True)
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(f"{time.time()}\n")
+                f.write(html)
+            os.replace(tmp, path)
+            self._count("stores")
+            self.evict()
+        except OSError as e:
+            print(f"Warning: could not store LLM cache entry: {e}")
+
+    def entries(self):
+        """[(path, size, mtime)] of every cache entry."""
+        out = []
+        try:
+            names = os.listdir(self.dir)
+        except OSError:
+            return out
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((path, st.st_size, st.st_mtime))
+        return out
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits LLM_CACHE_MAX_MB; returns how many were removed."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        if removed:
+            self._count("evictions", removed)
+        return removed
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _count(self, name, n=1):
+        self.stats[name] += n
+        # Cumulative counters across runs and worker processes; best effort
+        path = os.path.join(self.dir, _STATS_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                totals = json.load(f)
+        except (OSError, ValueError):
+            totals = {}
+        totals[name] = totals.get(name, 0) + n
+        try:
+            os.makedirs(self.dir, mode=0o700, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(totals, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def totals(self):
+        try:
+            with open(os.path.join(self.dir, _STATS_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+def cached_completion(cache, prompt, system_prompt, model, settings, call):
+    """(html, hit): the cached answer, or call() stored for next time. Failures raise and are never cached."""
+    key = cache_key(prompt, system_prompt, model, settings)
+    html = cache.get(key)
+    if html is not None:
+        return html, True
+    html = call()
+    if isinstance(html, str) and html:
+        cache.put(key, html)
+    return html, False
+
+
+async def cached_completion_async(cache, prompt, system_prompt, model, settings, call):
+    """cached_completion() for an async `call` (a coroutine function)."""
+    key = cache_key(prompt, system_prompt, model, settings)
+    html = cache.get(key)
+    if html is not None:
+        return html, True
+    html = await call()
+    if isinstance(html, str) and html:
+        cache.put(key, html)
+    return html, False
+
+
+if __name__ == "__main__":
+    cache = LLMCache(enabled=True)
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.dir}")
+    else:
+        entries = cache.entries()
+        totals = cache.totals()
+        lookups = totals.get("hits", 0) + totals.get("misses", 0)
+        print(f"{len(entries)} entries, {sum(e[1] for e in entries) / 1024:.1f} KB in {cache.dir}")
+        for name in ("hits", "misses", "expired", "evictions", "stores"):
+            print(f"{name}: {totals.get(name, 0)}")
+        if lookups:
+            print(f"hit rate: {totals.get('hits', 0) / lookups:.0%}")
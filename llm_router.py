@@ -0,0 +1,307 @@
+"""Ordered, hedged execution of one prompt across LLM providers.
+
+The first provider gets the request. If it hasn't answered within its hedge delay (its observed p95
+latency, or LLM_HEDGE_AFTER_SEC until enough samples exist) the next provider gets a second,
+hedged request; a provider that fails hands over immediately. The first valid answer wins and the
+other requests are cancelled. With a single provider nothing is hedged: a duplicate request to the
+same model would double the cost without helping its tail latency, so a failed request is simply
+retried (up to LLM_MAX_ATTEMPTS).
+
+Per-provider latency histograms are kept in LLM_LATENCY_STATS so the order adapts across runs:
+providers are tried fastest-first by observed p95 (divided by success rate); unmeasured providers
+are assumed to take the hedge budget. The samples are successful answers plus, for a request
+cancelled because another one won, the time it had run by then (a censored sample: its real
+latency was at least that), so the slow tail the hedge cuts off still counts. Failures are counted
+but their latency, often a fast error, is kept out of the samples. When every attempt fails, LLMUnavailable is raised instead of
+an error string ending up in the email.
+
+Try it offline with fake providers:
+
+    python llm_router.py --demo
+"""
+import asyncio
+import json
+import os
+import random
+import time
+
+from prompt_cache import litellm_messages, prompt_text, pydantic_ai_user_prompt
+
+# Ordered pydantic-ai model names; the first is preferred until latency data says otherwise
+LLM_PROVIDERS = [p.strip() for p in os.getenv('LLM_PROVIDERS', 'gemini-2.5-flash').split(',') if p.strip()]
+# Hedge delay before enough latency samples exist, and the quantile used once they do
+LLM_HEDGE_AFTER_SEC = float(os.getenv('LLM_HEDGE_AFTER_SEC', '20'))
+LLM_HEDGE_QUANTILE = float(os.getenv('LLM_HEDGE_QUANTILE', '0.95'))
+# Concurrent requests for one prompt (primary + hedges) and the overall deadline
+LLM_MAX_ATTEMPTS = int(os.getenv('LLM_MAX_ATTEMPTS', '2'))
+LLM_TIMEOUT_SEC = float(os.getenv('LLM_TIMEOUT_SEC', '120'))
+LLM_LATENCY_STATS = os.getenv('LLM_LATENCY_STATS', '/tmp/hac-llm-latency.json')
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.5, 1, 2, 4, 8, 16, 32, 64, float("inf"))
+_MIN_SAMPLES = 10
+_MAX_SAMPLES = 200
+
+
+class LLMUnavailable(Exception):
+    """Every provider failed, returned nothing usable, or the deadline passed."""
+
+
+class Provider:
+    """A named async callable prompt -> text."""
+
+    def __init__(self, name, call):
+        self.name = name
+        self.call = call
+
+    def __repr__(self):
+        return f"Provider({self.name!r})"
+
+
+def pydantic_ai_provider(model, system_prompt, settings=None, output_type=None, name=None, usage=None):
+    """Provider backed by one pydantic-ai Agent, built on first use and reused.
+
+    With output_type the Agent returns that pydantic model instead of text. Prompts may be
+    prompt_cache.Prompt; each response's usage is recorded in `usage` (a PromptCacheStats).
+    """
+    agent = None
+
+    async def call(prompt):
+        nonlocal agent
+        if agent is None:
+            from pydantic_ai import Agent
+
+            kwargs = {"system_prompt": system_prompt, "model_settings": settings or {}}
+            if output_type is None:
+                agent = Agent(model, **kwargs)
+            else:
+                try:
+                    agent = Agent(model, output_type=output_type, **kwargs)
+                except TypeError:
+                    # pydantic-ai before 0.1 called it result_type
+                    agent = Agent(model, result_type=output_type, **kwargs)
+        result = await agent.run(pydantic_ai_user_prompt(prompt, system_prompt))
+        if usage is not None:
+            # A method in older pydantic-ai, a property in newer releases
+            run_usage = getattr(result, "usage", None)
+            usage.record(run_usage() if callable(run_usage) else run_usage)
+        return getattr(result, "output", getattr(result, "data", result))
+
+    return Provider(name or (model if isinstance(model, str) else type(model).__name__), call)
+
+
+def litellm_provider(model, timeout=None, usage=None, **settings):
+    async def call(prompt):
+        from litellm import acompletion
+
+        response = await acompletion(
+            model=model, messages=litellm_messages(prompt), timeout=timeout or LLM_TIMEOUT_SEC, **settings
+        )
+        if usage is not None:
+            usage.record(response.get('usage'))
+        return response.get('choices', [{}])[0].get('message', {}).get('content')
+
+    return Provider(model, call)
+
+
+def fake_provider(name, latency=1.0, jitter=0.0, fail_rate=0.0, output=None, rng=None):
+    """Offline stand-in: answers after latency±jitter seconds, or raises with probability fail_rate."""
+    rng = rng or random.Random(name)
+
+    async def call(prompt):
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+        if rng.random() < fail_rate:
+            raise RuntimeError("simulated failure")
+        return output if output is not None else f"<html>{name}: {len(prompt_text(prompt))} chars</html>"
+
+    return Provider(name, call)
+
+
+class LatencyStats:
+    """Per-provider histogram, recent samples and outcome counters, persisted as JSON."""
+
+    def __init__(self, path=None):
+        self.path = LLM_LATENCY_STATS if path is None else path
+        self.data = {}
+        if self.path:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def _entry(self, name):
+        return self.data.setdefault(name, {
+            "buckets": [0] * len(LATENCY_BUCKETS), "samples": [],
+            "ok": 0, "failed": 0, "hedged": 0, "cancelled": 0,
+        })
+
+    def record(self, name, seconds=None, outcome="ok"):
+        """Count `outcome`; `seconds` becomes a latency sample for "ok" and (censored) "cancelled" only."""
+        entry = self._entry(name)
+        entry[outcome] += 1
+        if seconds is not None and outcome in ("ok", "cancelled"):
+            entry["buckets"][next(i for i, b in enumerate(LATENCY_BUCKETS) if seconds <= b)] += 1
+            entry["samples"] = (entry["samples"] + [round(seconds, 3)])[-_MAX_SAMPLES:]
+
+    def quantile(self, name, q):
+        samples = sorted(self.data.get(name, {}).get("samples", []))
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def success_rate(self, name):
+        entry = self.data.get(name, {})
+        done = entry.get("ok", 0) + entry.get("failed", 0)
+        return entry.get("ok", 0) / done if done else 1.0
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: could not save LLM latency stats: {e}")
+
+
+class LLMRouter:
+    def __init__(self, providers, hedge_after=None, quantile=None, max_attempts=None, timeout=None,
+                 stats=None, validate=None):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = list(providers)
+        self.hedge_after = LLM_HEDGE_AFTER_SEC if hedge_after is None else hedge_after
+        self.quantile = LLM_HEDGE_QUANTILE if quantile is None else quantile
+        self.max_attempts = max(1, LLM_MAX_ATTEMPTS if max_attempts is None else max_attempts)
+        self.timeout = LLM_TIMEOUT_SEC if timeout is None else timeout
+        self.stats = stats if stats is not None else LatencyStats()
+        self.validate = validate or (lambda text: isinstance(text, str) and bool(text.strip()))
+
+    def hedge_delay(self, name):
+        observed = self.stats.quantile(name, self.quantile)
+        return self.hedge_after if observed is None else observed
+
+    def ordered(self):
+        """Providers by expected latency (observed p95 / success rate); ties keep the configured order."""
+        def expected(p):
+            return self.hedge_delay(p.name) / max(self.stats.success_rate(p.name), 0.05)
+
+        return sorted(self.providers, key=expected)
+
+    async def run(self, prompt):
+        """(text, provider name) of the first valid answer; raises LLMUnavailable."""
+        order = self.ordered()
+        deadline = time.monotonic() + self.timeout
+        pending = {}
+        errors = []
+        launched = 0
+        # Each provider at least once, and up to max_attempts requests (retries after a failure with a single provider)
+        max_launches = max(self.max_attempts, len(order))
+
+        def launch():
+            nonlocal launched
+            provider = order[launched % len(order)]
+            launched += 1
+            task = asyncio.ensure_future(provider.call(prompt))
+            pending[task] = (provider, time.monotonic())
+            return provider
+
+        launch()
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                newest = max(pending.values(), key=lambda v: v[1])
+                can_hedge = len(order) > 1 and len(pending) < self.max_attempts and launched < max_launches
+                wait = min(remaining, self.hedge_delay(newest[0].name)) if can_hedge else remaining
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if can_hedge:
+                        self.stats.record(newest[0].name, outcome="hedged")
+                        launch()
+                    continue
+                for task in done:
+                    provider, started = pending.pop(task)
+                    elapsed = time.monotonic() - started
+                    try:
+                        text = task.result()
+                    except Exception as e:
+                        self.stats.record(provider.name, outcome="failed")
+                        errors.append(f"{provider.name}: {e}")
+                        continue
+                    if not self.validate(text):
+                        self.stats.record(provider.name, outcome="failed")
+                        errors.append(f"{provider.name}: invalid response")
+                        continue
+                    self.stats.record(provider.name, elapsed, "ok")
+                    return text, provider.name
+                # A failure hands over to the next provider without waiting for the hedge delay
+                if not pending and launched < max_launches:
+                    launch()
+            errors.append(f"no answer within {self.timeout:.0f}s" if pending else "all attempts failed")
+            raise LLMUnavailable("; ".join(errors))
+        finally:
+            now = time.monotonic()
+            for task, (provider, started) in pending.items():
+                task.cancel()
+                # Censored: this request would have taken at least this long
+                self.stats.record(provider.name, now - started, "cancelled")
+            self.stats.save()
+
+    def summary(self):
+        lines = [f"{'provider':<28}{'ok':>5}{'fail':>6}{'hedged':>8}{'p50 s':>8}{'p95 s':>8}  histogram (<=s: n)"]
+        for name, entry in self.stats.data.items():
+            hist = " ".join(
+                f"{'inf' if b == float('inf') else f'{b:g}'}:{n}" for b, n in zip(LATENCY_BUCKETS, entry["buckets"]) if n
+            )
+            p50, p95 = self.stats.quantile(name, 0.5), self.stats.quantile(name, 0.95)
+            lines.append(
+                f"{name:<28}{entry['ok']:>5}{entry['failed']:>6}{entry['hedged']:>8}"
+                f"{'-' if p50 is None else f'{p50:.2f}':>8}{'-' if p95 is None else f'{p95:.2f}':>8}  {hist}"
+            )
+        return "\n".join(lines)
+
+
+async def _demo(requests):
+    rng = random.Random(7)
+    providers = [
+        # Usually fast with a slow tail, the case hedging is for
+        fake_provider("primary", latency=0.3, jitter=0.1, rng=rng),
+        fake_provider("backup", latency=0.5, jitter=0.1, fail_rate=0.1, rng=rng),
+    ]
+    slow_tail = providers[0].call
+
+    async def primary(prompt):
+        if rng.random() < 0.15:
+            await asyncio.sleep(3)
+        return await slow_tail(prompt)
+
+    providers[0].call = primary
+    router = LLMRouter(providers, hedge_after=1.0, stats=LatencyStats(path=""))
+    latencies, winners = [], {}
+    for i in range(requests):
+        started = time.monotonic()
+        _, winner = await router.run(f"prompt {i}")
+        latencies.append(time.monotonic() - started)
+        winners[winner] = winners.get(winner, 0) + 1
+    latencies.sort()
+    print(f"{requests} requests; winners {winners}")
+    print(f"p50 {latencies[len(latencies) // 2]:.2f}s  p95 {latencies[int(0.95 * len(latencies))]:.2f}s  max {latencies[-1]:.2f}s")
+    print(router.summary())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hedged LLM router; --demo runs it against fake providers")
+    parser.add_argument("--demo", action="store_true")
+    parser.add_argument("--requests", type=int, default=40)
+    args = parser.parse_args()
+    if args.demo:
+        asyncio.run(_demo(args.requests))
+    else:
+        print(LLMRouter([Provider(name, None) for name in LLM_PROVIDERS], stats=LatencyStats()).summary())
@@ -0,0 +1,206 @@
+"""Grade report computed locally from the Course records, with no LLM call.
+
+Renders the same sections the LLM prompt asks for (summary, missing assignments, assignments below
+80%, low and other class grades) as mobile-friendly HTML in a few milliseconds. An LLM can optionally
+add a short narrative on top (LOCAL_NARRATIVE), but every number and table comes from here.
+
+    python local_report.py /tmp/assignments.txt > report.html
+"""
+import html
+import sys
+from dataclasses import dataclass
+from datetime import date
+from string import Template
+
+# Assignment and class grades below this are flagged
+GRADE_THRESHOLD = 80.0
+
+
+@dataclass(frozen=True, slots=True)
+class ReportRow:
+    course: str
+    assignment: str = ""
+    due_text: str = ""
+    due: date | None = None
+    score_text: str = ""
+    grade: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Report:
+    missing: tuple[ReportRow, ...]
+    below: tuple[ReportRow, ...]
+    low_classes: tuple[ReportRow, ...]
+    other_classes: tuple[ReportRow, ...]
+    unstructured_lines: int = 0
+    structured_courses: int = 0
+
+    @property
+    def missing_count(self):
+        return len(self.missing)
+
+    @property
+    def below_count(self):
+        return len(self.below)
+
+    @property
+    def usable(self):
+        """False when the input was only unstructured text: an empty report would read as "nothing missing"."""
+        return self.structured_courses > 0 or not self.unstructured_lines
+
+
+def _course_label(course):
+    return f"{course.name} (Cycle {course.cycle})" if course.cycle else course.name
+
+
+def assignment_grade(a):
+    """Percent for one row: HAC's Percent column, else the score (HAC scores are out of 100 unless a percent is shown)."""
+    if a.missing:
+        return None
+    return a.percent if a.percent is not None else a.score
+
+
+def assemble_report(missing, below, classes, threshold=GRADE_THRESHOLD, unstructured_lines=0, structured_courses=0):
+    """Sort the rows into a Report: missing newest first (undated last), grades lowest first.
+
+    Ties are ordered by course and assignment, so the report does not depend on the input order.
+    """
+    missing = sorted(missing, key=lambda r: (r.course, r.assignment))
+    missing.sort(key=lambda r: (r.due is not None, r.due or date.min), reverse=True)
+    below = sorted(below, key=lambda r: (r.grade is None, r.grade or 0.0, r.course, r.assignment))
+    classes = sorted((r for r in classes if r.grade is not None), key=lambda r: (r.grade, r.course))
+    low = tuple(r for r in classes if r.grade < threshold)
+    other = tuple(r for r in classes if r.grade >= threshold)
+    return Report(tuple(missing), tuple(below), low, other, unstructured_lines, structured_courses)
+
+
+def build_report(courses, threshold=GRADE_THRESHOLD):
+    missing, below, classes = [], [], []
+    unstructured = structured = 0
+    for c in courses:
+        unstructured += len(c.raw)
+        if not c.name:
+            continue
+        structured += 1
+        label = _course_label(c)
+        if c.class_grade is not None:
+            classes.append(ReportRow(label, score_text=c.class_grade_text, grade=c.class_grade))
+        for a in c.assignments:
+            grade = assignment_grade(a)
+            row = ReportRow(label, a.title, a.due_text, a.due, a.score_text, grade)
+            # A 0.00 counts as missing work as well as a low grade
+            if a.missing or (a.score is not None and a.score == 0):
+                missing.append(row)
+            if grade is not None and grade < threshold:
+                below.append(row)
+    return assemble_report(missing, below, classes, threshold, unstructured, structured)
+
+
+_PAGE = Template("""<html>
+<head>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<style>
+body { font-family: -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 0 auto; padding: 12px; max-width: 720px; color: #222; }
+h2 { font-size: 1.2em; margin: 1.2em 0 0.4em; }
+table { border-collapse: collapse; width: 100%; font-size: 0.9em; }
+th, td { border: 1px solid #ddd; padding: 6px; text-align: left; vertical-align: top; }
+th { background: #f3f3f3; }
+.num { text-align: right; white-space: nowrap; }
+.empty { color: #666; font-style: italic; }
+</style>
+</head>
+<body>
+$narrative<h2>Summary of Key Issues</h2>
+<ul>
+<li>Missing assignments (including 0.00 grades): <b>$missing_count</b></li>
+<li>Assignments below $threshold%: <b>$below_count</b></li>
+<li>Class grades below $threshold%: <b>$low_count</b></li>
+</ul>
+$notes<h2>Missing Assignments</h2>
+$missing_table
+<h2>Assignments Below $threshold%</h2>
+$below_table
+<h2>Low Class Grades (Below $threshold%)</h2>
+$low_table
+<h2>Other Class Grades ($threshold% and Above)</h2>
+$other_table
+</body>
+</html>
+""")
+
+_TABLE = Template("<table>\n<tr>$head</tr>\n$rows</table>")
+_EMPTY = '<p class="empty">None</p>'
+
+
+def _table(headers, rows, numeric=()):
+    if not rows:
+        return _EMPTY
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+    body = "".join(
+        "<tr>" + "".join(
+            f'<td class="num">{html.escape(cell)}</td>' if i in numeric else f"<td>{html.escape(cell)}</td>"
+            for i, cell in enumerate(row)
+        ) + "</tr>\n"
+        for row in rows
+    )
+    return _TABLE.substitute(head=head, rows=body)
+
+
+def _fmt_grade(grade):
+    return f"{grade:.2f}%" if grade is not None else ""
+
+
+def render_report_html(report, narrative=None, threshold=GRADE_THRESHOLD):
+    notes = ""
+    if report.unstructured_lines:
+        notes = f'<p class="empty">{report.unstructured_lines} unstructured line(s) could not be analyzed.</p>\n'
+    return _PAGE.substitute(
+        narrative=f"<p>{html.escape(narrative)}</p>\n" if narrative else "",
+        threshold=f"{threshold:g}",
+        missing_count=report.missing_count,
+        below_count=report.below_count,
+        low_count=len(report.low_classes),
+        notes=notes,
+        missing_table=_table(
+            ("Course", "Assignment", "Due Date", "Score"),
+            [(r.course, r.assignment, r.due_text, r.score_text) for r in report.missing],
+        ),
+        below_table=_table(
+            ("Course", "Assignment", "Due Date", "Grade"),
+            [(r.course, r.assignment, r.due_text, _fmt_grade(r.grade)) for r in report.below],
+            numeric=(3,),
+        ),
+        low_table=_table(
+            ("Course", "Current Grade"),
+            [(r.course, r.score_text) for r in report.low_classes],
+            numeric=(1,),
+        ),
+        other_table=_table(
+            ("Course", "Current Grade"),
+            [(r.course, r.score_text) for r in report.other_classes],
+            numeric=(1,),
+        ),
+    )
+
+
+def summary_facts(report, threshold=GRADE_THRESHOLD):
+    """Plain-text facts from the report, the only input the optional narrative call sees."""
+    lines = [
+        f"Missing assignments (including 0.00): {report.missing_count}",
+        f"Assignments below {threshold:g}%: {report.below_count}",
+    ]
+    lines += [f"Missing: {r.course} | {r.assignment} | due {r.due_text}" for r in report.missing]
+    lines += [f"Low class grade: {r.course} | {r.score_text}" for r in report.low_classes]
+    lines += [f"Class grade: {r.course} | {r.score_text}" for r in report.other_classes]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from assignments_io import load_assignments
+
+    for saved in sys.argv[1:]:
+        report = build_report(load_assignments(saved))
+        if not report.usable:
+            sys.exit(f"{saved}: {report.unstructured_lines} unstructured line(s) and no course rows; "
+                     "use the LLM analysis for this file")
+        print(render_report_html(report))
@@ -0,0 +1,241 @@
+"""Durable outbox for report emails: written to disk first, delivered in batches over one SMTP connection.
+
+Each queued message is one JSON file in OUTBOX_DIR (mode 0600, written atomically) holding the full
+MIME text, so a failed delivery no longer loses the analysis and a retry does not need a new scrape
+or LLM call. deliver() sends every due message over a single authenticated connection. A message
+that fails is retried with exponential backoff (OUTBOX_RETRY_BASE_SEC, doubling up to
+OUTBOX_RETRY_MAX_SEC); permanently rejected messages (5xx), and messages still failing after
+OUTBOX_MAX_ATTEMPTS, are moved to OUTBOX_DIR/failed. When the server can't be reached at all the
+whole batch is backed off without spending attempts, so an outage doesn't dead-letter the queue.
+
+    python outbox.py status
+    python outbox.py deliver        # send whatever is due now
+    python outbox.py retry-failed   # move failed messages back into the queue
+"""
+import fcntl
+import json
+import os
+import smtplib
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+
+OUTBOX_DIR = os.getenv('OUTBOX_DIR', '/tmp/hac-outbox')
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_RETRY_BASE_SEC = float(os.getenv('OUTBOX_RETRY_BASE_SEC', '60'))
+OUTBOX_RETRY_MAX_SEC = float(os.getenv('OUTBOX_RETRY_MAX_SEC', '3600'))
+# SMTP server; SMTP_SSL=true is implicit TLS (Gmail's 465), otherwise SMTP_STARTTLS upgrades a plain connection (587)
+SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '465'))
+SMTP_SSL = os.getenv('SMTP_SSL', 'true').lower() in ('1', 'true', 'yes')
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', 'false').lower() in ('1', 'true', 'yes')
+SMTP_TIMEOUT_SEC = float(os.getenv('SMTP_TIMEOUT_SEC', '30'))
+
+_SUFFIX = ".json"
+_FAILED = "failed"
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryResult:
+    sent: int = 0
+    retrying: int = 0
+    failed: int = 0
+    pending: int = 0
+    errors: tuple[str, ...] = ()
+
+
+def _permanent(error):
+    """5xx rejections of the message or its recipients will not succeed on retry; auth errors might once fixed."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(error, "smtp_code", 0)
+    return 500 <= code < 600 and not isinstance(error, smtplib.SMTPAuthenticationError)
+
+
+class Outbox:
+    def __init__(self, directory=None, host=None, port=None, use_ssl=None, starttls=None, username=None,
+                 password=None, max_attempts=None, retry_base=None, retry_max=None, timeout=None):
+        self.dir = directory or OUTBOX_DIR
+        self.host = host or SMTP_HOST
+        self.port = port or SMTP_PORT
+        self.use_ssl = SMTP_SSL if use_ssl is None else use_ssl
+        self.starttls = SMTP_STARTTLS if starttls is None else starttls
+        # Credentials default to GMAIL_SENDER / GMAIL_APP_PASSWORD, read when connecting
+        self.username = username
+        self.password = password
+        self.max_attempts = OUTBOX_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.retry_base = OUTBOX_RETRY_BASE_SEC if retry_base is None else retry_base
+        self.retry_max = OUTBOX_RETRY_MAX_SEC if retry_max is None else retry_max
+        self.timeout = SMTP_TIMEOUT_SEC if timeout is None else timeout
+
+    def enqueue(self, sender, recipients, message):
+        """Store one message (a MIME object or its text) for delivery; returns its id."""
+        now = time.time()
+        entry = {
+            "id": uuid.uuid4().hex,
+            "created": now,
+            "sender": sender,
+            "recipients": list(recipients),
+            "subject": message["Subject"] if hasattr(message, "as_string") else "",
+            "message": message.as_string() if hasattr(message, "as_string") else str(message),
+            "attempts": 0,
+            "next_attempt": now,
+            "last_error": "",
+        }
+        # Nanosecond prefix keeps delivery first-in, first-out
+        self._write(os.path.join(self.dir, f"{time.time_ns()}-{entry['id']}{_SUFFIX}"), entry)
+        return entry["id"]
+
+    def pending(self, directory=None):
+        """[(path, entry)] oldest first."""
+        directory = directory or self.dir
+        out = []
+        try:
+            names = sorted(n for n in os.listdir(directory) if n.endswith(_SUFFIX))
+        except OSError:
+            return out
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    out.append((path, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return out
+
+    def failed(self):
+        return self.pending(os.path.join(self.dir, _FAILED))
+
+    def deliver(self, now=None):
+        """Send every due message over one SMTP connection; returns a DeliveryResult."""
+        now = time.time() if now is None else now
+        os.makedirs(self.dir, mode=0o700, exist_ok=True)
+        # One delivery at a time across threads and processes (the scheduler and `outbox.py deliver`)
+        with open(os.path.join(self.dir, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            due = [(path, entry) for path, entry in self.pending() if entry["next_attempt"] <= now]
+            sent = retrying = failed = 0
+            errors = []
+            server = None
+            try:
+                for i, (path, entry) in enumerate(due):
+                    try:
+                        if server is None:
+                            server = self._connect()
+                    except Exception as e:
+                        # Nothing can go out without a connection; back off the whole batch. The messages
+                        # themselves weren't tried, so this doesn't count towards max_attempts
+                        errors.append(f"connect: {e}")
+                        for rest_path, rest in due[i:]:
+                            self._retry(rest_path, rest, e, now, attempted=False)
+                            retrying += 1
+                        break
+                    try:
+                        refused = server.sendmail(entry["sender"], entry["recipients"], entry["message"])
+                    except Exception as e:
+                        errors.append(f"{entry['subject'] or entry['id']}: {e}")
+                        if _permanent(e):
+                            self._dead_letter(path, entry, e)
+                            failed += 1
+                        else:
+                            dead = self._retry(path, entry, e, now)
+                            failed, retrying = failed + dead, retrying + 1 - dead
+                        if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                            # No SMTP reply: the connection itself broke, so reconnect for the next message
+                            server.close()
+                            server = None
+                        continue
+                    if refused:
+                        errors.append(f"{entry['subject'] or entry['id']}: refused {', '.join(refused)}")
+                    self._remove(path)
+                    sent += 1
+            finally:
+                if server is not None:
+                    try:
+                        server.quit()
+                    except Exception:
+                        pass
+            return DeliveryResult(sent, retrying, failed, len(self.pending()), tuple(errors))
+
+    def retry_failed(self):
+        """Move every failed message back into the queue, due now; returns how many."""
+        moved = 0
+        for path, entry in self.failed():
+            entry.update(attempts=0, connect_failures=0, next_attempt=time.time())
+            self._write(os.path.join(self.dir, os.path.basename(path)), entry)
+            self._remove(path)
+            moved += 1
+        return moved
+
+    def _connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                server.starttls()
+        username = self.username or os.getenv('GMAIL_SENDER')
+        password = self.password or os.getenv('GMAIL_APP_PASSWORD')
+        if username and password:
+            server.login(username, password)
+        return server
+
+    def _retry(self, path, entry, error, now, attempted=True):
+        """Reschedule with exponential backoff; returns 1 if the message ran out of attempts and failed, else 0.
+
+        A message that was not attempted (no connection) backs off on its own connect_failures count
+        and is never dead-lettered for it.
+        """
+        entry["last_error"] = str(error)[:500]
+        if attempted:
+            entry["attempts"] += 1
+            if entry["attempts"] >= self.max_attempts:
+                self._dead_letter(path, entry, error)
+                return 1
+            failures = entry["attempts"]
+        else:
+            entry["connect_failures"] = entry.get("connect_failures", 0) + 1
+            failures = entry["connect_failures"]
+        entry["next_attempt"] = now + min(self.retry_max, self.retry_base * 2 ** (failures - 1))
+        self._write(path, entry)
+        return 0
+
+    def _dead_letter(self, path, entry, error):
+        entry["last_error"] = str(error)[:500]
+        self._write(os.path.join(self.dir, _FAILED, os.path.basename(path)), entry)
+        self._remove(path)
+
+    def _write(self, path, entry):
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    outbox = Outbox()
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "deliver":
+        print(outbox.deliver())
+    elif command == "retry-failed":
+        print(f"Requeued {outbox.retry_failed()} failed message(s)")
+    else:
+        now = time.time()
+        for label, entries in (("pending", outbox.pending()), ("failed", outbox.failed())):
+            print(f"{len(entries)} {label} in {outbox.dir}")
+            for _, entry in entries:
+                due = "due now" if entry["next_attempt"] <= now else f"due in {entry['next_attempt'] - now:.0f}s"
+                detail = due if label == "pending" else "failed"
+                print(f"  {entry['subject']!r} to {', '.join(entry['recipients'])}: {entry['attempts']} attempt(s), "
+                      f"{detail}{'; ' + entry['last_error'] if entry['last_error'] else ''}")
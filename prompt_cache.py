@@ -0,0 +1,136 @@
+"""Provider-side prompt caching: the static instruction block first, the per-run data after it.
+
+Every analysis prompt is a Prompt(static, data). The static part (instructions, output format, the
+data legend and a worked example, prompt_examples.py) is identical on every run, so a provider can
+serve it from its prompt cache and only process the data:
+
+- Anthropic through pydantic-ai: a CachePoint after the static block (cache_control on it), on
+  pydantic-ai releases that have CachePoint; older ones get the plain text
+- Anthropic and Gemini through LiteLLM: cache_control on the static content block, which LiteLLM
+  maps to Anthropic prompt caching and Gemini context caching
+- Gemini through pydantic-ai has no request-side marker; Gemini 2.5 caches a repeated prefix
+  implicitly, which the static-first layout makes possible
+
+Providers only cache prefixes above a minimum size (1024 tokens for Claude Sonnet and Gemini 2.5
+Flash, more for some models). The system prompt plus the static block is that prefix; when it is
+estimated below PROMPT_CACHE_MIN_TOKENS no cache marker is sent, since it could never be a hit and
+Anthropic charges extra for cache writes. The cache reads and writes reported in each response's
+usage (including Gemini's cached_content_token_count) are added up in PromptCacheStats.
+"""
+import os
+from dataclasses import dataclass
+
+from prompt_chunks import estimate_tokens
+
+PROMPT_CACHE = os.getenv('PROMPT_CACHE', 'true').lower() in ('1', 'true', 'yes')
+# Smallest prefix (system prompt + static block, estimated tokens) the providers will cache
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv('PROMPT_CACHE_MIN_TOKENS', '1024'))
+
+
+@dataclass(frozen=True, slots=True)
+class Prompt:
+    static: str
+    data: str = ""
+
+    @property
+    def text(self):
+        return self.static + self.data
+
+    def __str__(self):
+        return self.text
+
+
+def prompt_text(prompt):
+    return prompt.text if isinstance(prompt, Prompt) else prompt
+
+
+def cacheable(prompt, system_prompt=""):
+    """True when `prompt` has a static prefix worth marking for the provider's prompt cache."""
+    return (
+        PROMPT_CACHE and isinstance(prompt, Prompt) and bool(prompt.data)
+        and estimate_tokens(system_prompt + prompt.static) >= PROMPT_CACHE_MIN_TOKENS
+    )
+
+
+def pydantic_ai_user_prompt(prompt, system_prompt=""):
+    """The user prompt for Agent.run: [static, CachePoint(), data] when caching, else plain text."""
+    if not isinstance(prompt, Prompt):
+        return prompt
+    if not cacheable(prompt, system_prompt):
+        return prompt.text
+    try:
+        from pydantic_ai.messages import CachePoint
+    except ImportError:
+        return prompt.text
+    return [prompt.static, CachePoint(), prompt.data]
+
+
+def litellm_messages(prompt, system_prompt=""):
+    if not cacheable(prompt, system_prompt):
+        return [{"role": "user", "content": prompt_text(prompt)}]
+    return [{"role": "user", "content": [
+        {"type": "text", "text": prompt.static, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": prompt.data},
+    ]}]
+
+
+def _field(usage, *names):
+    for name in names:
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        if value:
+            return value
+    return 0
+
+
+def usage_counts(usage):
+    """(input tokens, cache read tokens, cache write tokens) from a pydantic-ai or LiteLLM usage object."""
+    if usage is None:
+        return 0, 0, 0
+    input_tokens = _field(usage, "input_tokens", "request_tokens", "prompt_tokens")
+    # Older pydantic-ai reports provider-specific counts in Usage.details
+    details = _field(usage, "details") or {}
+    read = _field(usage, "cache_read_tokens", "cache_read_input_tokens") or \
+        _field(details, "cache_read_input_tokens", "cached_content_token_count")
+    if not read:
+        # OpenAI-style usage, which LiteLLM also fills in for Gemini
+        read = _field(_field(usage, "prompt_tokens_details") or {}, "cached_tokens")
+    write = _field(usage, "cache_write_tokens", "cache_creation_input_tokens") or \
+        _field(details, "cache_creation_input_tokens")
+    return input_tokens, read, write
+
+
+class PromptCacheStats:
+    """Running totals of provider prompt-cache use, for logging after each LLM answer."""
+
+    def __init__(self):
+        self.requests = 0
+        self.hits = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    def record(self, usage):
+        input_tokens, read, write = usage_counts(usage)
+        self.requests += 1
+        self.hits += 1 if read else 0
+        self.input_tokens += input_tokens
+        self.cache_read_tokens += read
+        self.cache_write_tokens += write
+
+    def snapshot(self):
+        return {
+            "cache_requests": self.requests,
+            "cache_hits": self.hits,
+            "cache_hit_rate": round(self.hits / self.requests, 3) if self.requests else 0.0,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "cached_input_share": round(min(1.0, self.cache_read_tokens / self.input_tokens), 3)
+            if self.input_tokens else 0.0,
+        }
+
+    def describe(self):
+        s = self.snapshot()
+        return (
+            f"prompt cache {s['cache_hits']}/{s['cache_requests']} hits, "
+            f"{s['cached_input_share']:.0%} of input tokens cached"
+        )
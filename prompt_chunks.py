@@ -0,0 +1,59 @@
+"""Split Course records into prompt-sized chunks without cutting a course in half.
+
+Token counts are estimated at ~4 characters per token (close enough for Gemini and Claude on this
+kind of text, and needs no tokenizer download). A course that alone exceeds the budget is split
+between assignment rows; each piece repeats the course name and class grade.
+"""
+import math
+import os
+from dataclasses import replace
+
+from prompt_encoding import course_prompt_lines
+
+# Data tokens per prompt; the default is roughly what the old 10000-character cut allowed through
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '2500'))
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _course_tokens(course):
+    # +1 per line for the newline joining it to the next
+    return sum(estimate_tokens(line) + 1 for line in course_prompt_lines(course))
+
+
+def _split_course(course, budget):
+    pieces, rows, used = [], [], 0
+    header = _course_tokens(replace(course, assignments=(), raw=()))
+    for a in course.assignments:
+        cost = _course_tokens(replace(course, assignments=(a,), raw=())) - header
+        if rows and header + used + cost > budget:
+            pieces.append(replace(course, assignments=tuple(rows), raw=()))
+            rows, used = [], 0
+        rows.append(a)
+        used += cost
+    if rows or not pieces:
+        pieces.append(replace(course, assignments=tuple(rows), raw=()))
+    if course.raw:
+        pieces.append(replace(course, assignments=(), raw=course.raw, class_grade_text=""))
+    return pieces
+
+
+def chunk_courses(courses, budget=PROMPT_TOKEN_BUDGET):
+    """[[Course]] with each chunk's prompt lines (PROMPT_ENCODING) within `budget` tokens (a single oversized row excepted)."""
+    chunks, current, used = [], [], 0
+    for course in courses:
+        cost = _course_tokens(course)
+        pieces = [course] if cost <= budget else _split_course(course, budget)
+        for piece in pieces:
+            cost = _course_tokens(piece)
+            if current and used + cost > budget:
+                chunks.append(current)
+                current, used = [], 0
+            current.append(piece)
+            used += cost
+    if current:
+        chunks.append(current)
+    return chunks
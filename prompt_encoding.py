@@ -0,0 +1,98 @@
+"""Compact prompt encoding of Course records: one header per course, then a CSV table of its rows.
+
+The "lines" encoding (records.render_lines) repeats "Course: <name> | Class Grade: <pct> |" and every
+field label on each assignment row; "compact" states them once:
+
+    # 2212 - 36 Algebra II | Class Grade: 70.13% | Cycle: 1
+    2.2 HW,09/10/2025,Daily Assignments,,
+    Unit 1 Test,09/02/2025,Tests,71.00,71.00%
+
+Compare both encodings of a saved file (characters and tokens; tokens are counted with tiktoken
+when it is installed, otherwise estimated at ~4 characters per token):
+
+    python prompt_encoding.py /tmp/assignments.txt
+"""
+import csv
+import io
+import os
+import sys
+
+from records import course_lines
+
+PROMPT_ENCODING = os.getenv('PROMPT_ENCODING', 'compact').strip().lower()
+
+COMPACT_LEGEND = (
+    "Each course starts with a line '# <course> | Class Grade: <grade>' (plus '| Cycle: <n>' when "
+    "several grading cycles are included), followed by one CSV row per assignment with the columns "
+    "Assignment,Due,Category,Score,Percent. Empty cells were blank in the gradebook."
+)
+
+
+def compact_course_lines(course):
+    if not course.name:
+        return list(course.raw)
+    header = f"# {course.name}"
+    if course.class_grade_text:
+        header += f" | Class Grade: {course.class_grade_text}"
+    if course.cycle:
+        header += f" | Cycle: {course.cycle}"
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for a in course.assignments:
+        writer.writerow((a.title, a.due_text, a.category, a.score_text, a.percent_text))
+    return [header, *buf.getvalue().splitlines(), *course.raw]
+
+
+def course_prompt_lines(course, encoding=None):
+    """The prompt lines of one course in PROMPT_ENCODING ("compact" or "lines")."""
+    if (encoding or PROMPT_ENCODING) == "lines":
+        return course_lines(course)
+    return compact_course_lines(course)
+
+
+def encode_courses(courses, encoding=None):
+    return "\n".join(line for c in courses for line in course_prompt_lines(c, encoding))
+
+
+def data_legend(encoding=None):
+    """How to read the data block, for the prompt; empty for the self-describing "lines" encoding."""
+    return "" if (encoding or PROMPT_ENCODING) == "lines" else COMPACT_LEGEND
+
+
+def count_tokens(text):
+    """(tokens, exact): tiktoken's cl100k count when available, else the ~4 chars/token estimate."""
+    try:
+        import tiktoken
+    except ImportError:
+        from prompt_chunks import estimate_tokens
+
+        return estimate_tokens(text), False
+    return len(tiktoken.get_encoding("cl100k_base").encode(text)), True
+
+
+def measure(courses):
+    """{encoding: (characters, tokens)} plus whether the token counts are exact."""
+    out, exact = {}, True
+    for encoding in ("lines", "compact"):
+        text = encode_courses(courses, encoding)
+        tokens, exact = count_tokens(text)
+        out[encoding] = (len(text), tokens)
+    return out, exact
+
+
+if __name__ == "__main__":
+    from assignments_io import load_assignments
+
+    for saved in sys.argv[1:]:
+        sizes, exact = measure(load_assignments(saved))
+        (lines_chars, lines_tokens), (compact_chars, compact_tokens) = sizes["lines"], sizes["compact"]
+        label = "tokens" if exact else "tokens (est.)"
+        print(saved)
+        print(f"  {'encoding':<10}{'chars':>10}{label:>16}")
+        print(f"  {'lines':<10}{lines_chars:>10}{lines_tokens:>16}")
+        print(f"  {'compact':<10}{compact_chars:>10}{compact_tokens:>16}")
+        if lines_chars and lines_tokens:
+            print(
+                f"  saved {1 - compact_chars / lines_chars:.0%} of characters, "
+                f"{1 - compact_tokens / lines_tokens:.0%} of {label}"
+            )
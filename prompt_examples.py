@@ -0,0 +1,113 @@
+"""Worked example for the row-extraction prompts: a fixed student and the exact answer for it.
+
+The example sits in the static part of every analysis prompt, between the instructions and the
+real data. It shows the model the answer format on data in the same encoding (PROMPT_ENCODING),
+and it makes the static prefix long enough to be cached by the provider: prompt caching only
+applies to prefixes of PROMPT_CACHE_MIN_TOKENS and more (prompt_cache.py). The answer is computed
+with local_report.build_report, so it always follows the same rules as the locally built report.
+
+    python prompt_examples.py              # print the example data and answer
+    python prompt_examples.py structured   # the answer as GradeAnalysis JSON
+"""
+import sys
+
+from analysis_schema import CourseAnalysis, GradeAnalysis, LowAssignment, MissingAssignment
+from local_report import build_report
+from prompt_encoding import encode_courses
+from records import Assignment, Course
+
+EXAMPLE_COURSES = (
+    Course("1210 - 12 English I", "84.50%", assignments=(
+        Assignment("Independent Reading Log", "09/12/2025", "Daily", "M", ""),
+        Assignment("Narrative Essay Draft", "09/10/2025", "Major", "88.00", "88.00%"),
+        Assignment("Vocabulary Quiz 2", "09/05/2025", "Minor", "72.00", "72.00%"),
+        Assignment("Vocabulary Quiz 1", "08/29/2025", "Minor", "95.00", "95.00%"),
+        Assignment("Summer Reading Response", "08/22/2025", "Daily", "100.00", "100.00%"),
+    )),
+    Course("2201 - 4 Geometry", "68.40%", assignments=(
+        Assignment("2.4 Practice", "09/15/2025", "Daily", "", ""),
+        Assignment("Unit 1 Test", "09/09/2025", "Tests", "61.00", "61.00%"),
+        Assignment("1.6 Practice", "09/04/2025", "Daily", "0.00", "0.00%"),
+        Assignment("1.5 Practice", "09/02/2025", "Daily", "M", ""),
+        Assignment("Unit 1 Quiz", "08/27/2025", "Quizzes", "78.50", "78.50%"),
+        Assignment("1.2 Practice", "08/21/2025", "Daily", "100.00", "100.00%"),
+    )),
+    Course("3101 - 7 Biology", "91.25%", assignments=(
+        Assignment("Cell Organelle Lab", "09/11/2025", "Labs", "94.00", "94.00%"),
+        Assignment("Microscope Quiz", "09/03/2025", "Quizzes", "86.00", "86.00%"),
+        Assignment("Lab Safety Contract", "08/20/2025", "Daily", "100.00", "100.00%"),
+    )),
+    Course("4101 - 3 World Geography", "79.90%", cycle="1", assignments=(
+        Assignment("Map Skills Test", "09/17/2025", "Tests", "74.00", "74.00%"),
+        Assignment("Landforms Project", "09/08/2025", "Projects", "85.00", "85.00%"),
+    )),
+    Course("4101 - 3 World Geography", "88.00%", cycle="2", assignments=(
+        Assignment("Climate Zones Quiz", "10/21/2025", "Quizzes", "88.00", "88.00%"),
+        Assignment("Population Pyramid Worksheet", "10/28/2025", "Daily", "M", ""),
+    )),
+    Course("5512 - 9 Spanish I", "95.00%", assignments=(
+        Assignment("Greetings Skit", "09/16/2025", "Projects", "97.00", "97.00%"),
+        Assignment("Numbers Quiz", "09/05/2025", "Quizzes", "93.00", "93.00%"),
+    )),
+    Course("8010 - 2 Art I", "100.00%", assignments=(
+        Assignment("Value Scale Drawing", "09/12/2025", "Studio", "100.00", "100.00%"),
+        Assignment("Sketchbook Check", "09/04/2025", "Studio", "", ""),
+    )),
+    Course("3510 - 6 Principles of Computer Science", "81.33%", assignments=(
+        # Score only, no Percent: the score is the grade
+        Assignment("Loops Lab", "09/18/2025", "Labs", "65", ""),
+        Assignment("Variables Quiz", "09/10/2025", "Quizzes", "79", ""),
+        Assignment("Pseudocode Practice", "09/03/2025", "Daily", "100", ""),
+        Assignment("Typing Assessment", "08/26/2025", "Daily", "M - Missing", ""),
+    )),
+    Course("6050 - 11 Health", "", assignments=(
+        # No class grade yet and nothing graded: no CLASS line, nothing missing
+        Assignment("Wellness Goals", "09/19/2025", "Daily", "", ""),
+        Assignment("Nutrition Label Activity", "09/12/2025", "Daily", "", ""),
+    )),
+    Course("7020 - 5 Athletics", "98.50%", assignments=(
+        Assignment("Participation Week 4", "09/19/2025", "Daily", "100.00", "100.00%"),
+        Assignment("Participation Week 3", "09/12/2025", "Daily", "97.00", "97.00%"),
+        Assignment("Participation Week 2", "09/05/2025", "Daily", "98.00", "98.00%"),
+        Assignment("Participation Week 1", "08/29/2025", "Daily", "99.00", "99.00%"),
+    )),
+)
+
+EXAMPLE_SUMMARY = (
+    "Geometry is at 68.40% with a low Unit 1 Test and two missing practice assignments; 1.5 Practice "
+    "and 1.6 Practice should be turned in first. English I is missing the Independent Reading Log, "
+    "and World Geography needs the Population Pyramid Worksheet for cycle 2. Principles of Computer "
+    "Science is missing the Typing Assessment and has a 65 on the Loops Lab."
+)
+
+
+def example_data():
+    return encode_courses(EXAMPLE_COURSES)
+
+
+def example_answer_lines():
+    """The example's answer in the pipe-separated row format of the text prompt."""
+    report = build_report(EXAMPLE_COURSES)
+    lines = [f"MISSING | {r.course} | {r.assignment} | {r.due_text} | {r.score_text}" for r in report.missing]
+    lines += [f"BELOW | {r.course} | {r.assignment} | {r.due_text} | {r.grade:.2f}%" for r in report.below]
+    lines += [f"CLASS | {r.course} | {r.score_text}" for r in (*report.low_classes, *report.other_classes)]
+    return "\n".join(lines)
+
+
+def example_answer_structured():
+    """The example's answer as the GradeAnalysis JSON the structured prompt asks for."""
+    report = build_report(EXAMPLE_COURSES)
+    courses = {}
+    for r in (*report.low_classes, *report.other_classes):
+        courses[r.course] = CourseAnalysis(course=r.course, grade=r.score_text)
+    for r in report.missing:
+        courses.setdefault(r.course, CourseAnalysis(course=r.course)).missing.append(MissingAssignment(assignment=r.assignment, due_date=r.due_text, score=r.score_text))
+    for r in report.below:
+        courses.setdefault(r.course, CourseAnalysis(course=r.course)).below.append(LowAssignment(assignment=r.assignment, due_date=r.due_text, percent=f"{r.grade:.2f}%"))
+    return GradeAnalysis(courses=list(courses.values()), summary=EXAMPLE_SUMMARY).model_dump_json(exclude_defaults=True)
+
+
+if __name__ == "__main__":
+    print(example_data())
+    print()
+    print(example_answer_structured() if sys.argv[1:] == ["structured"] else example_answer_lines())
@@ -1,6 +1,5 @@
 import click as click_cli
 import sys
-import smtplib
 import time
 import schedule as scheduler
 import time as schedule_time  # Rename to avoid conflict with existing time import
@@ -11,6 +10,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
@@ -19,8 +19,31 @@ import time
 from dotenv import load_dotenv
 import os
 import re
-from pydantic_ai import Agent
+import json
+import asyncio
+import multiprocessing
 import logfire
+from hac_parser import parse_class_grade, parse_courses_file
+from records import Assignment, Course, count_lines, parse_date, parse_lines, parse_number
+from assignments_io import load_assignments, write_courses
+from hac_http import browser_cycle_courses, scrape_assignments_http
+from session_cache import SessionCache, session_is_valid
+from course_cache import CourseCache, parse_html_incremental
+from history_store import record_snapshot
+from snapshot_diff import changes_since_last, render_changes
+from local_report import ReportRow, assemble_report, build_report, render_report_html, summary_facts
+from llm_cache import LLMCache, cached_completion_async
+from prompt_chunks import PROMPT_TOKEN_BUDGET, chunk_courses, estimate_tokens
+from event_loop import run_async as _run_async
+from llm_router import LLM_PROVIDERS, LLMRouter, LLMUnavailable, pydantic_ai_provider
+from prompt_encoding import data_legend, encode_courses
+from prompt_examples import example_answer_lines, example_answer_structured, example_data
+from analysis_schema import GradeAnalysis, report_rows
+from prompt_cache import Prompt, PromptCacheStats, prompt_text
+from outbox import Outbox
+from selector_profile import get_selector_profile, selector_key
+import resource_blocking
+from resource_blocking import apply_resource_blocking, chrome_flags as blocking_chrome_flags, page_load_stats
 
 
 # Load environment variables from .env file
@@ -35,6 +58,43 @@ SAFE_LOGS = os.getenv('SAFE_LOGS', 'true').lower() in ('1', 'true', 'yes')
 # Enable HTML/screenshot snapshots for scraping debug
 DEBUG_SNAPSHOTS = os.getenv('DEBUG_SNAPSHOTS', 'false').lower() in ('1', 'true', 'yes')
 
+# Assignment extraction strategy: "bulk" reads the whole iframe in one execute_script round-trip,
+# "html" parses one page_source snapshot offline with BeautifulSoup,
+# "structured" walks the DOM element-by-element (one WebDriver command per lookup)
+EXTRACT_MODE = os.getenv('EXTRACT_MODE', 'bulk').strip().lower()
+
+# Scraping backend: "chrome" (headless browser) or "http" (requests.Session, falls back to chrome on failure)
+SCRAPE_BACKEND = os.getenv('SCRAPE_BACKEND', 'chrome').strip().lower()
+
+# Keep one browser alive between runs (the --schedule loop enables this too); recycled after
+# BROWSER_MAX_RUNS runs or when its process tree passes BROWSER_MAX_RSS_MB
+WARM_BROWSER = os.getenv('WARM_BROWSER', 'false').lower() in ('1', 'true', 'yes')
+
+# Total latency budget for one browser scrape; every wait draws from it so a miss can't stall the run
+SCRAPE_BUDGET_SEC = float(os.getenv('SCRAPE_BUDGET_SEC', '90'))
+
+# Fetch every grading cycle (report period) after one login instead of only the default one;
+# the cycle postbacks run one after another on the logged-in session
+ALL_CYCLES = os.getenv('ALL_CYCLES', 'false').lower() in ('1', 'true', 'yes')
+
+# Multi-account mode: JSON list of student accounts (see load_accounts) and how many run at once
+ACCOUNTS_FILE = os.getenv('ACCOUNTS_FILE', '')
+SCRAPE_WORKERS = int(os.getenv('SCRAPE_WORKERS', '3'))
+
+# "full" sends every assignment to the LLM; "changes" only sends what moved since the previous
+# scrape in HISTORY_DB (falls back to full when there is nothing to diff against); "local" builds
+# the report without an LLM (local_report.py)
+ANALYSIS_MODE = os.getenv('ANALYSIS_MODE', 'full').strip().lower()
+# Data too large for one prompt (PROMPT_TOKEN_BUDGET, prompt_chunks.py) is split by course and the
+# chunks are analyzed concurrently, at most LLM_CONCURRENCY at a time
+LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', '4'))
+# In local mode, ask the LLM for a short narrative above the locally computed tables
+LOCAL_NARRATIVE = os.getenv('LOCAL_NARRATIVE', 'false').lower() in ('1', 'true', 'yes')
+# How the model returns the report rows, which are always rendered locally (local_report.py):
+# "text" as pipe-separated lines, "structured" as a typed model (analysis_schema.py).
+# The old value "html" means "text"
+LLM_OUTPUT = os.getenv('LLM_OUTPUT', 'text').strip().lower()
+
 # Allow disabling Logfire explicitly to isolate scraping issues
 LOGFIRE_DISABLE = os.getenv('LOGFIRE_DISABLE', 'false').lower() in ('1', 'true', 'yes')
 
@@ -84,7 +144,7 @@ def _debug_dump(driver, name: str):
         return
     try:
         ts = int(time.time())
-        base = f"/tmp/hac_{ts}_{name}"
+        base = f"/tmp/hac_{ts}_{os.getpid()}_{name}"
         # Attempt to increase viewport before screenshot
         try:
             driver.set_window_size(1280, 1800)
@@ -105,60 +165,416 @@ def _debug_dump(driver, name: str):
     except Exception as e:
         print(f"[DEBUG] debug_dump error: {e}")
 
-def save_assignments_to_file(content):
-    path = ASSIGNMENTS_PATH
+def save_assignments_to_file(content, path=None):
+    """Stream Course records (a list or generator) to the file, replacing it atomically (see assignments_io.py)."""
+    path = path or ASSIGNMENTS_PATH
     if LOGFIRE_ENABLED:
         with logfire.span("save_assignments_to_file"):
             logfire.info("Saving assignments to file", path=path)
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write(f"Timestamp: {timestamp}\n\n")
-                for line in content:
-                    f.write(line + "\n")
-            try:
-                os.chmod(path, 0o600)
-            except Exception:
-                pass
-            logfire.info("Assignments saved to file", path=path)
+            count = write_courses(path, content)
+            logfire.info("Assignments saved to file", path=path, courses=count)
     else:
         print(f"Saving assignments to file at {path}")
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(f"Timestamp: {timestamp}\n\n")
-            for line in content:
-                f.write(line + "\n")
+        write_courses(path, content)
+        print(f"Assignments saved to file at {path}")
+
+def store_assignments(courses, path=None, student=None):
+    """Save the latest scrape to ASSIGNMENTS_PATH and append it to the history store (HISTORY_DB)."""
+    save_assignments_to_file(courses, path)
+    if student:
+        try:
+            record_snapshot(student, courses)
+        except Exception as e:
+            if LOGFIRE_ENABLED:
+                logfire.warning(f"Could not record history snapshot: {str(e)}")
+            else:
+                print(f"Warning: could not record history snapshot: {str(e)}")
+
+class ScrapeBudgetExceeded(Exception):
+    """Raised when a scrape runs past SCRAPE_BUDGET_SEC."""
+
+
+class ScrapeDeadline:
+    """Per-run latency budget: each wait is capped by what is left, and stage timings are reported."""
+
+    def __init__(self, budget_sec=None):
+        self.budget = SCRAPE_BUDGET_SEC if budget_sec is None else budget_sec
+        self.start = time.monotonic()
+        self._last = self.start
+        self.stages = []
+
+    def remaining(self):
+        return self.budget - (time.monotonic() - self.start)
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise ScrapeBudgetExceeded(f"Scrape exceeded its {self.budget:.0f}s budget")
+
+    def timeout(self, cap):
+        """Timeout for one wait: its own cap, but never past the run's deadline."""
+        return max(0.1, min(cap, self.remaining()))
+
+    def wait(self, driver, cap):
+        return WebDriverWait(driver, self.timeout(cap), poll_frequency=0.1)
+
+    def mark(self, stage):
+        now = time.monotonic()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def report(self):
+        total = time.monotonic() - self.start
+        detail = ", ".join(f"{name}={secs:.2f}s" for name, secs in self.stages)
+        if LOGFIRE_ENABLED:
+            logfire.info(
+                "Scrape timing",
+                total_sec=round(total, 2),
+                budget_sec=self.budget,
+                stages={name: round(secs, 2) for name, secs in self.stages},
+            )
+        else:
+            print(f"Scrape took {total:.2f}s of {self.budget:.0f}s budget ({detail})")
+        return total
+
+
+# Resolves once the document has seen no DOM mutations and no new network activity (resource
+# timing entries, in-flight jQuery ajax) for `quietMs`, or when `maxMs` elapses.
+_QUIESCENCE_JS = r"""
+const done = arguments[arguments.length - 1];
+const quietMs = arguments[0], maxMs = arguments[1];
+const started = Date.now();
+let last = Date.now();
+let resources = performance.getEntriesByType('resource').length;
+const observer = new MutationObserver(() => { last = Date.now(); });
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+const timer = setInterval(() => {
+    const count = performance.getEntriesByType('resource').length;
+    const ajax = (window.jQuery && window.jQuery.active) || 0;
+    if (count !== resources || ajax > 0) { resources = count; last = Date.now(); }
+    const idle = document.readyState === 'complete' && Date.now() - last >= quietMs;
+    if (idle || Date.now() - started >= maxMs) {
+        clearInterval(timer);
+        observer.disconnect();
+        done(idle);
+    }
+}, 50);
+"""
+
+
+def _wait_for_dom_ready(driver, deadline, cap=10):
+    """Wait until the current document (or frame) reports readyState 'complete'."""
+    try:
+        deadline.wait(driver, cap).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        return True
+    except Exception:
+        return False
+
+
+def _wait_for_quiet_dom(driver, deadline, quiet_ms=300, cap=5):
+    """Wait for DOM and network quiescence instead of sleeping a fixed interval."""
+    max_ms = int(deadline.timeout(cap) * 1000)
+    try:
+        driver.set_script_timeout(max_ms / 1000.0 + 2)
+        return bool(driver.execute_async_script(_QUIESCENCE_JS, quiet_ms, max_ms))
+    except Exception:
+        return False
+
+
+def _first_text(finders, pct=False):
+    """Text of the first element the finders locate with non-empty text (adds % when asked)."""
+    for find in finders:
         try:
-            os.chmod(path, 0o600)
+            txt = (find().text or "").strip()
         except Exception:
-            pass
-        print(f"Assignments saved to file at {path}")
+            continue
+        if txt:
+            return txt if not pct or "%" in txt else f"{txt}%"
+    return ""
+
+
+def _id_text(driver, ids, pct=False):
+    # A matching element ends the lookup even when its text is empty (later ids are alternates)
+    for element_id in ids:
+        try:
+            txt = (driver.find_element(By.ID, element_id).text or "").strip()
+        except Exception:
+            continue
+        return txt if not pct or not txt or "%" in txt else f"{txt}%"
+    return ""
+
+
+# Class-grade lookups in their built-in order, keyed so the winning strategy can be learned per host
+# (see selector_profile.py). Each returns the raw text or "" on a miss; parse_class_grade normalizes it.
+_CLASS_GRADE_STRATEGIES = [
+    # Direct lookup by index-based IDs (misspelled HAC variant first, then corrected)
+    ("hdr_id", lambda d, sec, idx: _id_text(d, [
+        f"plnMain_rptAssigmnetsByCourse_lblHdrAverage_{idx}",
+        f"plnMain_rptAssignmentsByCourse_lblHdrAverage_{idx}",
+    ])),
+    ("overall_id", lambda d, sec, idx: _id_text(d, [
+        f"plnMain_rptAssigmnetsByCourse_lblOverallAverage_{idx}",
+        f"plnMain_rptAssignmentsByCourse_lblOverallAverage_{idx}",
+    ], pct=True)),
+    # Specific id prefixes within this section
+    ("hdr_id_prefix", lambda d, sec, idx: _first_text([
+        lambda: sec.find_element(By.XPATH, ".//span[starts-with(@id,'plnMain_rptAssigmnetsByCourse_lblHdrAverage_')]"),
+        lambda: sec.find_element(By.XPATH, ".//span[starts-with(@id,'plnMain_rptAssignmentsByCourse_lblHdrAverage_')]"),
+    ])),
+    # Broader contains() fallback for header average ids
+    ("hdr_id_contains", lambda d, sec, idx: _first_text([
+        lambda: sec.find_element(By.XPATH, ".//span[contains(@id,'lblHdrAverage')]"),
+    ])),
+    # Right-aligned header span within this course header
+    ("header_right", lambda d, sec, idx: _first_text([
+        lambda: sec.find_element(
+            By.XPATH,
+            ".//div[contains(@class,'sg-header')]//span[contains(@class,'sg-header-heading') and contains(@class,'sg-right')]"
+        ),
+    ])),
+    # Overall average from summary block (again support both variants)
+    ("overall_id_prefix", lambda d, sec, idx: _first_text([
+        lambda: sec.find_element(By.XPATH, ".//span[starts-with(@id,'plnMain_rptAssigmnetsByCourse_lblOverallAverage_')]"),
+        lambda: sec.find_element(By.XPATH, ".//span[starts-with(@id,'plnMain_rptAssignmentsByCourse_lblOverallAverage_')]"),
+        lambda: sec.find_element(By.XPATH, ".//span[contains(@id,'lblOverallAverage')]"),
+    ], pct=True)),
+    # Any span under header containing visible 'Cycle Average'
+    ("cycle_average_span", lambda d, sec, idx: _first_text([
+        lambda: sec.find_element(By.XPATH, ".//div[contains(@class,'sg-header')]//span[contains(.,'Cycle') and contains(.,'Average')]"),
+    ])),
+    # Last resort: read the entire header text of this section
+    ("header_text", lambda d, sec, idx: _first_text([
+        lambda: sec.find_element(By.CSS_SELECTOR, ".sg-header"),
+    ])),
+]
+_CLASS_GRADE_LOOKUPS = dict(_CLASS_GRADE_STRATEGIES)
+
+
+def _class_grade_text(driver, sec, idx, order):
+    """Walk the class-grade strategies in `order`; returns (raw text, strategy key) of the first hit."""
+    for key in order:
+        cg_text = _CLASS_GRADE_LOOKUPS[key](driver, sec, idx)
+        if cg_text:
+            return cg_text, key
+    return "", None
+
 
-def extract_assignments():
+# Mirrors the structured "Method 0" walk (same selectors, same class-grade strategies) but runs
+# entirely inside the page, so the whole course/row structure comes back in a single round-trip.
+# arguments[0] is the class-grade strategy order; `lookups` counts the find/text commands the
+# element-by-element walk would have issued, and `gradeStrategy` names the strategy that matched.
+# arguments[1] is CourseCache.known(): rows of courses whose Last Updated stamp and row fingerprint
+# (hac_parser.rows_fingerprint, computed here from the raw cell text) are unchanged in the same grading
+# cycle are not read (rows: null) and are merged back from the cache.
+_BULK_EXTRACT_JS = r"""
+const order = arguments[0];
+const known = arguments[1] || {};
+const text = (el) => el ? (el.innerText || el.textContent || '').trim() : '';
+const runs = document.querySelector('select[id$="ddlReportCardRuns"]');
+const cycle = runs && runs.selectedIndex >= 0 ? runs.options[runs.selectedIndex].value : null;
+const stamps = known.cycle === cycle ? (known.stamps || {}) : {};
+const fingerprints = known.cycle === cycle ? (known.fingerprints || {}) : {};
+// Same value as hac_parser.rows_fingerprint: row count and FNV-1a over the cells without whitespace
+const rowsFingerprint = (rows) => {
+    let h = 0x811c9dc5;
+    for (const cells of rows) {
+        for (const ch of cells.map((t) => t.replace(/\s+/g, '')).join('\x1f') + '\x1e') {
+            h = Math.imul(h ^ ch.codePointAt(0), 0x01000193) >>> 0;
+        }
+    }
+    return rows.length + ':' + h.toString(16).padStart(8, '0');
+};
+const byXPath = (ctx, xp) => document.evaluate(xp, ctx, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const out = [];
+document.querySelectorAll('div.AssignmentClass').forEach((sec, idx) => {
+    let lookups = 0;
+    const find = (fn) => { lookups += 1; const el = fn(); if (el) { lookups += 1; } return el; };
+    const withPct = (t) => t && !t.includes('%') ? t + '%' : t;
+    // First matching id wins even when its text is empty (later ids are alternates)
+    const idText = (ids, pct) => {
+        for (const id of ids) {
+            const el = find(() => document.getElementById(id));
+            if (el) { return pct ? withPct(text(el)) : text(el); }
+        }
+        return '';
+    };
+    const xpText = (xps, pct) => {
+        for (const xp of xps) {
+            const t = text(find(() => byXPath(sec, xp)));
+            if (t) { return pct ? withPct(t) : t; }
+        }
+        return '';
+    };
+    const strategies = {
+        hdr_id: () => idText(['plnMain_rptAssigmnetsByCourse_lblHdrAverage_' + idx, 'plnMain_rptAssignmentsByCourse_lblHdrAverage_' + idx], false),
+        overall_id: () => idText(['plnMain_rptAssigmnetsByCourse_lblOverallAverage_' + idx, 'plnMain_rptAssignmentsByCourse_lblOverallAverage_' + idx], true),
+        hdr_id_prefix: () => xpText([".//span[starts-with(@id,'plnMain_rptAssigmnetsByCourse_lblHdrAverage_')]", ".//span[starts-with(@id,'plnMain_rptAssignmentsByCourse_lblHdrAverage_')]"], false),
+        hdr_id_contains: () => xpText([".//span[contains(@id,'lblHdrAverage')]"], false),
+        header_right: () => xpText([".//div[contains(@class,'sg-header')]//span[contains(@class,'sg-header-heading') and contains(@class,'sg-right')]"], false),
+        overall_id_prefix: () => xpText([".//span[starts-with(@id,'plnMain_rptAssigmnetsByCourse_lblOverallAverage_')]", ".//span[starts-with(@id,'plnMain_rptAssignmentsByCourse_lblOverallAverage_')]", ".//span[contains(@id,'lblOverallAverage')]"], true),
+        cycle_average_span: () => xpText([".//div[contains(@class,'sg-header')]//span[contains(.,'Cycle') and contains(.,'Average')]"], false),
+        header_text: () => text(find(() => sec.querySelector('.sg-header'))),
+    };
+
+    const heading = sec.querySelector('.sg-header .sg-header-heading');
+    let cg = '', used = null;
+    for (const key of order) {
+        cg = strategies[key]();
+        if (cg) { used = key; break; }
+    }
+
+    const stampMatch = /Last\s+Updated:?\s*([^)]+)/i.exec(text(sec.querySelector('.sg-header .sg-header-sub-heading')));
+    const stamp = stampMatch ? stampMatch[1].trim() : '';
+    const cells = Array.from(sec.querySelectorAll('table.sg-asp-table tr.sg-asp-table-data-row'))
+        .map((row) => Array.from(row.querySelectorAll('td')));
+    const fingerprint = rowsFingerprint(cells.map((tds) => tds.map((td) => td.textContent || '')));
+    if (stamp && stamps[text(heading)] === stamp && fingerprints[text(heading)] === fingerprint) {
+        out.push({course: text(heading), stamp: stamp, fingerprint: fingerprint, gradeText: cg, gradeStrategy: used, lookups: lookups, rows: null});
+        return;
+    }
+
+    const rows = [];
+    cells.forEach((tds) => {
+        if (tds.length < 3) { rows.push(null); return; }
+        const anchor = tds[2].querySelector('a');
+        rows.push({
+            cells: tds.length,
+            due: text(tds[0]),
+            assignment: anchor ? text(anchor) : text(tds[2]),
+            category: tds.length > 3 ? text(tds[3]) : '',
+            score: tds.length > 4 ? text(tds[4]) : '',
+            percent: text(tds[tds.length - 1]),
+        });
+    });
+    out.push({course: text(heading), stamp: stamp, fingerprint: fingerprint, gradeText: cg, gradeStrategy: used, lookups: lookups, rows: rows});
+});
+return JSON.stringify({cycle: cycle, sections: out});
+"""
+
+def _bulk_extract_assignments(driver, profile=None, host="", course_cache=None, use_cached=True):
+    """Extract all courses and rows with one execute_script call; returns the same records as Method 0.
+
+    With a CourseCache, rows of courses whose Last Updated stamp and row fingerprint haven't changed are
+    taken from the cache.
+    """
+    profile = profile or get_selector_profile()
+    grade_order = profile.ordered(host, "class_grade", [key for key, _ in _CLASS_GRADE_STRATEGIES])
+    known = course_cache.known() if course_cache is not None and use_cached else {}
+    page = json.loads(driver.execute_script(_BULK_EXTRACT_JS, grade_order, known) or "{}")
+    sections = page.get("sections") or []
+    courses = []
+    grade_wins = {}
+    lines = 0
+    # Commands the element-by-element walk would have needed: section lookup, then per section the
+    # heading find+text, the class-grade ladder, the row lookup and per row the td lookup + cell reads
+    legacy_commands = 1
+    for sec in sections:
+        course = (sec.get("course") or "").strip()
+        class_grade = parse_class_grade(sec.get("gradeText") or "")
+        if class_grade and sec.get("gradeStrategy"):
+            grade_wins[sec["gradeStrategy"]] = grade_wins.get(sec["gradeStrategy"], 0) + 1
+        legacy_commands += 2 + int(sec.get("lookups") or 0) + 1
+        record = None
+        if sec.get("rows") is not None:
+            rows = []
+            for row in sec["rows"]:
+                legacy_commands += 1
+                if not row:
+                    continue
+                cells = int(row.get("cells") or 0)
+                legacy_commands += 1 + 2 + (1 if cells > 3 else 0) + (1 if cells > 4 else 0) + 1
+                rows.append(Assignment(
+                    title=row.get("assignment") or "",
+                    due_text=row.get("due") or "",
+                    category=row.get("category") or "",
+                    score_text=row.get("score") or "",
+                    percent_text=row.get("percent") or "",
+                ))
+            record = Course(name=course, class_grade_text=class_grade, updated=sec.get("stamp") or "", assignments=tuple(rows))
+            lines += count_lines([record])
+        courses.append({
+            "course": course, "stamp": sec.get("stamp") or "", "fingerprint": sec.get("fingerprint") or "",
+            "class_grade": class_grade, "record": record,
+        })
+    if grade_wins:
+        profile.record(host, "class_grade", max(grade_wins, key=grade_wins.get))
+    skipped = sum(1 for c in courses if c["record"] is None)
+    if course_cache is not None:
+        structured = course_cache.merge(page.get("cycle"), courses)
+        if structured is None:
+            print("Course cache could not restore every skipped course; extracting all rows")
+            return _bulk_extract_assignments(driver, profile, host, course_cache, use_cached=False)
+    else:
+        structured = [c["record"] for c in courses]
+    saved = max(legacy_commands - 1, 0)
+    if LOGFIRE_ENABLED:
+        logfire.info(
+            "Bulk extraction complete",
+            lines=lines,
+            webdriver_commands=1,
+            webdriver_commands_saved=saved,
+        )
+    print(f"Method bulk/AssignmentClass: Found {lines} in 1 WebDriver command (saved ~{saved} of ~{legacy_commands})")
+    if skipped:
+        if LOGFIRE_ENABLED:
+            logfire.info("Unchanged courses restored from cache", courses=skipped, of=len(courses))
+        else:
+            print(f"{skipped} of {len(courses)} courses unchanged since last run; rows restored from cache")
+    return structured
+
+def extract_assignments(deadline=None, course_cache=None):
     if LOGFIRE_ENABLED:
         with logfire.span("extract_assignments"):
             logfire.info("Extracting assignments from website")
-            return _do_extract_assignments()
+            return _do_extract_assignments(deadline, course_cache)
     else:
         print("Extracting assignments from website")
-        return _do_extract_assignments()
+        return _do_extract_assignments(deadline, course_cache)
 
-def _do_extract_assignments():
-    import time
+def _do_extract_assignments(deadline=None, course_cache=None):
+    from urllib.parse import urlsplit
     driver = get_driver()
+    deadline = deadline or ScrapeDeadline()
+    profile = get_selector_profile()
+    host = urlsplit(driver.current_url).netloc
     
-    # Wait for page to fully load
-    time.sleep(2)
-    wait = WebDriverWait(driver, 30)
+    # Wait for page to fully load (DOM and network quiet rather than a fixed sleep)
+    _wait_for_quiet_dom(driver, deadline)
+    wait = deadline.wait(driver, 30)
     
     # Try multiple selectors and extraction methods
     assignments = []
 
+    # Bulk mode: one execute_script round-trip for the whole course/row structure
+    if EXTRACT_MODE == "bulk":
+        try:
+            wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.AssignmentClass")))
+            structured = _bulk_extract_assignments(driver, profile, host, course_cache)
+            if count_lines(structured):
+                return structured
+        except Exception as e:
+            print(f"Bulk extraction failed, falling back to structured parse: {e}")
+
+    # HTML mode: one page_source snapshot, parsed in-process with BeautifulSoup
+    if EXTRACT_MODE == "html":
+        try:
+            wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.AssignmentClass")))
+            structured = parse_html_incremental(driver.page_source, course_cache)
+            if count_lines(structured):
+                print(f"Method html/AssignmentClass: Found {count_lines(structured)} from one page_source snapshot")
+                return structured
+        except Exception as e:
+            print(f"HTML snapshot parse failed, falling back to structured parse: {e}")
+
     # Method 0: Structured parse of HAC "AssignmentClass" blocks and rows
     try:
         # Wait for at least one AssignmentClass section to render
         wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.AssignmentClass")))
         sections = driver.find_elements(By.CSS_SELECTOR, "div.AssignmentClass")
         structured = []
+        grade_order = profile.ordered(host, "class_grade", [key for key, _ in _CLASS_GRADE_STRATEGIES])
+        grade_wins = {}
         for idx, sec in enumerate(sections):
             # Course header is inside .sg-header .sg-header-heading
             course = ""
@@ -170,130 +586,16 @@ def _do_extract_assignments():
             # Extract Cycle Average (class grade) displayed on the right side of the course header
             class_grade = ""
             try:
-                cg_text = ""
-
-                # 0) Direct lookup by index-based IDs (most reliable across variants)
-                try:
-                    # misspelled variant from HAC
-                    header_id = f"plnMain_rptAssigmnetsByCourse_lblHdrAverage_{idx}"
-                    cg_text = (driver.find_element(By.ID, header_id).text or "").strip()
-                except Exception:
-                    try:
-                        # corrected variant
-                        header_id = f"plnMain_rptAssignmentsByCourse_lblHdrAverage_{idx}"
-                        cg_text = (driver.find_element(By.ID, header_id).text or "").strip()
-                    except Exception:
-                        cg_text = ""
-
-                # 0b) Overall average by index-based IDs
-                if not cg_text:
-                    try:
-                        overall_id = f"plnMain_rptAssigmnetsByCourse_lblOverallAverage_{idx}"
-                        txt = (driver.find_element(By.ID, overall_id).text or "").strip()
-                        if txt:
-                            cg_text = txt if "%" in txt else f"{txt}%"
-                    except Exception:
-                        try:
-                            overall_id = f"plnMain_rptAssignmentsByCourse_lblOverallAverage_{idx}"
-                            txt = (driver.find_element(By.ID, overall_id).text or "").strip()
-                            if txt:
-                                cg_text = txt if "%" in txt else f"{txt}%"
-                        except Exception:
-                            pass
-
-                # 1) Specific id prefixes (both misspelled and correct variants) within this section
-                if not cg_text:
-                    id_xpaths = [
-                        ".//span[starts-with(@id,'plnMain_rptAssigmnetsByCourse_lblHdrAverage_')]",
-                        ".//span[starts-with(@id,'plnMain_rptAssignmentsByCourse_lblHdrAverage_')]",
-                    ]
-                    for xp in id_xpaths:
-                        try:
-                            avg_el = sec.find_element(By.XPATH, xp)
-                            cg_text = (avg_el.text or "").strip()
-                            if cg_text:
-                                break
-                        except Exception:
-                            continue
-
-                # 1b) Broader contains() fallback for header average ids
-                if not cg_text:
-                    contains_xpaths = [
-                        ".//span[contains(@id,'lblHdrAverage')]",
-                    ]
-                    for xp in contains_xpaths:
-                        try:
-                            avg_el = sec.find_element(By.XPATH, xp)
-                            cg_text = (avg_el.text or "").strip()
-                            if cg_text:
-                                break
-                        except Exception:
-                            continue
-
-                # 2) Right-aligned header span within this course header
-                if not cg_text:
-                    try:
-                        avg_el = sec.find_element(
-                            By.XPATH,
-                            ".//div[contains(@class,'sg-header')]//span[contains(@class,'sg-header-heading') and contains(@class,'sg-right')]"
-                        )
-                        cg_text = (avg_el.text or "").strip()
-                    except Exception:
-                        pass
-
-                # 3) Overall average from summary block (again support both variants)
-                if not cg_text:
-                    overall_xpaths = [
-                        ".//span[starts-with(@id,'plnMain_rptAssigmnetsByCourse_lblOverallAverage_')]",
-                        ".//span[starts-with(@id,'plnMain_rptAssignmentsByCourse_lblOverallAverage_')]",
-                        ".//span[contains(@id,'lblOverallAverage')]",
-                    ]
-                    for xp in overall_xpaths:
-                        try:
-                            overall_el = sec.find_element(By.XPATH, xp)
-                            txt = (overall_el.text or "").strip()
-                            if txt:
-                                cg_text = txt if "%" in txt else f"{txt}%"
-                                break
-                        except Exception:
-                            continue
-
-                # 3c) Fallback: any span under header containing visible 'Cycle Average'
-                if not cg_text:
-                    try:
-                        avg_el = sec.find_element(By.XPATH, ".//div[contains(@class,'sg-header')]//span[contains(.,'Cycle') and contains(.,'Average')]")
-                        cg_text = (avg_el.text or "").strip()
-                    except Exception:
-                        pass
-
-                # 4) Last resort: read the entire header text of this section
-                if not cg_text:
-                    try:
-                        header_el = sec.find_element(By.CSS_SELECTOR, ".sg-header")
-                        cg_text = (header_el.text or "").strip()
-                    except Exception:
-                        cg_text = ""
-
-                # Prefer explicit "Cycle/Class Average NN.NN" with optional %, else first explicit percentage, else pure number when text is short
-                m = re.search(r'(?:Cycle|Class)\s+Average\s*:?\s*([0-9]{1,3}(?:\.[0-9]{1,2})?)\s*%?', cg_text, re.I)
-                if not m:
-                    m = re.search(r'([0-9]{1,3}(?:\.[0-9]{1,2})?)\s*%', cg_text)
-                if not m:
-                    # Handle spans that contain only the numeric value (no percent symbol)
-                    m = re.search(r'^\s*([0-9]{1,3}(?:\.[0-9]{1,2})?)\s*%?\s*$', cg_text)
-                if m:
-                    class_grade = f"{m.group(1)}%"
+                cg_text, strategy = _class_grade_text(driver, sec, idx, grade_order)
+                class_grade = parse_class_grade(cg_text)
+                if class_grade:
+                    grade_wins[strategy] = grade_wins.get(strategy, 0) + 1
             except Exception:
                 pass
 
-            # Emit a header line for the course with its class grade so it's always captured
-            if course and class_grade:
-                structured.append(f"Course: {course} | Class Grade: {class_grade}")
-
-            # (dedup) Removed duplicate header emission
-
             # Rows are in tables with class sg-asp-table and row class sg-asp-table-data-row
             rows = sec.find_elements(By.CSS_SELECTOR, "table.sg-asp-table tr.sg-asp-table-data-row")
+            records = []
             for row in rows:
                 tds = row.find_elements(By.TAG_NAME, "td")
                 if not tds or len(tds) < 3:
@@ -309,20 +611,12 @@ def _do_extract_assignments():
                 category = (tds[3].text or "").strip() if len(tds) > 3 else ""
                 score = (tds[4].text or "").strip() if len(tds) > 4 else ""
                 percent = (tds[-1].text or "").strip() if tds else ""
-                # Build a compact line suitable for LLM prompt
-                parts = []
-                if course: parts.append(f"Course: {course}")
-                if class_grade: parts.append(f"Class Grade: {class_grade}")
-                if assignment: parts.append(f"Assignment: {assignment}")
-                if date_due: parts.append(f"Due: {date_due}")
-                if category: parts.append(f"Category: {category}")
-                if score: parts.append(f"Score: {score}")
-                if percent: parts.append(f"Percent: {percent}")
-                line = " | ".join(parts)
-                if line:
-                    structured.append(line)
-        if structured:
-            print(f"Method structured/AssignmentClass: Found {len(structured)}")
+                records.append(Assignment(assignment, date_due, category, score, percent))
+            structured.append(Course(name=course, class_grade_text=class_grade, assignments=tuple(records)))
+        if grade_wins:
+            profile.record(host, "class_grade", max(grade_wins, key=grade_wins.get))
+        if count_lines(structured):
+            print(f"Method structured/AssignmentClass: Found {count_lines(structured)}")
             return structured
     except Exception as e:
         print(f"Structured parse failed: {e}")
@@ -334,7 +628,7 @@ def _do_extract_assignments():
             assignments = [e.text for e in elements if e.text and e.text.strip()]
             if assignments:
                 print(f"Method wait/AssignmentClass: Found {len(assignments)}")
-                return assignments
+                return [Course.unstructured(assignments)]
     except Exception as e:
         print(f"Primary wait for AssignmentClass failed: {e}")
     
@@ -345,7 +639,7 @@ def _do_extract_assignments():
             assignments = [element.text for element in elements if element.text.strip()]
             print(f"Method 1: Found {len(assignments)} assignments with AssignmentClass")
             if assignments:
-                return assignments
+                return [Course.unstructured(assignments)]
     except Exception as e:
         print(f"Method 1 failed: {e}")
     
@@ -407,7 +701,7 @@ def _do_extract_assignments():
 
             if structured:
                 print(f"Homepage fallback: Found {len(structured)} items")
-                return structured
+                return [Course.unstructured(structured)]
         except Exception as e:
             print(f"Homepage fallback failed: {e}")
 
@@ -434,7 +728,8 @@ def _do_extract_assignments():
     else:
         print(f"Extracted {len(assignments)} assignments")
     
-    return assignments
+    # Last-resort text has no course structure; keep it as unstructured lines
+    return [Course.unstructured(assignments)] if assignments else []
 
 def get_credentials():
     if LOGFIRE_ENABLED:
@@ -458,37 +753,20 @@ def get_credentials():
         return credentials
 
 
-def login_to_website(url, username, password):
-    if LOGFIRE_ENABLED:
-        with logfire.span("login_to_website"):
-            logfire.info(f"Logging in to website: {url}")
-    else:
-        print(f"Logging in to website: {url}")
-        
-    # Google Cloud Run optimized browser startup
-    import tempfile
-    import atexit
-    import subprocess
+def _new_profile_dir():
     import uuid
-    import time
-    
-    # Clean up any existing browser processes
-    try:
-        subprocess.run(['pkill', '-f', 'chrome'], check=False, capture_output=True)
-        subprocess.run(['pkill', '-f', 'chromium'], check=False, capture_output=True)
-    except:
-        pass
-    
     # Create unique temp directory with better permissions
     unique_id = f"{int(time.time())}_{uuid.uuid4().hex[:8]}"
-    temp_dir = f'/tmp/chrome-profiles/profile-{unique_id}'
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    # Ensure cleanup
-    atexit.register(lambda: __import__('shutil').rmtree(temp_dir, ignore_errors=True))
-    
+    profile_dir = f'/tmp/chrome-profiles/profile-{unique_id}'
+    os.makedirs(profile_dir, exist_ok=True)
+    return profile_dir
+
+
+def _chrome_options(profile_dir, blocking=None):
+    from selenium.webdriver import ChromeOptions
+
     # Google Cloud Run optimized Chrome options
-    chrome_options = [
+    chrome_flags = [
         '--headless=new',  # Use new headless mode
         '--no-sandbox',
         '--disable-gpu',
@@ -504,9 +782,7 @@ def login_to_website(url, username, password):
         '--no-first-run',
         '--no-default-browser-check',
         '--disable-background-networking',
-        '--disable-background-timer-throttling',
         '--disable-client-side-phishing-detection',
-        '--disable-default-apps',
         '--disable-hang-monitor',
         '--disable-popup-blocking',
         '--disable-prompt-on-repost',
@@ -518,96 +794,328 @@ def login_to_website(url, username, password):
         '--use-mock-keychain',
         '--no-zygote',
         '--window-size=1280,1800',
-        f'--user-data-dir={temp_dir}',
+        f'--user-data-dir={profile_dir}',
         '--remote-debugging-port=0'
     ]
     # Prefer /dev/shm when available; only disable it if explicitly requested
     if os.getenv('DISABLE_DEV_SHM_USAGE', 'false').lower() in ('1', 'true', 'yes'):
-        chrome_options.append('--disable-dev-shm-usage')
-    
-    # Set Chrome options for helium/selenium
-    os.environ['CHROME_OPTIONS'] = ' '.join(chrome_options)
-    
+        chrome_flags.append('--disable-dev-shm-usage')
+    chrome_flags.extend(blocking_chrome_flags(enabled=blocking))
+
+    options = ChromeOptions()
     # Ensure we're using the correct Chrome binary
-    os.environ['CHROME_BIN'] = '/usr/bin/google-chrome'
-    
-    start_chrome(url, headless=True)
-    
+    options.binary_location = os.getenv('CHROME_BIN', '/usr/bin/google-chrome')
+    for flag in chrome_flags:
+        options.add_argument(flag)
+    return options
+
+
+def _launch_chrome(url, blocking=None):
+    """Cold-start headless Chrome on a fresh profile; returns the profile directory to clean up.
+
+    blocking overrides BLOCK_RESOURCES for this browser (None keeps the env setting).
+    """
+    profile_dir = _new_profile_dir()
+    # Start blank so the block list is in place before the first HAC request
+    start_chrome(headless=True, options=_chrome_options(profile_dir, blocking))
+    apply_resource_blocking(get_driver(), blocking)
+    get_driver().get(url)
+    return profile_dir
+
+
+def _process_tree_rss_mb(root_pid):
+    """Resident memory of a process and all its descendants (Linux /proc), in MB; 0 when unavailable."""
     try:
-        # Wait for page to load
-        wait_until(S("body").exists)
+        children = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # ppid is the 2nd field after the parenthesised command name
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+            except Exception:
+                continue
+        total_kb, stack = 0, [root_pid]
+        while stack:
+            pid = stack.pop()
+            stack.extend(children.get(pid, []))
+            try:
+                with open(f'/proc/{pid}/status') as f:
+                    for line in f:
+                        if line.startswith('VmRSS:'):
+                            total_kb += int(line.split()[1])
+                            break
+            except Exception:
+                continue
+        return total_kb / 1024.0
+    except Exception:
+        return 0.0
 
-        driver = get_driver()
-        _debug_dump(driver, "login_page")
-        
-        # Robust login using Selenium (multiple selector candidates)
-        driver = get_driver()
-        login_wait = WebDriverWait(driver, 30)
-
-        username_selectors = [
-            (By.ID, "LogOnDetails_UserName"),
-            (By.NAME, "LogOnDetails.UserName"),
-            (By.CSS_SELECTOR, "input[name='LogOnDetails.UserName']"),
-            (By.CSS_SELECTOR, "input#username"),
-            (By.XPATH, "//input[@type='text' and (contains(@name,'User') or contains(@id,'User'))]"),
-        ]
-        password_selectors = [
-            (By.ID, "LogOnDetails_Password"),
-            (By.NAME, "LogOnDetails.Password"),
-            (By.CSS_SELECTOR, "input[name='LogOnDetails.Password']"),
-            (By.CSS_SELECTOR, "input#password"),
-            (By.XPATH, "//input[@type='password']"),
-        ]
-        submit_selectors = [
-            (By.ID, "login"),
-            (By.CSS_SELECTOR, "button[type='submit']"),
-            (By.XPATH, "//button[contains(.,'Sign In') or contains(.,'Log') or @type='submit']"),
-            (By.XPATH, "//input[@type='submit']"),
-        ]
 
-        def _find_first(selectors):
-            for by, sel in selectors:
-                try:
-                    el = login_wait.until(EC.presence_of_element_located((by, sel)))
-                    if el:
-                        return el
-                except Exception:
-                    continue
-            raise Exception("Login element not found for selectors")
+class WarmBrowser:
+    """Long-lived headless Chrome reused across runs (schedule mode / long-lived workers).
 
+    Each run only resets cookies and storage; the browser is recycled after `max_runs` runs,
+    when its process tree exceeds `max_rss_mb`, when a health check or run fails, or when a run
+    asks for different resource blocking than the browser was launched with (its image flag
+    only applies at launch).
+    """
+
+    def __init__(self, max_runs=20, max_rss_mb=700):
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.profile_dir = None
+        self.runs = 0
+        self.healthy = False
+        self.launch_flags = None
+
+    def _alive(self):
         try:
-            uel = _find_first(username_selectors)
-            pel = _find_first(password_selectors)
-            # Clear then type
-            uel.clear(); uel.send_keys(username)
-            pel.clear(); pel.send_keys(password)
-            # Try pressing Enter first
-            pel.send_keys(Keys.ENTER)
-            time.sleep(1.5)
+            return self.healthy and get_driver() is not None and get_driver().execute_script("return 1") == 1
         except Exception:
-            # Fallback to Helium label-based entry if Selenium approach fails
-            write(username, into="User Name")
-            write(password, into="Password")
-        _debug_dump(driver, "after_credentials")
+            return False
 
-        # Ensure we click a submit control if still on login
+    def _rss_mb(self):
         try:
-            login_wait.until(lambda d: "classes" in d.page_source.lower() or "home access" not in d.title.lower())
+            return _process_tree_rss_mb(get_driver().service.process.pid)
         except Exception:
+            return 0.0
+
+    def _reset_session(self, url):
+        from urllib.parse import urlsplit
+        driver = get_driver()
+        driver.switch_to.default_content()
+        driver.get("about:blank")
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        parts = urlsplit(url)
+        driver.execute_cdp_cmd(
+            "Storage.clearDataForOrigin",
+            {"origin": f"{parts.scheme}://{parts.netloc}", "storageTypes": "all"},
+        )
+
+    def acquire(self, url, blocking=None):
+        reason = None
+        flags = blocking_chrome_flags(enabled=blocking)
+        if not self._alive():
+            reason = "not running" if self.profile_dir is None else "health check failed"
+        elif flags != self.launch_flags:
+            reason = "resource blocking changed"
+        elif self.runs >= self.max_runs:
+            reason = f"reached {self.runs} runs"
+        else:
+            rss = self._rss_mb()
+            if rss > self.max_rss_mb:
+                reason = f"memory {rss:.0f} MB > {self.max_rss_mb} MB"
+        if reason is None:
+            try:
+                self._reset_session(url)
+                apply_resource_blocking(get_driver(), blocking)
+                get_driver().get(url)
+                print(f"Reusing warm browser (run {self.runs + 1}/{self.max_runs})")
+                return
+            except Exception as e:
+                reason = f"reset failed: {e}"
+        print(f"Starting browser ({reason})")
+        if LOGFIRE_ENABLED:
+            logfire.info("Recycling warm browser", reason=reason, runs=self.runs)
+        self.shutdown()
+        self.profile_dir = _launch_chrome(url, blocking)
+        self.launch_flags = flags
+        self.runs = 0
+        self.healthy = True
+
+    def release(self, failed=False):
+        self.runs += 1
+        if failed:
+            # Don't carry a browser in an unknown state into the next run
+            self.shutdown()
+
+    def shutdown(self):
+        import shutil
+        if self.healthy:
             try:
-                sub = _find_first(submit_selectors)
-                sub.click()
+                kill_browser()
             except Exception:
-                # Fallback: try Helium click
-                helium_click("Sign In")
-        _debug_dump(driver, "after_submit")
+                pass
+        self.healthy = False
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+
+# Shared browser for warm mode; created by enable_warm_browser()
+_warm_browser = None
+
+
+def enable_warm_browser():
+    """Switch login_to_website to a shared, health-checked browser; returns the WarmBrowser."""
+    import atexit
+    global _warm_browser
+    if _warm_browser is None:
+        _warm_browser = WarmBrowser(
+            max_runs=int(os.getenv('BROWSER_MAX_RUNS', '20')),
+            max_rss_mb=int(os.getenv('BROWSER_MAX_RSS_MB', '700')),
+        )
+        atexit.register(_warm_browser.shutdown)
+    return _warm_browser
+
+
+def _submit_login_form(driver, username, password, deadline):
+    """Fill and submit the HAC login form, trying several selector candidates before Helium fallbacks."""
+    from urllib.parse import urlsplit
+    # Robust login using Selenium (multiple selector candidates)
+
+    username_selectors = [
+        (By.ID, "LogOnDetails_UserName"),
+        (By.NAME, "LogOnDetails.UserName"),
+        (By.CSS_SELECTOR, "input[name='LogOnDetails.UserName']"),
+        (By.CSS_SELECTOR, "input#username"),
+        (By.XPATH, "//input[@type='text' and (contains(@name,'User') or contains(@id,'User'))]"),
+    ]
+    password_selectors = [
+        (By.ID, "LogOnDetails_Password"),
+        (By.NAME, "LogOnDetails.Password"),
+        (By.CSS_SELECTOR, "input[name='LogOnDetails.Password']"),
+        (By.CSS_SELECTOR, "input#password"),
+        (By.XPATH, "//input[@type='password']"),
+    ]
+    submit_selectors = [
+        (By.ID, "login"),
+        (By.CSS_SELECTOR, "button[type='submit']"),
+        (By.XPATH, "//button[contains(.,'Sign In') or contains(.,'Log') or @type='submit']"),
+        (By.XPATH, "//input[@type='submit']"),
+    ]
+
+    profile = get_selector_profile()
+    host = urlsplit(driver.current_url).netloc
+
+    def _find_first(kind, selectors, cap=30):
+        # Poll every candidate in one wait, learned winner and district extras first, instead of
+        # timing out on each miss; remember which candidate matched for the next run
+        ordered = profile.ordered_selectors(host, kind, selectors)
+        def _present(d):
+            for by, sel in ordered:
+                found = d.find_elements(by, sel)
+                if found:
+                    return found[0], selector_key(by, sel)
+            return False
+        try:
+            el, key = deadline.wait(driver, cap).until(_present)
+        except Exception:
+            raise Exception("Login element not found for selectors")
+        profile.record(host, kind, key)
+        return el
+
+    pel = None
+    try:
+        uel = _find_first("username", username_selectors)
+        pel = _find_first("password", password_selectors, cap=5)
+        # Clear then type
+        uel.clear(); uel.send_keys(username)
+        pel.clear(); pel.send_keys(password)
+        # Try pressing Enter first
+        pel.send_keys(Keys.ENTER)
+    except Exception:
+        # Fallback to Helium label-based entry if Selenium approach fails
+        write(username, into="User Name")
+        write(password, into="Password")
+    _debug_dump(driver, "after_credentials")
+
+    def _left_login_page(d):
+        if pel is not None:
+            try:
+                pel.is_enabled()
+            except StaleElementReferenceException:
+                return True
+        return "classes" in d.page_source.lower() or "home access" not in d.title.lower()
+
+    # Ensure we click a submit control if still on login
+    try:
+        deadline.wait(driver, 15).until(_left_login_page)
+    except Exception:
+        try:
+            sub = _find_first("submit", submit_selectors, cap=5)
+            sub.click()
+        except Exception:
+            # Fallback: try Helium click
+            helium_click("Sign In")
+    _debug_dump(driver, "after_submit")
+
+
+def _restore_cached_session(driver, url, cache):
+    """Load cached HAC cookies into the browser when one cheap request confirms they are still valid."""
+    from urllib.parse import urljoin
+    cookies = cache.load()
+    if not cookies:
+        return False
+    if not session_is_valid(url, cookies):
+        print("Cached HAC session expired; logging in again")
+        cache.clear()
+        return False
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            continue
+    driver.get(urljoin(url, "/HomeAccess/"))
+    if LOGFIRE_ENABLED:
+        logfire.info("Reused cached HAC session (login skipped)")
+    else:
+        print("Reused cached HAC session (login skipped)")
+    return True
+
+
+def login_to_website(url, username, password, output_path=None, all_cycles=None, student=None, blocking=None):
+    if LOGFIRE_ENABLED:
+        with logfire.span("login_to_website"):
+            logfire.info(f"Logging in to website: {url}")
+    else:
+        print(f"Logging in to website: {url}")
+
+    import shutil
+
+    # Google Cloud Run optimized browser startup: reuse the warm browser when enabled, else cold start.
+    # Only our own browser is ever stopped, so concurrent runs don't kill each other's Chrome.
+    warm = enable_warm_browser() if WARM_BROWSER else _warm_browser
+    profile_dir = None
+    failed = False
+    deadline = ScrapeDeadline()
+    # None means the BLOCK_RESOURCES env setting; resource_blocking.py --runs passes it explicitly
+    blocking = resource_blocking.BLOCK_RESOURCES if blocking is None else blocking
+    page_stats = {"blocking": blocking}
+    if warm is not None:
+        warm.acquire(url, blocking)
+    else:
+        profile_dir = _launch_chrome(url, blocking)
+    deadline.mark("browser")
+    
+    try:
+        # Wait for page to load
+        driver = get_driver()
+        _wait_for_dom_ready(driver, deadline)
+        page_stats["login_page"] = page_load_stats(driver)
+        _debug_dump(driver, "login_page")
+        
+        # Skip the whole login form when cached session cookies are still accepted
+        session_cache = SessionCache(url, username, password)
+        if not _restore_cached_session(driver, url, session_cache):
+            _submit_login_form(driver, username, password, deadline)
+        deadline.mark("login")
+        deadline.check()
         
         # Wait for login to complete
-        wait_until(Link("Classes").exists)
+        wait_until(Link("Classes").exists, timeout_secs=deadline.timeout(30), interval_secs=0.1)
         helium_click("Classes")
         
         # Wait for legacy iframe to load (id or class)
-        wait_until(lambda: S("#sg-legacy-iframe").exists or S(".sg-legacy-iframe").exists)
+        wait_until(
+            lambda: S("#sg-legacy-iframe").exists() or S(".sg-legacy-iframe").exists(),
+            timeout_secs=deadline.timeout(30),
+            interval_secs=0.1,
+        )
+        deadline.mark("classes")
         
         # Switch into content iframes with retries (different deployments vary)
         driver = get_driver()
@@ -625,7 +1133,7 @@ def login_to_website(url, username, password):
                         iframe = None
                 if iframe is not None:
                     drv.switch_to.frame(iframe)
-                    time.sleep(1.0)
+                    _wait_for_dom_ready(drv, deadline)
                 else:
                     raise Exception("Legacy iframe not found by id or class")
             except Exception:
@@ -671,11 +1179,14 @@ def login_to_website(url, username, password):
         switched_ok = False
         for _ in range(3):
             driver.switch_to.default_content()
-            time.sleep(0.5)
             if _switch_into_content_iframe(driver):
                 switched_ok = True
                 break
-            time.sleep(1.0)
+            # Retry as soon as an iframe is attached rather than after a fixed pause
+            try:
+                deadline.wait(driver, 3).until(EC.presence_of_element_located((By.TAG_NAME, "iframe")))
+            except Exception:
+                pass
 
         # Try to navigate to the Classwork/Assignments view inside iframe
         try:
@@ -688,48 +1199,60 @@ def login_to_website(url, username, password):
                 (By.XPATH, "//a[contains(.,'Classwork') or contains(.,'Assign')]"),
                 (By.XPATH, "//button[contains(.,'Classwork') or contains(.,'Assign')]"),
             ]
-            for by, sel in candidates:
-                try:
-                    el = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((by, sel)))
-                    ActionChains(driver).move_to_element(el).pause(0.1).click(el).perform()
-                    time.sleep(1.0)
-                    break
-                except Exception:
-                    continue
+            # One wait polls every candidate (the view may already be showing, so keep the cap short)
+            el = deadline.wait(driver, 10).until(
+                EC.any_of(*[EC.element_to_be_clickable((by, sel)) for by, sel in candidates])
+            )
+            ActionChains(driver).move_to_element(el).pause(0.1).click(el).perform()
+            _wait_for_quiet_dom(driver, deadline)
         except Exception:
             pass
         
-        # Proactively wait for common assignment row selectors, with broader set and longer timeouts
+        # Proactively wait for any common assignment row selector in a single wait
         try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_any_elements_located((By.CLASS_NAME, "AssignmentClass"))
-            )
+            deadline.wait(driver, 30).until(EC.any_of(
+                EC.presence_of_all_elements_located((By.CLASS_NAME, "AssignmentClass")),
+                EC.presence_of_all_elements_located((By.XPATH, "//tr[contains(@class,'sg-asp-table') or contains(@class,'sg-asp-table-data-row')]")),
+                EC.presence_of_all_elements_located((By.XPATH, "//table//tr")),
+            ))
         except Exception:
-            try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_any_elements_located((By.XPATH, "//tr[contains(@class,'sg-asp-table') or contains(@class,'sg-asp-table-data-row')]"))
-                )
-            except Exception:
-                try:
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_any_elements_located((By.XPATH, "//table//tr"))
-                    )
-                except Exception:
-                    pass  # fall through to extraction fallback
+            pass  # fall through to extraction fallback
 
         # Small scroll to ensure rows render
         try:
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(0.5)
+            _wait_for_quiet_dom(driver, deadline, quiet_ms=150, cap=2)
             driver.execute_script("window.scrollTo(0, 0);")
         except Exception:
             pass
+        deadline.mark("assignments_view")
+        page_stats["assignments_frame"] = page_load_stats(driver)
+        deadline.check()
+        # Snapshot of the assignments iframe itself; re-parse offline with hac_parser.py
+        _debug_dump(driver, "assignments_frame")
         
         # Extract and save assignments
-        assignments = extract_assignments()
+        assignments = extract_assignments(deadline, CourseCache(url, username))
+        deadline.mark("extract")
+
+        if assignments and (ALL_CYCLES if all_cycles is None else all_cycles):
+            # Other cycles are ASP.NET postbacks of this page; replay them over HTTP with the browser's cookies
+            try:
+                assignments = browser_cycle_courses(
+                    url,
+                    driver.execute_script("return location.href"),
+                    driver.page_source,
+                    get_driver().get_cookies(),
+                )
+            except Exception as e:
+                if LOGFIRE_ENABLED:
+                    logfire.warning(f"Fetching all grading cycles failed; keeping the current cycle: {str(e)}")
+                else:
+                    print(f"Fetching all grading cycles failed; keeping the current cycle: {str(e)}")
+            deadline.mark("cycles")
         
         # Strict failure if 0
-        if len(assignments) == 0:
+        if count_lines(assignments) == 0:
             error_msg = "Web scraping failed: Extracted 0 assignments from website (frame/content not found)."
             if LOGFIRE_ENABLED:
                 logfire.error(error_msg)
@@ -737,28 +1260,90 @@ def login_to_website(url, username, password):
                 print(f"ERROR: {error_msg}")
             raise Exception(error_msg)
         
-        save_assignments_to_file(assignments)
+        store_assignments(assignments, output_path, student or username)
+        try:
+            session_cache.save(get_driver().get_cookies())
+        except Exception as e:
+            print(f"Warning: could not cache HAC session: {e}")
         if LOGFIRE_ENABLED:
-            logfire.info(f"Login and assignment extraction successful - got {len(assignments)} assignments")
+            logfire.info(f"Login and assignment extraction successful - got {count_lines(assignments)} assignments")
         else:
-            print(f"Login and assignment extraction successful - got {len(assignments)} assignments")
+            print(f"Login and assignment extraction successful - got {count_lines(assignments)} assignments")
+        return page_stats
         
     except Exception as e:
+        failed = True
         if LOGFIRE_ENABLED:
             logfire.error(f"Login or assignment extraction failed: {str(e)}")
         else:
             print(f"Login or assignment extraction failed: {str(e)}")
         raise
     finally:
-        # Switch back to default content
-        get_driver().switch_to.default_content()
-        kill_browser()
+        deadline.report()
+        try:
+            page_stats["chrome_rss_mb"] = round(_process_tree_rss_mb(get_driver().service.process.pid))
+        except Exception:
+            pass
         if LOGFIRE_ENABLED:
-            logfire.info("Cleaning up and killing the browser")
+            logfire.info("Page load stats", **page_stats)
+        else:
+            print(f"Page load stats: {page_stats}")
+        # Switch back to default content
+        try:
+            get_driver().switch_to.default_content()
+        except Exception:
+            failed = True
+        if warm is not None:
+            warm.release(failed=failed)
+            if LOGFIRE_ENABLED:
+                logfire.info("Releasing warm browser", runs=warm.runs, recycled=failed)
+            else:
+                print("Recycling the browser after a failed run" if failed else "Keeping the browser warm for the next run")
         else:
-            print("Cleaning up and killing the browser")
+            kill_browser()
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            if LOGFIRE_ENABLED:
+                logfire.info("Cleaning up and killing the browser")
+            else:
+                print("Cleaning up and killing the browser")
 
 
+def scrape_assignments(url, username, password, backend=None, output_path=None, all_cycles=None, student=None):
+    """Scrape and save assignments (to output_path, default ASSIGNMENTS_PATH) with the selected backend.
+
+    The HTTP backend falls back to Chrome on any failure. With all_cycles (default ALL_CYCLES) every
+    grading cycle is saved, each line prefixed with "Cycle: <n> | ". Every scrape is also appended to
+    the history store under `student` (default: the HAC username).
+    """
+    backend = (backend or SCRAPE_BACKEND).strip().lower()
+    all_cycles = ALL_CYCLES if all_cycles is None else all_cycles
+    if backend == "http":
+        if LOGFIRE_ENABLED:
+            logfire.info("Scraping assignments over HTTP (no browser)")
+        else:
+            print("Scraping assignments over HTTP (no browser)")
+        try:
+            assignments = scrape_assignments_http(
+                url, username, password,
+                cache=SessionCache(url, username, password),
+                course_cache=CourseCache(url, username),
+                all_cycles=all_cycles,
+            )
+            if count_lines(assignments) == 0:
+                raise Exception("Extracted 0 assignments from HTTP response")
+            store_assignments(assignments, output_path, student or username)
+            if LOGFIRE_ENABLED:
+                logfire.info(f"HTTP assignment extraction successful - got {count_lines(assignments)} assignments")
+            else:
+                print(f"HTTP assignment extraction successful - got {count_lines(assignments)} assignments")
+            return
+        except Exception as e:
+            if LOGFIRE_ENABLED:
+                logfire.warning(f"HTTP backend failed, falling back to Chrome: {str(e)}")
+            else:
+                print(f"HTTP backend failed, falling back to Chrome: {str(e)}")
+    login_to_website(url, username, password, output_path, all_cycles, student)
+
 def main():
     if LOGFIRE_ENABLED:
         with logfire.span("main"):
@@ -769,7 +1354,7 @@ def main():
     credentials = get_credentials()
     
     try:
-        login_to_website(**credentials)
+        scrape_assignments(**credentials)
         print("Login successful!")
         if LOGFIRE_ENABLED:
             logfire.info("Login successful")
@@ -778,111 +1363,386 @@ def main():
         if LOGFIRE_ENABLED:
             logfire.error(f"Login failed: {str(e)}")
 
-def invoke_llm(assignments_content):
+def invoke_llm(assignments):
+    return _run_async(invoke_llm_async(assignments))
+
+async def invoke_llm_async(assignments):
     if LOGFIRE_ENABLED:
         with logfire.span("invoke_llm"):
             logfire.info("Invoking LLM for analysis")
     else:
         print("Invoking LLM for analysis")
-    # Clean and format the assignments content
-    cleaned_content = "\n".join([
-        line.strip() for line in assignments_content.splitlines() 
-        if line.strip() and not line.startswith("Timestamp:")
-    ])
-    
-    # Prepare the prompt
-    prompt = f"""
-    Analyze this student's assignments and grades. Focus on:
-    1. Missing assignments (marked with 'M - Missing' or a '0.00')
-    2. Class grades below 80%
-    3. Class grades above 80%
-    
+    # Raw file text is still accepted
+    if isinstance(assignments, str):
+        assignments = parse_lines([
+            line.strip() for line in assignments.splitlines()
+            if line.strip() and not line.startswith("Timestamp:")
+        ])
+    chunks = chunk_courses(assignments)
+    if not chunks:
+        raise LLMUnavailable("no assignment data to analyze")
+    # One output path whatever the size: the model extracts rows and the report is rendered locally,
+    # so a small account gets the same layout (and exercises the same prompt) as a large one
+    return await _analyze_chunks(chunks)
+
+_CHUNK_PROMPT = """
+    These are a student's assignments and grades (possibly one part of them). List every item below, one per line,
+    in exactly these formats and nothing else (no HTML, no headings, no commentary):
+    MISSING | <course> | <assignment> | <due date> | <score>
+    BELOW | <course> | <assignment> | <due date> | <percent>
+    CLASS | <course> | <class grade>
+
+    MISSING: assignments marked 'M - Missing' or with a 0.00 score.
+    BELOW: graded assignments below 80%.
+    CLASS: every course's class grade.
+    An assignment's grade is its Percent, or its Score when Percent is empty (scores are out of 100).
+    A 0.00 is both MISSING and BELOW. A blank score is not graded yet: it is neither missing nor below.
+    A course without a class grade gets no CLASS line.
+    Copy course names, assignment titles, dates and scores exactly as they appear in the data.
+    When the data gives a course a cycle N, write the course as "<course> (Cycle N)".
+    {legend}
+
+    Example data:
+{example_data}
+
+    The answer for the example data (the order of the lines does not matter):
+{example_answer}
+
     Here is the data:
-    {cleaned_content[:10000]}
-    
-    Provide the following sections:
-    - Summary of Key Issues
-        -- Number of missing assignments plus those with a 0.00 grade
-        -- Number of class assignment grades that are less than 80%
-    - Missing Assignments
-        -- Table of all of the missing assignments with formatted spacing to look like a table
-        -- Course Name
-        -- Assignment
-        -- Due Date
-        -- Sort by Due Date from the newest date to the oldest date
-    - Assignments Below 80%
-        -- Table of all of assignments with a grade below 80%
-        -- Course Name
-        -- Assignment
-        -- Due Date
-        -- Sort by assignment grade from lowest to highest
-    - Low Class Grades (Below 80%) 
-        -- Table of overall course grades below 80% with formatted spacing to look like a table
-        -- Course Name
-        -- Current Grade
-        -- Sort by Current Grade from lowest to highest
-    - Other Class Grades (Above 80%) 
-        -- Table of overall course grade above 80% with formatted spacing to look like a table
-        -- Course Name
-        -- Current Grade
-        -- Sort by Current Grade from lowest to highest
-    
+    """
+
+_STRUCTURED_PROMPT = """
+    Extract this student's report from the data below, one entry per course:
+    - grade: the course's class grade
+    - missing: its assignments marked 'M - Missing' or with a 0.00 score
+    - below: its graded assignments below 80%
+    Then a summary: two or three plain sentences for a parent, mentioning the most urgent missing work.
+    An assignment's grade is its Percent, or its Score when Percent is empty (scores are out of 100).
+    A 0.00 is both missing and below. A blank score is not graded yet: it is neither missing nor below.
+    A course without a class grade has an empty grade.
+    Copy course names, assignment titles, dates and scores exactly as they appear in the data.
+    When the data gives a course a cycle N, write the course as "<course> (Cycle N)".
+    {legend}
+
+    Example data:
+{example_data}
+
+    The answer for the example data:
+{example_answer}
+
+    Here is the data:
+    """
+
+def _analysis_template(structured):
+    """The static part of the row-extraction prompt: instructions, data legend and the worked example."""
+    template = _STRUCTURED_PROMPT if structured else _CHUNK_PROMPT
+    answer = example_answer_structured() if structured else example_answer_lines()
+    return template.format(legend=data_legend(), example_data=example_data(), example_answer=answer)
+
+def _parse_chunk_rows(text):
+    """(missing, below, classes) ReportRows from one chunk's pipe-separated answer."""
+    missing, below, classes = [], [], []
+    for line in text.splitlines():
+        parts = [p.strip() for p in line.strip().strip("-* ").split("|")]
+        kind = parts[0].upper()
+        if kind in ("MISSING", "BELOW") and len(parts) >= 5:
+            row = ReportRow(parts[1], parts[2], parts[3], parse_date(parts[3]), parts[4], parse_number(parts[4]))
+            (missing if kind == "MISSING" else below).append(row)
+        elif kind == "CLASS" and len(parts) >= 3:
+            classes.append(ReportRow(parts[1], score_text=parts[2], grade=parse_number(parts[2])))
+    return missing, below, classes
+
+def _add_rows(merged, rows, key):
+    # A course split across chunks (prompt_chunks._split_course) can report the same row in two parts
+    for row in rows:
+        merged.setdefault(key(row), row)
+
+async def _analyze_chunks(chunks):
+    """Map: extract the report rows of each chunk concurrently. Reduce: merge and render them locally.
+
+    With LLM_OUTPUT=structured each chunk comes back as a GradeAnalysis, otherwise as pipe-separated lines.
+    """
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, LLM_CONCURRENCY))
+    structured = LLM_OUTPUT == "structured"
+    static = _analysis_template(structured)
+
+    async def one(chunk):
+        async with semaphore:
+            prompt = Prompt(static, encode_courses(chunk))
+            return await _run_agent(prompt, structured=structured)
+
+    results = await asyncio.gather(*(one(chunk) for chunk in chunks), return_exceptions=True)
+    missing, below, classes, failed, summaries = {}, {}, {}, [], []
+    for i, result in enumerate(results, 1):
+        if isinstance(result, Exception):
+            failed.append(f"part {i}: {result}")
+            continue
+        if isinstance(result, GradeAnalysis):
+            part_missing, part_below, part_classes = report_rows(result)
+            summaries.append(result.summary.strip())
+        else:
+            part_missing, part_below, part_classes = _parse_chunk_rows(result)
+        _add_rows(missing, part_missing, lambda r: (r.course, r.assignment, r.due_text))
+        _add_rows(below, part_below, lambda r: (r.course, r.assignment, r.due_text))
+        _add_rows(classes, part_classes, lambda r: r.course)
+    if len(failed) == len(results):
+        raise LLMUnavailable(f"every part of the analysis failed ({'; '.join(failed)})")
+    elapsed = time.perf_counter() - started
+    if LOGFIRE_ENABLED:
+        logfire.info("Chunked analysis complete", chunks=len(chunks), failed=len(failed), seconds=round(elapsed, 2))
+    else:
+        print(f"Chunked analysis of {len(chunks)} parts complete in {elapsed:.1f}s ({len(failed)} failed)")
+    notes = []
+    # A summary only describes its own part of the data, so it is used when there was a single part
+    if len(chunks) == 1 and summaries and summaries[0]:
+        notes.append(summaries[0])
+    if failed:
+        notes.append(f"{len(failed)} of {len(results)} parts could not be analyzed ({'; '.join(failed)}).")
+    return render_report_html(assemble_report(missing.values(), below.values(), classes.values()), " ".join(notes) or None)
+
+SYSTEM_PROMPT = """
+    You are an expert in evaluating the grades and performance of high school students.
+    """
+
+LLM_SETTINGS = {'temperature': 0.0}
+
+_llm_cache = LLMCache()
+# Provider prompt-cache reads/writes across this process's LLM calls (prompt_cache.py)
+_prompt_cache_stats = PromptCacheStats()
+
+_router = None
+
+def _get_router():
+    """The module-level provider router (llm_router.py); each provider's Agent is built once and reused,
+    so every analysis shares its model client and HTTP connection pool."""
+    global _router
+    if _router is None:
+        #LLM_PROVIDERS=anthropic:claude-3-5-sonnet-latest or gemini-2.0-flash-thinking-exp-01-21 select other models
+        _router = LLMRouter([
+            pydantic_ai_provider(model, SYSTEM_PROMPT, LLM_SETTINGS, usage=_prompt_cache_stats) for model in LLM_PROVIDERS
+        ])
+    return _router
+
+_structured_router = None
+
+def _get_structured_router():
+    """Router whose Agents return a GradeAnalysis (LLM_OUTPUT=structured); shares the latency stats of _get_router()."""
+    global _structured_router
+    if _structured_router is None:
+        _structured_router = LLMRouter(
+            [
+                pydantic_ai_provider(
+                    model, SYSTEM_PROMPT, LLM_SETTINGS, output_type=GradeAnalysis, name=f"{model}:structured",
+                    usage=_prompt_cache_stats,
+                )
+                for model in LLM_PROVIDERS
+            ],
+            stats=_get_router().stats,
+            validate=lambda output: isinstance(output, GradeAnalysis),
+        )
+    return _structured_router
+
+async def _run_agent(prompt, structured=False):
+    """Run the analysis prompt, answering from the LLM cache when the same prompt/model/settings ran before.
+
+    Returns HTML, or a GradeAnalysis when structured (cached as its JSON).
+    """
+    model = ",".join(LLM_PROVIDERS) + (":structured" if structured else "")
+    html, hit = await cached_completion_async(
+        _llm_cache, prompt_text(prompt), SYSTEM_PROMPT, model, LLM_SETTINGS, lambda: _call_agent(prompt, structured)
+    )
+    if LOGFIRE_ENABLED:
+        logfire.info("LLM cache " + ("hit" if hit else "miss"), **_llm_cache.stats)
+    else:
+        print(f"LLM cache {'hit' if hit else 'miss'} ({_llm_cache.stats['hits']} hits, {_llm_cache.stats['misses']} misses)")
+    return GradeAnalysis.model_validate_json(html) if structured else html
+
+async def _call_agent(prompt, structured=False):
+    """Run the analysis prompt through the hedged provider router and normalize the result to an HTML
+    string (or, when structured, the GradeAnalysis as JSON).
+
+    Raises LLMUnavailable when no provider answers, so a failure is never emailed as the analysis.
+    """
+    router = _get_structured_router() if structured else _get_router()
+    output, provider = await router.run(prompt)
+    text = output.model_dump_json() if structured else _result_html(output)
+    if LOGFIRE_ENABLED:
+        logfire.info("LLM answered", provider=provider, output_chars=len(text), **_prompt_cache_stats.snapshot())
+    else:
+        print(f"LLM answered by {provider} ({len(text)} chars; {_prompt_cache_stats.describe()})")
+    return text
+
+def _result_html(result):
+    """Normalize an agent result to a string."""
+    # Prefer the "output" attribute used by recent pydantic-ai AgentRunResult
+    if hasattr(result, "output"):
+        html = result.output
+    # Back-compat fallbacks for other SDK/result shapes
+    elif hasattr(result, "data"):
+        html = result.data
+    elif hasattr(result, "content"):
+        html = result.content
+    elif hasattr(result, "text"):
+        html = result.text
+    elif isinstance(result, dict) and "output" in result:
+        html = result["output"]
+    else:
+        # Last resort: stringification
+        html = str(result)
+
+    # Ensure it's a string for MIMEText; some SDKs can return non-str types
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="ignore")
+    else:
+        html = str(html)
+
+    return html
+
+_CHANGES_PROMPT = """
+    Report what changed in this student's assignments and grades since the previous check.
+    Focus on newly missing assignments, score changes and class grade movement.
+
+    Provide the following sections (skip a section when nothing applies):
+    - Summary of Changes
+    - Newly Missing Assignments (table: Course Name, Assignment, Due Date)
+    - Resolved Missing Assignments (table: Course Name, Assignment, New Score)
+    - Score Changes and New Grades (table: Course Name, Assignment, Old Score, New Score)
+    - Class Grade Movement (table: Course Name, Old Grade, New Grade), flagging grades below 80%
+
     Keep the response concise and focused.
-    The response should be in HTML format that includes headings, bullet points, 
+    The response should be in HTML format that includes headings, bullet points,
     and tables with headings so that it is easy to read.
     Make the HTML so that it displays correctly on a mobile device
     Only include the analysis within the start <html> and end <html> tags.
+
+    Here is the data:
     """
-    system_prompt = """
-    You are an expert in evaluating the grades and performance of high school students.
+
+async def invoke_llm_changes(changes, courses):
+    """Analyze only what changed since the previous scrape; the prompt carries the change lines plus current class grades.
+
+    A change set over PROMPT_TOKEN_BUDGET (e.g. the first check of a new grading cycle) is not cut
+    short: the full analysis runs instead, which chunks the data by course.
     """
-    #agent = Agent('anthropic:claude-3-5-sonnet-latest', system_prompt=system_prompt, model_settings={'temperature': 0.0})
-    #agent = Agent('gemini-2.0-flash-thinking-exp-01-21', system_prompt=system_prompt, model_settings={'temperature': 0.0})
-    agent = Agent('gemini-2.5-flash', system_prompt=system_prompt, model_settings={'temperature': 0.0})
-    try:
-        # Run the agent and normalize to a pure HTML string
-        result = agent.run_sync(prompt)
-
-        # Prefer the "output" attribute used by recent pydantic-ai AgentRunResult
-        if hasattr(result, "output"):
-            html = result.output
-        # Back-compat fallbacks for other SDK/result shapes
-        elif hasattr(result, "data"):
-            html = result.data
-        elif hasattr(result, "content"):
-            html = result.content
-        elif hasattr(result, "text"):
-            html = result.text
-        elif isinstance(result, dict) and "output" in result:
-            html = result["output"]
+    change_lines = "\n".join(render_changes(changes))
+    tokens = estimate_tokens(change_lines)
+    if tokens > PROMPT_TOKEN_BUDGET:
+        if LOGFIRE_ENABLED:
+            logfire.info("Change set over prompt budget; running the full analysis", tokens=tokens,
+                         budget=PROMPT_TOKEN_BUDGET, **changes.counts())
         else:
-            # Last resort: stringification
-            html = str(result)
+            print(f"{len(changes.changes)} changes (~{tokens} tokens) exceed PROMPT_TOKEN_BUDGET={PROMPT_TOKEN_BUDGET}; "
+                  "running the full analysis")
+        return await invoke_llm_async(courses)
+    if LOGFIRE_ENABLED:
+        with logfire.span("invoke_llm_changes"):
+            logfire.info("Invoking LLM for change analysis", **changes.counts())
+    else:
+        print(f"Invoking LLM for change analysis ({len(changes.changes)} changes)")
+    grade_lines = "\n".join(
+        f"{f'Cycle: {c.cycle} | ' if c.cycle else ''}Course: {c.name} | Class Grade: {c.class_grade_text}"
+        for c in courses if c.name and c.class_grade_text
+    )
+    data = f"""Previous check: {changes.previous_at}
+
+    Changes:
+    {change_lines}
+
+    Current class grades:
+    {grade_lines}
+    """
+    return await _run_agent(Prompt(_CHANGES_PROMPT, data))
 
-        # Ensure it's a string for MIMEText; some SDKs can return non-str types
-        if isinstance(html, bytes):
-            html = html.decode("utf-8", errors="ignore")
+async def local_analysis(courses, narrative=None):
+    """The report computed locally (local_report.py); the LLM only adds an optional short narrative.
+
+    Data with no course structure at all (only the last-resort text fallbacks, or an old free-text
+    file) can't be computed locally, so it goes to the full LLM analysis instead.
+    """
+    started = time.perf_counter()
+    report = build_report(courses)
+    if not report.usable:
+        if LOGFIRE_ENABLED:
+            logfire.info("No structured rows for the local report; running the full analysis",
+                         unstructured_lines=report.unstructured_lines)
         else:
-            html = str(html)
+            print(f"No structured rows for the local report ({report.unstructured_lines} unstructured lines); "
+                  "running the full analysis")
+        return await invoke_llm_async(courses)
+    summary = None
+    if LOCAL_NARRATIVE if narrative is None else narrative:
+        try:
+            summary = await _run_agent(Prompt(
+                "In two or three plain sentences (no HTML, no tables), summarize this student's standing "
+                "for a parent, mentioning the most urgent missing work:\n", summary_facts(report)
+            ))
+        except LLMUnavailable as e:
+            print(f"Warning: narrative skipped: {str(e)}")
+    html = render_report_html(report, summary)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if LOGFIRE_ENABLED:
+        logfire.info("Local analysis complete", missing=report.missing_count, below=report.below_count, ms=round(elapsed_ms, 1))
+    else:
+        print(f"Local analysis complete in {elapsed_ms:.1f} ms ({report.missing_count} missing, {report.below_count} below 80%)")
+    return html
 
-        return html
-    except Exception as e:
-        return f"Error processing assignments: {str(e)}"
+def analyze_assignments(courses, mode=None, student=None):
+    return _run_async(analyze_assignments_async(courses, mode, student))
+
+async def analyze_assignments_async(courses, mode=None, student=None):
+    """Full LLM analysis, the locally computed report ("local"), or in "changes" mode only what moved
+    since the student's previous stored scrape.
 
-def send_email(analysis):
+    An unchanged scrape returns a short note without calling the LLM.
+    """
+    mode = mode or ANALYSIS_MODE
+    if mode == "local":
+        return await local_analysis(courses)
+    if mode == "changes":
+        try:
+            changes = changes_since_last(student, courses)
+        except Exception as e:
+            print(f"Warning: could not diff against history: {str(e)}")
+            changes = None
+        if changes is None:
+            print("No previous scrape to compare against; running the full analysis")
+        elif not changes:
+            if LOGFIRE_ENABLED:
+                logfire.info("No changes since previous scrape", previous_at=changes.previous_at)
+            else:
+                print(f"No changes since {changes.previous_at}")
+            return (
+                "<html><body><h2>No changes</h2>"
+                f"<p>No assignment or grade changes since the previous check on {changes.previous_at}.</p>"
+                "</body></html>"
+            )
+        else:
+            return await invoke_llm_changes(changes, courses)
+    return await invoke_llm_async(courses)
+
+# Reports are queued on disk before delivery and retried with backoff (outbox.py)
+_outbox = Outbox()
+
+def send_email(analysis, student=None, receivers=None, deliver=True):
+    """Queues the analysis as an HTML email to multiple recipients, then delivers the outbox unless deliver=False.
+
+    A report that cannot be delivered stays in the outbox and is retried later; it is never lost.
+    """
     if LOGFIRE_ENABLED:
         with logfire.span("send_email"):
-            logfire.info("Sending email with analysis")
+            logfire.info("Queueing email with analysis")
     else:
-        print("Sending email with analysis")
-    """Sends the analysis via email with HTML content to multiple recipients."""
+        print("Queueing email with analysis")
     sender_email = os.getenv('GMAIL_SENDER')
-    sender_password = os.getenv('GMAIL_APP_PASSWORD')
-    receiver_emails = [email.strip() for email in os.getenv('GMAIL_RECEIVERS').split(',')]
+    if receivers:
+        receiver_emails = list(receivers)
+    else:
+        receiver_emails = [email.strip() for email in os.getenv('GMAIL_RECEIVERS').split(',')]
     
     # Create subject with current date
     current_date = time.strftime("%m/%d/%Y")
-    subject = f"Naina's Grades/Assignments - {current_date}"
+    subject = f"{student or 'Naina'}'s Grades/Assignments - {current_date}"
     
     # Create message as MIMEText with HTML content
     msg = MIMEText(analysis, 'html')
@@ -890,22 +1750,200 @@ def send_email(analysis):
     msg['From'] = sender_email
     msg['To'] = ', '.join(receiver_emails)  # Join all recipients with commas
 
+    _outbox.enqueue(sender_email, receiver_emails, msg)
+    if deliver:
+        deliver_outbox()
+
+def deliver_outbox():
+    """Send every due message in the outbox over one SMTP connection; failures are rescheduled, not raised."""
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(sender_email, sender_password)
-            # Send to all recipients
-            server.sendmail(
-                sender_email,
-                receiver_emails,  # Pass list of recipients
-                msg.as_string()
-            )
-            print(f"Email sent successfully to {len(receiver_emails)} recipients!")
-            if LOGFIRE_ENABLED:
-                logfire.info(f"Email sent successfully to {len(receiver_emails)} recipients!")
+        result = _outbox.deliver()
     except Exception as e:
         if LOGFIRE_ENABLED:
-            logfire.error(f"Error sending email: {e}")
-        print(f"Error sending email: {e}")
+            logfire.error(f"Error delivering email: {e}")
+        print(f"Error delivering email: {e}")
+        return None
+    if not (result.sent or result.retrying or result.failed):
+        return result
+    print(f"Email delivery: {result.sent} sent, {result.retrying} to retry, {result.failed} failed, {result.pending} pending")
+    for error in result.errors:
+        print(f"Error sending email: {error}")
+    if LOGFIRE_ENABLED:
+        logfire.info("Email delivery", sent=result.sent, retrying=result.retrying, failed=result.failed, pending=result.pending)
+        if result.errors:
+            logfire.error("Email delivery errors", errors=list(result.errors))
+    return result
+
+def load_accounts(path=None):
+    """Read the student accounts for multi-account mode from a JSON list (ACCOUNTS_FILE).
+
+    Each entry needs "name" and "username", plus "password" or "password_env" (the name of an
+    environment variable holding it). "url" defaults to HAC_URL, "receivers" (list or comma-separated)
+    to GMAIL_RECEIVERS, and "assignments_path" to ASSIGNMENTS_PATH with the student's name appended.
+    """
+    path = path or ACCOUNTS_FILE
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} must contain a non-empty JSON list of accounts")
+
+    root, ext = os.path.splitext(ASSIGNMENTS_PATH)
+    accounts, seen = [], set()
+    for entry in entries:
+        name = str(entry.get("name") or "").strip()
+        if not name or not entry.get("username"):
+            raise ValueError(f"{path}: every account needs a name and a username")
+        slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or "student"
+        if slug in seen:
+            raise ValueError(f"{path}: duplicate account name {name!r}")
+        seen.add(slug)
+        password = entry.get("password")
+        if password is None and entry.get("password_env"):
+            password = os.getenv(entry["password_env"])
+        if not password:
+            raise ValueError(f"{path}: no password for account {name!r}")
+        receivers = entry.get("receivers")
+        if isinstance(receivers, str):
+            receivers = [r.strip() for r in receivers.split(',') if r.strip()]
+        accounts.append({
+            "name": name,
+            "url": entry.get("url") or os.getenv('HAC_URL'),
+            "username": entry["username"],
+            "password": password,
+            "receivers": receivers or None,
+            "assignments_path": entry.get("assignments_path") or f"{root}-{slug}{ext}",
+        })
+    return accounts
+
+
+def _scrape_account(account, backend=None, all_cycles=None):
+    """Blocking scrape of one account into its assignments_path; runs in a pipeline executor."""
+    try:
+        scrape_assignments(
+            account["url"], account["username"], account["password"],
+            backend=backend, output_path=account["assignments_path"], all_cycles=all_cycles,
+            student=account["name"] or account["username"],
+        )
+    finally:
+        # Pool workers exit without running atexit handlers, so never leave a browser behind
+        if _warm_browser is not None and multiprocessing.parent_process() is not None:
+            _warm_browser.shutdown()
+
+
+def _env_account():
+    """The single HAC_* account; name None keeps the default email subject."""
+    credentials = get_credentials()
+    return {**credentials, "name": None, "receivers": None, "assignments_path": ASSIGNMENTS_PATH}
+
+
+async def _check_student(account, scrape_pool, email, backend, all_cycles, analysis_mode, local, html_file):
+    """Scrape (or read) -> analyze -> email for one student.
+
+    Returns (name, error or None, seconds, {stage: seconds}).
+    """
+    loop = asyncio.get_running_loop()
+    name = account["name"] or account["username"] or "student"
+    started = time.time()
+    stages = {}
+    mark = time.perf_counter()
+
+    def stage(label):
+        nonlocal mark
+        now = time.perf_counter()
+        stages[label] = now - mark
+        mark = now
+
+    try:
+        # Only a fresh scrape has a previous one in the history store to diff against
+        student = None
+        path = account["assignments_path"]
+        if html_file:
+            print(f"Parsing assignments from HTML snapshot {html_file}...")
+            assignments = parse_courses_file(html_file)
+            if count_lines(assignments) == 0:
+                raise Exception(f"Extracted 0 assignments from HTML snapshot {html_file}")
+            save_assignments_to_file(assignments, path)
+        elif local:
+            print("Using local assignments file...")
+            if not os.path.exists(path):
+                # For local testing fall back to the sample file baked into the image
+                path = 'assignments.txt'
+        else:
+            print(f"Scraping website for assignments ({name})...")
+            await loop.run_in_executor(scrape_pool, _scrape_account, account, backend, all_cycles)
+            student = account["name"] or account["username"]
+        assignments = load_assignments(path)
+        stage("scrape")
+
+        analysis = await analyze_assignments_async(assignments, mode=analysis_mode, student=student)
+        stage("analysis")
+        # Avoid printing analysis HTML (may contain PII) unless explicitly allowed
+        if not SAFE_LOGS:
+            print(analysis)
+        if email:
+            # Queue only (an fsync'd file write); run_grade_check delivers every student's report in one batch
+            await loop.run_in_executor(
+                None, lambda: send_email(analysis, account["name"], account["receivers"], deliver=False)
+            )
+            stage("email")
+        return name, None, time.time() - started, stages
+    except Exception as e:
+        return name, str(e), time.time() - started, stages
+
+
+async def run_grade_check(accounts=None, email=False, backend=None, all_cycles=None, analysis_mode=None,
+                          local=False, html_file=None, workers=None, timings=None):
+    """The scrape -> analysis -> email pipeline for the HAC_* account (accounts=None) or every account.
+
+    Scrapes are blocking Selenium/HTTP work and run in an executor: worker processes for several
+    accounts (each with its own browser), one thread for a single account so the warm browser is
+    reused. Analysis runs on the event loop through the shared LLM router and email in a thread, so a
+    student's analysis and email overlap with the scrapes still running for the others.
+    Returns {name: error or None}; per-student stage durations are appended to `timings` when given.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    accounts = accounts or [_env_account()]
+    workers = max(1, min(workers or SCRAPE_WORKERS, len(accounts)))
+    if LOGFIRE_ENABLED:
+        logfire.info("Running grade check", accounts=len(accounts), workers=workers)
+    else:
+        print(f"Running grade check for {len(accounts)} account(s) with {workers} scrape worker(s)")
+
+    started = time.time()
+    if len(accounts) > 1:
+        # spawn: forking a process that already runs Logfire/OTel threads can deadlock
+        scrape_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        scrape_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scrape")
+    results = {}
+    try:
+        tasks = [
+            _check_student(account, scrape_pool, email, backend, all_cycles, analysis_mode, local, html_file)
+            for account in accounts
+        ]
+        for task in asyncio.as_completed(tasks):
+            name, error, seconds, stages = await task
+            results[name] = error
+            if timings is not None:
+                timings.append({"name": name, "ok": error is None, "seconds": seconds, **stages})
+            status = "ok" if error is None else f"failed: {error}"
+            breakdown = ", ".join(f"{label} {value:.1f}s" for label, value in stages.items())
+            if LOGFIRE_ENABLED:
+                logfire.info(f"Account {name} finished in {seconds:.1f}s", ok=error is None, **stages)
+            print(f"Account {name}: {status} ({seconds:.1f}s{'; ' + breakdown if breakdown else ''})")
+    finally:
+        scrape_pool.shutdown(wait=True)
+    if email:
+        # One SMTP connection for every queued report, plus any earlier ones now due for a retry
+        await asyncio.get_running_loop().run_in_executor(None, deliver_outbox)
+
+    failed = [name for name, error in results.items() if error]
+    print(f"Grade check finished in {time.time() - started:.1f}s; {len(results) - len(failed)} ok, {len(failed)} failed")
+    if LOGFIRE_ENABLED and failed:
+        logfire.error("Grade check had failures", failed=failed)
+    return results
+
 
 def scheduled_job():
     if LOGFIRE_ENABLED:
@@ -916,22 +1954,12 @@ def scheduled_job():
     """Function to be scheduled to run daily at 3:00 PM"""
     print(f"Running scheduled job at {time.strftime('%Y-%m-%d %H:%M:%S')}")
     try:
-        # Get credentials and login
-        credentials = get_credentials()
-        login_to_website(**credentials)
-        
-        # Read the saved assignments
-        path = ASSIGNMENTS_PATH
-        with open(path, 'r') as f:
-            assignments_content = f.read()
-        
-        # Analyze assignments
-        analysis = invoke_llm(assignments_content)
-        print("\nAnalysis complete!")
-        
-        # Send email with analysis
-        send_email(analysis)
-        
+        results = _run_async(run_grade_check(
+            accounts=load_accounts() if ACCOUNTS_FILE else None,
+            email=True, all_cycles=ALL_CYCLES, analysis_mode=ANALYSIS_MODE,
+        ))
+        if any(results.values()):
+            raise Exception(f"{sum(1 for e in results.values() if e)} of {len(results)} accounts failed")
         print("Scheduled job completed successfully")
         if LOGFIRE_ENABLED:
             logfire.info("Scheduled job completed successfully")
@@ -944,18 +1972,40 @@ def scheduled_job():
 @click_cli.option('--local', is_flag=True, help='Use local assignments.txt instead of scraping website')
 @click_cli.option('--email', is_flag=True, help='Send analysis via email')
 @click_cli.option('--schedule', is_flag=True, help='Schedule to run daily at 3:00 PM')
-def cli(local, email, schedule):
+@click_cli.option('--html-file', 'html_file', type=click_cli.Path(exists=True, dir_okay=False), default=None,
+                  help='Parse a saved assignments iframe snapshot instead of scraping website')
+@click_cli.option('--backend', type=click_cli.Choice(['chrome', 'http']), default=None,
+                  help='Scraping backend (default: SCRAPE_BACKEND env or chrome); http falls back to chrome')
+@click_cli.option('--accounts', 'accounts_file', type=click_cli.Path(exists=True, dir_okay=False), default=None,
+                  help='JSON list of student accounts to check concurrently (default: ACCOUNTS_FILE env)')
+@click_cli.option('--workers', type=int, default=None,
+                  help='Concurrent students in multi-account mode (default: SCRAPE_WORKERS env or 3)')
+@click_cli.option('--all-cycles', 'all_cycles', is_flag=True, default=None,
+                  help='Fetch every grading cycle after one login, tagged "Cycle: <n>" (default: ALL_CYCLES env)')
+@click_cli.option('--analysis', 'analysis_mode', type=click_cli.Choice(['full', 'changes', 'local']), default=None,
+                  help='LLM analysis of every assignment, only changes since the previous scrape, or a local report '
+                       'without an LLM (default: ANALYSIS_MODE env or full)')
+def cli(local, email, schedule, html_file, backend, accounts_file, workers, all_cycles, analysis_mode):
     if LOGFIRE_ENABLED:
         with logfire.span("cli"):
             logfire.info("Starting CLI")
     else:
         print("Starting CLI")
     """Grade Checker Application"""
+    global ACCOUNTS_FILE, SCRAPE_WORKERS, ALL_CYCLES, ANALYSIS_MODE
+    ACCOUNTS_FILE = accounts_file or ACCOUNTS_FILE
+    ANALYSIS_MODE = analysis_mode or ANALYSIS_MODE
+    SCRAPE_WORKERS = workers or SCRAPE_WORKERS
+    ALL_CYCLES = all_cycles or ALL_CYCLES
     if schedule:
+        # Long-lived process: keep Chrome warm between runs instead of cold-starting each time
+        enable_warm_browser()
         print("Setting up scheduled job to run daily at 3:00 PM...")
         if LOGFIRE_ENABLED:
             logfire.info("Setting up scheduled job to run daily at 3:00 PM...")
         scheduler.every().day.at("15:00").do(scheduled_job)
+        # Retry reports whose delivery failed (outbox.py backoff decides which are due)
+        scheduler.every(5).minutes.do(deliver_outbox)
         #scheduler.every(5).minutes.do(scheduled_job)
         print(f"Job scheduled. Current time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
         if LOGFIRE_ENABLED:
@@ -972,66 +2022,25 @@ def cli(local, email, schedule):
                 logfire.info("Scheduler stopped by user")
             sys.exit(0)
     else:
+        if ACCOUNTS_FILE and (local or html_file):
+            print("\nError: --local/--html-file cannot be combined with multi-account mode")
+            sys.exit(1)
+        print("Starting grade check...")
+        if LOGFIRE_ENABLED:
+            logfire.info("Starting grade check...")
         try:
-            print("Starting grade check...")
-            if LOGFIRE_ENABLED:
-                logfire.info("Starting grade check...")
-            
-            if not local:
-                print("Scraping website for assignments...")
-                if LOGFIRE_ENABLED:
-                    logfire.info("Scraping website for assignments...")
-                credentials = get_credentials()
-                login_to_website(**credentials)
-                print("Website scraping complete.")
-                if LOGFIRE_ENABLED:
-                    logfire.info("Website scraping complete.")
-            else:
-                print("Using local assignments file...")
-                if LOGFIRE_ENABLED:
-                    logfire.info("Using local assignments file...")
-            
-            # Read the saved assignments
-            print("Reading assignments file...")
-            if LOGFIRE_ENABLED:
-                logfire.info("Reading assignments file...")
-            path = ASSIGNMENTS_PATH
-            if local and not os.path.exists(path):
-                # For local testing fall back to the sample file baked into the image
-                path = 'assignments.txt'
-            with open(path, 'r') as f:
-                assignments_content = f.read()
-            
-            print("Sending assignments to LLM for analysis...")
-            if LOGFIRE_ENABLED:
-                logfire.info("Sending assignments to LLM for analysis...")
-            try:
-                analysis = invoke_llm(assignments_content)
-                print("\nAnalysis complete!")
-                # Avoid printing analysis HTML (may contain PII) unless explicitly allowed
-                if not SAFE_LOGS:
-                    print(analysis)
-                if LOGFIRE_ENABLED:
-                    logfire.info("Analysis complete!")
-                
-                if email:
-                    print("\nSending analysis via email...")
-                    if LOGFIRE_ENABLED:
-                        logfire.info("Sending analysis via email...")
-                    send_email(analysis)
-                
-                #sys.exit(0)  # Exit successfully
-            except Exception as e:
-                print(f"\nError during LLM analysis: {str(e)}")
-                if LOGFIRE_ENABLED:
-                    logfire.error(f"LLM analysis failed: {str(e)}")
-                sys.exit(1)  # Exit with error
-            
+            results = _run_async(run_grade_check(
+                accounts=load_accounts() if ACCOUNTS_FILE else None,
+                email=email, backend=backend, all_cycles=ALL_CYCLES, analysis_mode=ANALYSIS_MODE,
+                local=local, html_file=html_file,
+            ))
         except Exception as e:
             print(f"\nError: {str(e)}")
             if LOGFIRE_ENABLED:
                 logfire.error(f"Grade check failed: {str(e)}")
             sys.exit(1)  # Exit with error
+        if any(results.values()):
+            sys.exit(1)
 
 if __name__ == "__main__":
     if LOGFIRE_ENABLED:
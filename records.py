@@ -0,0 +1,244 @@
+"""Typed records for scraped HAC data and their compact on-disk form.
+
+Extraction produces `Course` records holding their `Assignment`s; course name and class grade are
+stored once per course instead of on every row. The "Course: X | Class Grade: Y | Assignment: ..."
+text lines that the prompt and older files use are rendered from the records on demand
+(render_lines) and can be read back (parse_lines). Only the text round-trip is lossless: lines
+not in that format (e.g. the page text in the sample assignments.txt) come back as unstructured
+Course.raw, not as Assignment rows.
+
+    python records.py /tmp/assignments.txt   # print the text lines of a saved file
+"""
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+RECORDS_FORMAT = "hac-records"
+RECORDS_VERSION = 1
+
+_LINE_KEYS = ("Course", "Class Grade", "Assignment", "Due", "Category", "Score", "Percent")
+
+
+def parse_date(text):
+    """'09/02/2025' -> date(2025, 9, 2); None for blanks and anything else."""
+    try:
+        return datetime.strptime(text.strip(), "%m/%d/%Y").date()
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_number(text):
+    """First number in '71.00', '93.00%' or 'Cycle Average 45.00%'; None when there is none."""
+    m = re.search(r'-?\d+(?:\.\d+)?', text or "")
+    return float(m.group(0)) if m else None
+
+
+def is_missing(score_text):
+    """HAC marks missing work as 'M' or 'M - Missing' in the score column."""
+    t = (score_text or "").strip().upper()
+    return t == "M" or t.startswith("M -") or "MISSING" in t
+
+
+def format_assignment_line(course, class_grade, assignment, date_due, category, score, percent):
+    """Build a compact line suitable for LLM prompt; empty fields are omitted."""
+    parts = []
+    if course: parts.append(f"Course: {course}")
+    if class_grade: parts.append(f"Class Grade: {class_grade}")
+    if assignment: parts.append(f"Assignment: {assignment}")
+    if date_due: parts.append(f"Due: {date_due}")
+    if category: parts.append(f"Category: {category}")
+    if score: parts.append(f"Score: {score}")
+    if percent: parts.append(f"Percent: {percent}")
+    return " | ".join(parts)
+
+
+@dataclass(frozen=True, slots=True)
+class Assignment:
+    """One gradebook row. The *_text fields are exactly what HAC showed; the rest are parsed from them."""
+
+    title: str
+    due_text: str = ""
+    category: str = ""
+    score_text: str = ""
+    percent_text: str = ""
+    due: date | None = field(init=False, compare=False)
+    score: float | None = field(init=False, compare=False)
+    percent: float | None = field(init=False, compare=False)
+    missing: bool = field(init=False, compare=False)
+
+    def __post_init__(self):
+        missing = is_missing(self.score_text)
+        object.__setattr__(self, "due", parse_date(self.due_text))
+        object.__setattr__(self, "score", None if missing else parse_number(self.score_text))
+        object.__setattr__(self, "percent", parse_number(self.percent_text))
+        object.__setattr__(self, "missing", missing)
+
+
+@dataclass(frozen=True, slots=True)
+class Course:
+    """One course section of the Assignments page.
+
+    `raw` holds unstructured text from the last-resort extraction fallbacks (and old free-text files);
+    it is rendered verbatim after the course's own lines.
+    """
+
+    name: str
+    class_grade_text: str = ""
+    updated: str = ""
+    cycle: str = ""
+    assignments: tuple[Assignment, ...] = ()
+    raw: tuple[str, ...] = ()
+    class_grade: float | None = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "class_grade", parse_number(self.class_grade_text))
+
+    @classmethod
+    def unstructured(cls, lines):
+        return cls(name="", raw=tuple(lines))
+
+
+def course_lines(course):
+    """The text lines for one course, identical to what the scrapers used to write."""
+    prefix = f"Cycle: {course.cycle} | " if course.cycle else ""
+    lines = []
+    # Header line for the course with its class grade so it's always captured
+    if course.name and course.class_grade_text:
+        lines.append(f"{prefix}Course: {course.name} | Class Grade: {course.class_grade_text}")
+    for a in course.assignments:
+        line = format_assignment_line(
+            course.name, course.class_grade_text, a.title, a.due_text, a.category, a.score_text, a.percent_text
+        )
+        if line:
+            lines.append(prefix + line)
+    lines.extend(course.raw)
+    return lines
+
+
+def render_lines(courses):
+    return [line for course in courses for line in course_lines(course)]
+
+
+def count_lines(courses):
+    """len(render_lines(courses)) without building the strings."""
+    total = 0
+    for c in courses:
+        total += (1 if c.name and c.class_grade_text else 0) + len(c.raw)
+        # A row renders to nothing only when it and its course are entirely blank
+        total += sum(1 for a in c.assignments if c.name or c.class_grade_text or a.title or a.due_text
+                     or a.category or a.score_text or a.percent_text)
+    return total
+
+
+def _split_line(line):
+    """'Cycle: 1 | Course: X | ...' -> (cycle, {key: value}); None when the line has no Course field."""
+    cycle = ""
+    if line.startswith("Cycle: "):
+        cycle, _, line = line[len("Cycle: "):].partition(" | ")
+    fields, last = {}, None
+    for part in line.split(" | "):
+        key, sep, value = part.partition(": ")
+        if sep and key in _LINE_KEYS and key not in fields:
+            fields[key] = value
+            last = key
+        elif last is not None:
+            # A literal " | " inside a value (e.g. an assignment title)
+            fields[last] += " | " + part
+        else:
+            return None
+    return (cycle, fields) if "Course" in fields else None
+
+
+def iter_parse_lines(lines):
+    """Rebuild Course records from text lines, yielding each course once its lines are done.
+
+    Consecutive lines of the same course are grouped. Lines that aren't in the "Course: ..." format are
+    kept as unstructured text, so render_lines(parse_lines(lines)) reproduces the input.
+    """
+    current, rows, raw = None, [], []
+    row_fields = ("Assignment", "Due", "Category", "Score", "Percent")
+    for line in lines:
+        split = _split_line(line)
+        if split is None:
+            if current is not None:
+                yield Course(name=current[1], class_grade_text=current[2], cycle=current[0], assignments=tuple(rows))
+                current, rows = None, []
+            raw.append(line)
+            continue
+        cycle, fields = split
+        key = (cycle, fields["Course"], fields.get("Class Grade", ""))
+        if key != current or raw:
+            if current is not None:
+                yield Course(name=current[1], class_grade_text=current[2], cycle=current[0], assignments=tuple(rows))
+            if raw:
+                yield Course.unstructured(raw)
+            current, rows, raw = key, [], []
+            if key[2] and not any(k in fields for k in row_fields):
+                # The course header line; it is re-rendered from the record
+                continue
+        rows.append(Assignment(
+            title=fields.get("Assignment", ""),
+            due_text=fields.get("Due", ""),
+            category=fields.get("Category", ""),
+            score_text=fields.get("Score", ""),
+            percent_text=fields.get("Percent", ""),
+        ))
+    if current is not None:
+        yield Course(name=current[1], class_grade_text=current[2], cycle=current[0], assignments=tuple(rows))
+    if raw:
+        yield Course.unstructured(raw)
+
+
+def parse_lines(lines):
+    return list(iter_parse_lines(lines))
+
+
+def pack_course(c):
+    """[name, class grade, last updated, cycle, rows, raw] with each row as its displayed cells."""
+    return [
+        c.name, c.class_grade_text, c.updated, c.cycle,
+        [[a.title, a.due_text, a.category, a.score_text, a.percent_text] for a in c.assignments],
+        list(c.raw),
+    ]
+
+
+def unpack_course(packed):
+    name, grade, updated, cycle, rows, raw = packed
+    return Course(
+        name=name, class_grade_text=grade, updated=updated, cycle=cycle,
+        assignments=tuple(Assignment(*row) for row in rows),
+        raw=tuple(raw),
+    )
+
+
+def dumps(courses, timestamp=None):
+    """Compact JSON: each course's name/grade/stamp/cycle once, rows as arrays of the displayed cells."""
+    return json.dumps(
+        {
+            "format": RECORDS_FORMAT,
+            "version": RECORDS_VERSION,
+            "timestamp": timestamp or time.strftime("%Y-%m-%d %H:%M:%S"),
+            "courses": [pack_course(c) for c in courses],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def loads(text):
+    """Inverse of dumps(); returns (courses, timestamp)."""
+    data = json.loads(text)
+    if data.get("format") != RECORDS_FORMAT:
+        raise ValueError("Not a hac-records document")
+    return [unpack_course(packed) for packed in data.get("courses", [])], data.get("timestamp")
+
+
+if __name__ == "__main__":
+    from assignments_io import iter_lines
+
+    for saved in sys.argv[1:]:
+        for line in iter_lines(saved):
+            print(line)
@@ -0,0 +1,98 @@
+"""Per-host memory of which selector strategy worked, so later runs try the winner first.
+
+The profile is a small JSON file (SELECTOR_PROFILE_PATH):
+
+    {
+      "hosts": {
+        "hac.example.org": {
+          "winners": {"username": "id:LogOnDetails_UserName", "class_grade": "hdr_id"},
+          "selectors": {"username": [["css selector", "input#StudentId"]]}
+        }
+      },
+      "selectors": {"submit": [["xpath", "//a[@id='signin']"]]}
+    }
+
+"winners" is maintained automatically. "selectors" (top-level for every host, or per host) holds
+district-specific candidates as [By strategy, value] pairs; they are tried before the built-in ones
+and need no code change.
+"""
+import json
+import os
+import threading
+
+SELECTOR_PROFILE_PATH = os.getenv('SELECTOR_PROFILE_PATH', '/tmp/hac_selector_profile.json')
+
+
+def selector_key(by, sel):
+    return f"{by}:{sel}"
+
+
+class SelectorProfile:
+    def __init__(self, path=None):
+        self.path = path or SELECTOR_PROFILE_PATH
+        self._lock = threading.Lock()
+        self.data = {"hosts": {}, "selectors": {}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                self.data.update(loaded)
+        except (OSError, ValueError):
+            pass
+
+    def _host(self, host):
+        return self.data.setdefault("hosts", {}).setdefault(host or "", {})
+
+    def winner(self, host, kind):
+        with self._lock:
+            return self._host(host).get("winners", {}).get(kind)
+
+    def extra_selectors(self, host, kind):
+        """District-specific (By, value) candidates from the profile: host-specific first, then global."""
+        with self._lock:
+            entries = list(self._host(host).get("selectors", {}).get(kind, []))
+            entries += list(self.data.get("selectors", {}).get(kind, []))
+        return [(by, sel) for by, sel in entries]
+
+    def ordered(self, host, kind, keys):
+        """Strategy keys with the learned winner first; the rest keep their built-in order."""
+        best = self.winner(host, kind)
+        if best in keys:
+            return [best] + [k for k in keys if k != best]
+        return list(keys)
+
+    def ordered_selectors(self, host, kind, selectors):
+        """(By, value) candidates: profile extras plus built-ins, with the learned winner first."""
+        candidates = self.extra_selectors(host, kind) + [c for c in selectors]
+        by_key = {}
+        for by, sel in candidates:
+            by_key.setdefault(selector_key(by, sel), (by, sel))
+        return [by_key[k] for k in self.ordered(host, kind, list(by_key))]
+
+    def record(self, host, kind, key):
+        """Remember the strategy that succeeded; only writes the file when the winner changes."""
+        if not key:
+            return
+        with self._lock:
+            winners = self._host(host).setdefault("winners", {})
+            if winners.get(kind) == key:
+                return
+            winners[kind] = key
+            snapshot = json.dumps(self.data, indent=2, sort_keys=True)
+        try:
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: could not save selector profile: {e}")
+
+
+_profile = None
+
+
+def get_selector_profile():
+    global _profile
+    if _profile is None:
+        _profile = SelectorProfile()
+    return _profile
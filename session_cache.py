@@ -0,0 +1,107 @@
+"""Encrypted on-disk cache of authenticated HAC cookies, shared by the Chrome and HTTP backends.
+
+Entries are Fernet-encrypted with a key derived from SESSION_CACHE_KEY (or, when unset, from the
+account's own password) and written with mode 0600; cookies are never written in plain text.
+"""
+import base64
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urljoin
+
+import requests
+from cryptography.fernet import Fernet, InvalidToken
+
+SESSION_CACHE = os.getenv('SESSION_CACHE', 'true').lower() in ('1', 'true', 'yes')
+SESSION_CACHE_DIR = os.getenv('SESSION_CACHE_DIR', '/tmp/hac-sessions')
+# HAC expires idle sessions server-side; don't bother validating anything older than this
+SESSION_CACHE_MAX_AGE_SEC = int(os.getenv('SESSION_CACHE_MAX_AGE_SEC', str(8 * 3600)))
+
+CLASSWORK_PATH = "/HomeAccess/Classes/Classwork"
+
+_COOKIE_KEYS = ("name", "value", "domain", "path", "secure", "httpOnly", "expiry")
+
+
+def _fernet(url, username, secret):
+    salt = hashlib.sha256(f"{url}|{username}".encode("utf-8")).digest()
+    key = hashlib.pbkdf2_hmac("sha256", secret.encode("utf-8"), salt, 200_000)
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+class SessionCache:
+    """Per-account cookie cache; load() returns None when disabled, missing, stale or undecryptable."""
+
+    def __init__(self, url, username, password, cache_dir=None, max_age=None):
+        self.url = url
+        self.max_age = SESSION_CACHE_MAX_AGE_SEC if max_age is None else max_age
+        account = hashlib.sha256(f"{url}|{username}".encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir or SESSION_CACHE_DIR, f"{account}.bin")
+        secret = os.getenv('SESSION_CACHE_KEY') or password or ""
+        self.enabled = SESSION_CACHE and bool(secret)
+        self._fernet = _fernet(url, username, secret) if self.enabled else None
+
+    def load(self):
+        if not self.enabled or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                entry = json.loads(self._fernet.decrypt(f.read()))
+        except (InvalidToken, ValueError, OSError):
+            self.clear()
+            return None
+        if time.time() - entry.get("saved_at", 0) > self.max_age:
+            self.clear()
+            return None
+        return entry.get("cookies") or None
+
+    def save(self, cookies):
+        if not self.enabled or not cookies:
+            return
+        cookies = [{k: c[k] for k in _COOKIE_KEYS if k in c} for c in cookies]
+        token = self._fernet.encrypt(json.dumps({"saved_at": time.time(), "cookies": cookies}).encode("utf-8"))
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def cookies_from_jar(jar):
+    """Selenium-style cookie dicts from a requests cookie jar."""
+    cookies = []
+    for c in jar:
+        cookie = {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "secure": bool(c.secure)}
+        if c.expires:
+            cookie["expiry"] = int(c.expires)
+        cookies.append(cookie)
+    return cookies
+
+
+def load_into_jar(jar, cookies):
+    for c in cookies:
+        jar.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"), secure=c.get("secure", False))
+
+
+def session_is_valid(url, cookies, session=None, timeout=10):
+    """One GET of the Classwork page without following redirects: 200 means the cookies are still logged in."""
+    if not cookies:
+        return False
+    probe = session or requests.Session()
+    if session is None:
+        load_into_jar(probe.cookies, cookies)
+    try:
+        resp = probe.get(urljoin(url, CLASSWORK_PATH), allow_redirects=False, timeout=timeout)
+        return resp.status_code == 200 and "LogOnDetails.Password" not in resp.text
+    except requests.RequestException:
+        return False
+    finally:
+        if session is None:
+            probe.close()
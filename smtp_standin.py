@@ -0,0 +1,119 @@
+"""Local SMTP stand-in, for exercising email delivery (outbox.py) without a mail server.
+
+Speaks just enough plain-text SMTP for smtplib: EHLO/HELO, AUTH (any credentials), MAIL, RCPT, DATA,
+RSET, NOOP and QUIT. Received messages, connections and logins are recorded on the server object.
+Failures can be injected to exercise retries: `fail_next` answers that many DATA commands with a
+transient 451, `drop_next` closes that many connections right after the greeting.
+
+    python smtp_standin.py --port 2525
+    SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_SSL=false python pydanticai_gradechecker.py --local --email
+"""
+import argparse
+import socketserver
+import threading
+
+
+class SMTPStandin(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        # (mail from, [recipients], message text)
+        self.messages = []
+        self.connections = 0
+        self.logins = 0
+        self.fail_next = 0
+        self.drop_next = 0
+        self.lock = threading.Lock()
+        super().__init__((host, port), _Handler)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def _take(self, name):
+        with self.lock:
+            if getattr(self, name) > 0:
+                setattr(self, name, getattr(self, name) - 1)
+                return True
+            return False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 smtp-standin ESMTP")
+        if server._take("drop_next"):
+            return
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            text = line.decode("utf-8", "replace").strip()
+            command = text.upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250-smtp-standin\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif command.startswith("AUTH"):
+                with server.lock:
+                    server.logins += 1
+                self.reply("235 2.7.0 Authentication successful")
+            elif command.startswith("MAIL FROM:"):
+                mail_from, recipients = text[10:].strip().strip("<>"), []
+                self.reply("250 ok")
+            elif command.startswith("RCPT TO:"):
+                recipients.append(text[8:].strip().strip("<>"))
+                self.reply("250 ok")
+            elif command == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                body = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b".\n", b""):
+                        break
+                    body.append(data.decode("utf-8", "replace"))
+                if server._take("fail_next"):
+                    self.reply("451 4.3.0 Temporary failure, try again later")
+                    continue
+                with server.lock:
+                    server.messages.append((mail_from, recipients, "".join(body)))
+                self.reply("250 2.0.0 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                # RSET, NOOP and anything else
+                self.reply("250 ok")
+
+
+def start_smtp_standin(host="127.0.0.1", port=0):
+    """Start the stand-in in a daemon thread; returns the server (its .port is the bound port)."""
+    server = SMTPStandin(host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    args = parser.parse_args()
+
+    srv = start_smtp_standin(args.host, args.port)
+    print(f"SMTP stand-in listening; SMTP_HOST={args.host} SMTP_PORT={srv.port} SMTP_SSL=false")
+    try:
+        seen = 0
+        while True:
+            threading.Event().wait(1)
+            with srv.lock:
+                new = srv.messages[seen:]
+                seen = len(srv.messages)
+            for mail_from, recipients, _ in new:
+                print(f"Message from {mail_from} to {', '.join(recipients)}")
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,156 @@
+"""Change set between two scrapes, so the "changes" analysis mode only sends what moved.
+
+Rows are matched by (cycle, course, assignment, due date); repeated titles with the same due date
+are matched in page order.
+"""
+from dataclasses import dataclass
+
+from history_store import HISTORY_DB, HistoryStore, content_hash
+
+# Render order in the prompt, most urgent first
+CHANGE_KINDS = (
+    "newly_missing",
+    "cleared_missing",
+    "score",
+    "new",
+    "removed",
+    "class_grade",
+    "course_added",
+    "course_removed",
+)
+
+_KIND_LABELS = {
+    "newly_missing": "Newly missing",
+    "cleared_missing": "No longer missing",
+    "score": "Score changed",
+    "new": "New assignment",
+    "removed": "Removed assignment",
+    "class_grade": "Class grade",
+    "course_added": "New course",
+    "course_removed": "Course removed",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    kind: str
+    course: str
+    cycle: str = ""
+    assignment: str = ""
+    due_text: str = ""
+    old: str = ""
+    new: str = ""
+    delta: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeSet:
+    changes: tuple[Change, ...]
+    previous_at: str | None = None
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def of_kind(self, kind):
+        return [c for c in self.changes if c.kind == kind]
+
+    def counts(self):
+        return {kind: n for kind in CHANGE_KINDS if (n := len(self.of_kind(kind)))}
+
+
+def _rows(courses):
+    rows, seen = {}, {}
+    for course in courses:
+        for a in course.assignments:
+            base = (course.cycle, course.name, a.title, a.due_text)
+            n = seen[base] = seen.get(base, -1) + 1
+            rows[base + (n,)] = a
+    return rows
+
+
+def _grades(courses):
+    return {(c.cycle, c.name): c for c in courses if c.name}
+
+
+def diff_snapshots(old, new, previous_at=None):
+    """ChangeSet turning the `old` Course list into `new`."""
+    changes = []
+    old_rows, new_rows = _rows(old), _rows(new)
+    for key, a in new_rows.items():
+        cycle, course, title, due, _ = key
+        before = old_rows.get(key)
+        if before is None:
+            kind = "newly_missing" if a.missing else "new"
+            changes.append(Change(kind, course, cycle, title, due, "", a.score_text))
+        elif a.missing and not before.missing:
+            changes.append(Change("newly_missing", course, cycle, title, due, before.score_text, a.score_text))
+        elif before.missing and not a.missing:
+            changes.append(Change("cleared_missing", course, cycle, title, due, before.score_text, a.score_text))
+        elif a.score_text != before.score_text:
+            delta = a.score - before.score if a.score is not None and before.score is not None else None
+            changes.append(Change("score", course, cycle, title, due, before.score_text, a.score_text, delta))
+    for key, a in old_rows.items():
+        if key not in new_rows:
+            cycle, course, title, due, _ = key
+            changes.append(Change("removed", course, cycle, title, due, a.score_text, ""))
+
+    old_grades, new_grades = _grades(old), _grades(new)
+    for key, c in new_grades.items():
+        before = old_grades.get(key)
+        if before is None:
+            changes.append(Change("course_added", c.name, c.cycle, new=c.class_grade_text))
+        elif c.class_grade_text != before.class_grade_text:
+            delta = c.class_grade - before.class_grade if c.class_grade is not None and before.class_grade is not None else None
+            changes.append(Change("class_grade", c.name, c.cycle, old=before.class_grade_text, new=c.class_grade_text, delta=delta))
+    for key, c in old_grades.items():
+        if key not in new_grades:
+            changes.append(Change("course_removed", c.name, c.cycle, old=c.class_grade_text))
+
+    order = {kind: i for i, kind in enumerate(CHANGE_KINDS)}
+    return ChangeSet(tuple(sorted(changes, key=lambda c: order[c.kind])), previous_at)
+
+
+def render_changes(changes):
+    """One compact line per change for the prompt (or a log)."""
+    lines = []
+    for c in changes.changes:
+        parts = [_KIND_LABELS[c.kind]]
+        if c.cycle:
+            parts.append(f"Cycle: {c.cycle}")
+        parts.append(f"Course: {c.course}")
+        if c.assignment:
+            parts.append(f"Assignment: {c.assignment}")
+        if c.due_text:
+            parts.append(f"Due: {c.due_text}")
+        if c.old and c.new:
+            move = f"{c.old} -> {c.new}"
+            if c.delta is not None:
+                move += f" ({c.delta:+.2f})"
+            parts.append(move)
+        elif c.new:
+            parts.append(c.new)
+        elif c.old:
+            parts.append(f"was {c.old}")
+        lines.append(" | ".join(parts))
+    return lines
+
+
+def changes_since_last(student, courses, path=None):
+    """ChangeSet from the student's previous stored scrape to `courses`; None when there is no history to diff.
+
+    The current scrape is normally already appended (store_assignments), in which case the baseline is
+    the snapshot before it.
+    """
+    if not (path or HISTORY_DB) or not student:
+        return None
+    with HistoryStore(path) as store:
+        latest_at, latest = store.latest(student)
+        if latest_at is None:
+            return None
+        if content_hash(latest) == content_hash(courses):
+            previous_at, previous = store.previous(student)
+            if previous_at is None:
+                return None
+        else:
+            previous_at, previous = latest_at, latest
+    return diff_snapshots(previous, courses, previous_at)
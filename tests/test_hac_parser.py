@@ -0,0 +1,86 @@
+import json
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from hac_parser import parse_course_sections, parse_courses_html, rows_fingerprint
+from hac_standin import SAMPLE_COURSES, SAMPLE_RUNS, render_assignments_page
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _js_rows_fingerprint():
+    """The rowsFingerprint arrow function from _BULK_EXTRACT_JS, read from the source."""
+    source = (ROOT / "pydanticai_gradechecker.py").read_text(encoding="utf-8")
+    match = re.search(r"^const rowsFingerprint = .*?^};$", source, re.M | re.S)
+    assert match, "rowsFingerprint not found in _BULK_EXTRACT_JS"
+    return match.group(0)
+
+
+def test_parse_course_sections():
+    html = render_assignments_page(runs=SAMPLE_RUNS, selected="2-2026")
+    cycle, sections = parse_course_sections(html)
+    assert cycle == "2-2026"
+    assert [s["course"] for s in sections] == [c[0] for c in SAMPLE_COURSES]
+    first = sections[0]
+    name, updated, average, rows = SAMPLE_COURSES[0]
+    assert first["stamp"] == updated
+    assert first["class_grade"] == f"{average}%"
+    assert first["fingerprint"].startswith(f"{len(rows)}:")
+    record = first["record"]
+    assert record.name == name and record.updated == updated
+    assert [a.title for a in record.assignments] == [r[2] for r in rows]
+
+
+def test_parse_course_sections_skips_known_courses():
+    html = render_assignments_page(runs=SAMPLE_RUNS, selected="2-2026")
+    _, sections = parse_course_sections(html)
+    known = {
+        "cycle": "2-2026",
+        "stamps": {s["course"]: s["stamp"] for s in sections},
+        "fingerprints": {s["course"]: s["fingerprint"] for s in sections[:1]},
+    }
+    _, again = parse_course_sections(html, known)
+    assert again[0]["record"] is None
+    assert all(s["record"] is not None for s in again[1:])
+    # Another cycle never reuses the cache
+    _, other = parse_course_sections(html, dict(known, cycle="1-2026"))
+    assert all(s["record"] is not None for s in other)
+
+
+def test_selected_cycle_defaults_to_first_option():
+    html = render_assignments_page(runs=SAMPLE_RUNS, selected=None)
+    cycle, _ = parse_course_sections(html)
+    assert cycle == "ALL"
+    assert parse_course_sections(render_assignments_page())[0] is None
+
+
+def test_rows_fingerprint_ignores_whitespace():
+    rows = [["09/03/2025", "River Valley Test", "92.00"], ["09/04/2025", "Journal #1", ""]]
+    spaced = [["\n 09/03/2025 ", "River  Valley\tTest", "92.00"], ["09/04/2025", " Journal #1 ", "  "]]
+    assert rows_fingerprint(rows) == rows_fingerprint(spaced)
+    assert rows_fingerprint(rows) != rows_fingerprint(rows[:1])
+    assert rows_fingerprint([]) == "0:811c9dc5"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_rows_fingerprint_matches_bulk_extract_js():
+    samples = [
+        [],
+        [[""]],
+        [["09/03/2025", "River Valley Test", "Tests-Projects", "92.00", "100.00"]],
+        [["a b", "c"], ["Proyecto ñ", "M - Missing"], ["Wire & Taping", "😀"]],
+    ]
+    samples += [[[cell for cell in row[:4]] for row in rows] for _, _, _, rows in SAMPLE_COURSES]
+    script = _js_rows_fingerprint() + "\nconst samples = JSON.parse(require('fs').readFileSync(0, 'utf8'));\n" \
+        "console.log(JSON.stringify(samples.map(rowsFingerprint)));"
+    out = subprocess.run(["node", "-e", script], input=json.dumps(samples), capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == [rows_fingerprint(rows) for rows in samples]
+
+
+def test_parse_courses_html_matches_sections():
+    html = render_assignments_page()
+    assert [c.name for c in parse_courses_html(html)] == [c[0] for c in SAMPLE_COURSES]
@@ -0,0 +1,66 @@
+import os
+import time
+
+from llm_cache import LLMCache, cache_key, cached_completion
+
+
+def test_cache_key_covers_every_input():
+    base = cache_key("prompt", "system", "model", {"temperature": 0})
+    assert base == cache_key("prompt", "system", "model", {"temperature": 0})
+    assert len({base, cache_key("prompt!", "system", "model", {"temperature": 0}),
+                cache_key("prompt", "system!", "model", {"temperature": 0}),
+                cache_key("prompt", "system", "model!", {"temperature": 0}),
+                cache_key("prompt", "system", "model", {"temperature": 1})}) == 5
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = LLMCache(str(tmp_path), ttl_sec=60, max_mb=1, enabled=True)
+    assert cache.get("k") is None
+    cache.put("k", "<p>report</p>")
+    assert cache.get("k") == "<p>report</p>"
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1 and cache.stats["stores"] == 1
+    assert cache.totals()["hits"] == 1
+
+
+def test_expired_entries_are_removed(tmp_path):
+    cache = LLMCache(str(tmp_path), ttl_sec=60, max_mb=1, enabled=True)
+    cache.put("k", "old")
+    path = cache._path("k")
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()
+        body = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{time.time() - 61}\n{body}")
+    assert cache.get("k") is None
+    assert not os.path.exists(path)
+    assert cache.stats["expired"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    entry = "x" * 4000
+    cache = LLMCache(str(tmp_path), ttl_sec=3600, max_mb=10_000 / (1024 * 1024), enabled=True)
+    for i, key in enumerate(("a", "b")):
+        cache.put(key, entry)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    # Reading "a" makes it the most recently used, so "b" goes first
+    assert cache.get("a") == entry
+    cache.put("c", entry)
+    assert cache.get("b") is None
+    assert cache.get("a") == entry and cache.get("c") == entry
+    assert cache.stats["evictions"] == 1
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache"), enabled=False)
+    cache.put("k", "html")
+    assert cache.get("k") is None
+    assert not os.path.exists(cache.dir)
+
+
+def test_cached_completion_only_stores_answers(tmp_path):
+    cache = LLMCache(str(tmp_path), ttl_sec=60, max_mb=1, enabled=True)
+    calls = []
+    assert cached_completion(cache, "p", "s", "m", None, lambda: calls.append(1) or "") == ("", False)
+    assert cached_completion(cache, "p", "s", "m", None, lambda: calls.append(1) or "html") == ("html", False)
+    assert cached_completion(cache, "p", "s", "m", None, lambda: calls.append(1) or "new") == ("html", True)
+    assert len(calls) == 2
@@ -0,0 +1,91 @@
+import smtplib
+from email.mime.text import MIMEText
+
+import pytest
+
+from outbox import Outbox, _permanent
+from smtp_standin import start_smtp_standin
+
+
+@pytest.fixture
+def smtp():
+    server = start_smtp_standin()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _outbox(tmp_path, smtp, **kwargs):
+    kwargs.setdefault("max_attempts", 3)
+    return Outbox(str(tmp_path / "outbox"), host="127.0.0.1", port=smtp.port, use_ssl=False, starttls=False,
+                  username="sender@example.com", password="secret", retry_base=60, retry_max=600,
+                  timeout=5, **kwargs)
+
+
+def _message(subject):
+    msg = MIMEText("<p>report</p>", "html")
+    msg["Subject"] = subject
+    return msg
+
+
+def test_batch_goes_out_over_one_connection(tmp_path, smtp):
+    outbox = _outbox(tmp_path, smtp)
+    for subject in ("First", "Second"):
+        outbox.enqueue("sender@example.com", ["parent@example.com"], _message(subject))
+    result = outbox.deliver()
+    assert (result.sent, result.retrying, result.failed, result.pending) == (2, 0, 0, 0)
+    assert smtp.connections == 1 and smtp.logins == 1
+    assert ["Subject: First" in m[2] for m in smtp.messages] == [True, False]
+
+
+def test_transient_failure_is_retried_with_backoff(tmp_path, smtp):
+    outbox = _outbox(tmp_path, smtp)
+    outbox.enqueue("sender@example.com", ["parent@example.com"], _message("Report"))
+    smtp.fail_next = 1
+    result = outbox.deliver(now=1_000_000_000_000)
+    assert (result.sent, result.retrying, result.pending) == (0, 1, 1)
+    (_, entry), = outbox.pending()
+    assert entry["attempts"] == 1 and "451" in entry["last_error"]
+    assert entry["next_attempt"] == 1_000_000_000_060
+    # Not due yet, then due
+    assert outbox.deliver(now=1_000_000_000_059).sent == 0
+    assert outbox.deliver(now=1_000_000_000_060).sent == 1
+    assert len(smtp.messages) == 1
+
+
+def test_message_is_dead_lettered_after_max_attempts(tmp_path, smtp):
+    outbox = _outbox(tmp_path, smtp, max_attempts=2)
+    outbox.enqueue("sender@example.com", ["parent@example.com"], _message("Report"))
+    smtp.fail_next = 10
+    now = 1_000_000_000_000
+    assert outbox.deliver(now=now).retrying == 1
+    result = outbox.deliver(now=now + 60)
+    assert (result.failed, result.pending) == (1, 0)
+    (_, entry), = outbox.failed()
+    assert entry["attempts"] == 2
+    assert outbox.retry_failed() == 1
+    smtp.fail_next = 0
+    assert outbox.deliver().sent == 1
+    assert outbox.failed() == []
+
+
+def test_connect_failure_backs_off_without_spending_attempts(tmp_path, smtp):
+    outbox = _outbox(tmp_path, smtp, max_attempts=1)
+    for subject in ("First", "Second"):
+        outbox.enqueue("sender@example.com", ["parent@example.com"], _message(subject))
+    smtp.drop_next = 1
+    now = 1_000_000_000_000
+    result = outbox.deliver(now=now)
+    assert (result.sent, result.retrying, result.failed) == (0, 2, 0)
+    assert result.errors[0].startswith("connect:")
+    entries = [entry for _, entry in outbox.pending()]
+    assert [(e["attempts"], e["connect_failures"], e["next_attempt"]) for e in entries] == [(0, 1, now + 60)] * 2
+    assert outbox.deliver(now=now + 60).sent == 2
+
+
+def test_permanent_errors():
+    assert _permanent(smtplib.SMTPDataError(554, b"rejected"))
+    assert _permanent(smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no such user")}))
+    assert not _permanent(smtplib.SMTPDataError(451, b"try again"))
+    assert not _permanent(smtplib.SMTPAuthenticationError(535, b"bad credentials"))
+    assert not _permanent(OSError("connection reset"))
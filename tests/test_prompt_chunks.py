@@ -0,0 +1,36 @@
+from prompt_chunks import _course_tokens, chunk_courses
+from records import Assignment, Course
+
+
+def _course(name, rows, raw=()):
+    return Course(name, "88.00%", assignments=tuple(
+        Assignment(f"Assignment {i}", "09/01/2025", "Daily", "90.00", "90.00%") for i in range(rows)
+    ), raw=tuple(raw))
+
+
+def test_small_input_is_one_chunk():
+    courses = [_course("English", 3), _course("Biology", 2)]
+    assert chunk_courses(courses, budget=10_000) == [courses]
+    assert chunk_courses([], budget=100) == []
+
+
+def test_chunks_respect_budget_and_keep_courses_whole():
+    courses = [_course(f"Course {i}", 4) for i in range(6)]
+    budget = _course_tokens(courses[0]) * 2 + 1
+    chunks = chunk_courses(courses, budget=budget)
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2]
+    assert [c for chunk in chunks for c in chunk] == courses
+    assert all(sum(_course_tokens(c) for c in chunk) <= budget for chunk in chunks)
+
+
+def test_oversized_course_is_split_between_rows():
+    big = _course("Geometry", 40, raw=["unparsed page text"])
+    budget = _course_tokens(_course("Geometry", 8))
+    chunks = chunk_courses([big], budget=budget)
+    pieces = [c for chunk in chunks for c in chunk]
+    assert len(pieces) > 2
+    assert all(p.name == "Geometry" for p in pieces)
+    assert tuple(a for p in pieces for a in p.assignments) == big.assignments
+    # The raw text travels once, without repeating the class grade
+    assert [p.raw for p in pieces if p.raw] == [big.raw]
+    assert all(sum(_course_tokens(c) for c in chunk) <= budget for chunk in chunks)
@@ -0,0 +1,45 @@
+import pytest
+
+from records import Assignment, Course, count_lines, dumps, loads, parse_lines, render_lines
+
+COURSES = [
+    Course("1210 - 12 English I", "84.50%", updated="9/12/2025", assignments=(
+        Assignment("Independent Reading Log", "09/12/2025", "Daily", "M", ""),
+        Assignment("Essay | Draft", "09/10/2025", "Major", "88.00", "88.00%"),
+    )),
+    Course("2201 - 4 Geometry", "68.40%", cycle="2", assignments=(
+        Assignment("1.5 Practice", "09/02/2025", "Daily", "M - Missing", ""),
+    )),
+    Course("6050 - 11 Health", "", assignments=(Assignment("Wellness Goals", "09/19/2025", "Daily"),)),
+    Course.unstructured(["Some page text", "that is not a row"]),
+]
+
+
+def test_dumps_loads_round_trip():
+    courses, timestamp = loads(dumps(COURSES, timestamp="2025-09-20 07:00:00"))
+    assert courses == COURSES
+    assert timestamp == "2025-09-20 07:00:00"
+    assert courses[1].assignments[0].missing
+    assert courses[0].class_grade == 84.5
+
+
+def test_loads_rejects_other_documents():
+    with pytest.raises(ValueError):
+        loads('{"format": "something-else"}')
+
+
+def test_text_lines_round_trip():
+    lines = render_lines(COURSES)
+    assert len(lines) == count_lines(COURSES)
+    parsed = parse_lines(lines)
+    assert render_lines(parsed) == lines
+    assert parsed[0].assignments[1].title == "Essay | Draft"
+    assert parsed[1].cycle == "2"
+    assert parsed[-1].raw == ("Some page text", "that is not a row")
+
+
+def test_lines_drop_the_last_updated_stamp():
+    # Only the text lines are lossy: they never carried the stamp
+    parsed = parse_lines(render_lines(COURSES[:1]))
+    assert parsed[0].updated == ""
+    assert parsed[0].assignments == COURSES[0].assignments
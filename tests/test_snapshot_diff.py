@@ -0,0 +1,57 @@
+from records import Assignment, Course
+from snapshot_diff import CHANGE_KINDS, diff_snapshots, render_changes
+
+OLD = [
+    Course("Geometry", "70.00%", assignments=(
+        Assignment("1.5 Practice", "09/02/2025", "Daily", "M"),
+        Assignment("1.6 Practice", "09/04/2025", "Daily", "80"),
+        Assignment("Unit 1 Quiz", "08/27/2025", "Quizzes", "78.50"),
+        Assignment("Warmup", "08/20/2025", "Daily", "100"),
+    )),
+    Course("Art I", "100.00%"),
+]
+NEW = [
+    Course("Geometry", "72.50%", assignments=(
+        Assignment("1.5 Practice", "09/02/2025", "Daily", "90"),
+        Assignment("1.6 Practice", "09/04/2025", "Daily", "M"),
+        Assignment("Unit 1 Quiz", "08/27/2025", "Quizzes", "82.00"),
+        Assignment("2.1 Practice", "09/10/2025", "Daily", ""),
+        Assignment("2.2 Practice", "09/11/2025", "Daily", "M"),
+    )),
+    Course("Spanish I", "95.00%"),
+]
+
+
+def test_diff_snapshots_kinds():
+    changes = diff_snapshots(OLD, NEW, previous_at="2025-09-19 07:00:00")
+    assert changes.previous_at == "2025-09-19 07:00:00"
+    assert changes.counts() == {
+        "newly_missing": 2, "cleared_missing": 1, "score": 1, "new": 1, "removed": 1,
+        "class_grade": 1, "course_added": 1, "course_removed": 1,
+    }
+    kinds = [c.kind for c in changes.changes]
+    assert kinds == sorted(kinds, key=CHANGE_KINDS.index)
+    score, = changes.of_kind("score")
+    assert (score.assignment, score.old, score.new, score.delta) == ("Unit 1 Quiz", "78.50", "82.00", 3.5)
+    grade, = changes.of_kind("class_grade")
+    assert grade.delta == 2.5
+
+
+def test_diff_snapshots_identical_is_empty():
+    assert not diff_snapshots(OLD, OLD)
+    assert render_changes(diff_snapshots(OLD, OLD)) == []
+
+
+def test_diff_snapshots_separates_cycles_and_repeated_rows():
+    row = Assignment("Daily Check", "09/01/2025", "Daily", "100")
+    old = [Course("Biology", "90%", cycle="1", assignments=(row, row))]
+    new = [Course("Biology", "90%", cycle="1", assignments=(row, row, row)),
+           Course("Biology", "90%", cycle="2", assignments=(row,))]
+    changes = diff_snapshots(old, new)
+    assert [(c.kind, c.cycle) for c in changes.changes] == [("new", "1"), ("new", "2"), ("course_added", "2")]
+
+
+def test_render_changes():
+    lines = render_changes(diff_snapshots(OLD, NEW))
+    assert "Score changed | Course: Geometry | Assignment: Unit 1 Quiz | Due: 08/27/2025 | 78.50 -> 82.00 (+3.50)" in lines
+    assert "Course removed | Course: Art I | was 100.00%" in lines